@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("agents", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="agent",
+            name="cache_responses",
+            field=models.BooleanField(default=False),
+        ),
+    ]
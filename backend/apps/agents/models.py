@@ -10,7 +10,15 @@ class Agent(models.Model):
     description = models.TextField(blank=True)
     model = models.CharField(max_length=50, default="gpt-4o-mini")
     temperature = models.FloatField(default=0.7)
+    # Reuse completions for identical prompts even when temperature > 0
+    cache_responses = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @property
+    def tasks_count(self):
+        """Total tasks, from the denormalized ``AgentTaskCounts`` row."""
+        counts = getattr(self, "task_counts", None)
+        return counts.total if counts else 0
+
     def __str__(self):
         return self.name
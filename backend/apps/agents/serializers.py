@@ -15,6 +15,7 @@ class AgentSerializer(serializers.ModelSerializer):
             "description",
             "model",
             "temperature",
+            "cache_responses",
             "created_at",
             "tasks_count",
             "recent_tasks",
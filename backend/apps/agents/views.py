@@ -1,16 +1,32 @@
-from django.db.models import Count, Prefetch
+import hashlib
+
+from django.db.models import Prefetch
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from rest_framework import viewsets
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 from apps.core.permissions import IsOwnerOrReadOnly
 from apps.tasks.models import AgentTask
-from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import (
+    AllowAny,
+    IsAuthenticated,
+    IsAuthenticatedOrReadOnly,
+)
 
 from .models import Agent
 from .serializers import AgentSerializer
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from apps.tasks.cache import get_cached_agents
+from apps.core.cache import get_or_compute, versioned_key
+from apps.tasks.cache import (
+    AGENTS_NAMESPACE,
+    agents_owner_namespace,
+    tasks_count_owner_namespace,
+)
 
 
 class AgentViewSet(viewsets.ModelViewSet):
@@ -18,6 +34,11 @@ class AgentViewSet(viewsets.ModelViewSet):
     # permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    # ?recent_tasks=N controls how many of each agent's latest tasks are embedded
+    recent_tasks_param = "recent_tasks"
+    recent_tasks_default = 5
+    recent_tasks_max = 50
+
     def get_queryset(self):
         user = self.request.user
         qs = Agent.objects
@@ -25,21 +46,114 @@ class AgentViewSet(viewsets.ModelViewSet):
         # if user.is_authenticated:
         #     qs = qs.filter(owner=user)
 
-        return qs.annotate(tasks_count=Count("tasks")).prefetch_related(
+        # tasks_count reads the denormalized counter row, not COUNT(tasks)
+        qs = qs.select_related("task_counts")
+        limit = self.get_recent_tasks_limit()
+        if not limit:
+            return qs
+        # A sliced Prefetch runs as one query filtered on
+        # ROW_NUMBER() OVER (PARTITION BY agent_id ORDER BY created_at DESC),
+        # so each agent contributes at most `limit` rows however long its history
+        return qs.prefetch_related(
             Prefetch(
                 "tasks",
-                queryset=AgentTask.objects.order_by("-created_at"),
+                queryset=AgentTask.objects.order_by("-created_at", "-id")[:limit],
                 to_attr="recent_tasks",
             )
         )
 
+    def get_recent_tasks_limit(self):
+        value = self.request.query_params.get(
+            self.recent_tasks_param, self.recent_tasks_default
+        )
+        try:
+            limit = int(value)
+        except (TypeError, ValueError):
+            raise ValidationError({self.recent_tasks_param: "Must be an integer."})
+        if limit < 0:
+            raise ValidationError({self.recent_tasks_param: "Must not be negative."})
+        return min(limit, self.recent_tasks_max)
+
     def perform_create(self, serializer):
         if not self.request.user.is_authenticated:
             raise PermissionDenied("You must be logged in to create an agent.")
         serializer.save(owner=self.request.user)
 
 
+class CachedAgentPagination(LimitOffsetPagination):
+    max_limit = 100
+
+
 class AgentListCachedView(APIView):
+    """
+    GET /api/agents/cached/: the caller's agents, ``limit``/``offset``
+    paginated like /api/agents/?recent_tasks=0, served as JSON rendered
+    once and kept in the cache (no query or serializer on a hit).
+
+    Pages are versioned by the owner's agent and task count namespaces, so
+    agent writes and ``tasks_count`` changes show up on the next read, while
+    task status changes leave the page cached.
+    Each page carries an ETag; a client that sends it back in
+    ``If-None-Match`` gets an empty 304 until the page changes.
+    """
+
+    permission_classes = [IsAuthenticated]
+    pagination_class = CachedAgentPagination
+    # Rendered pages live as long as the other agent caches
+    cache_timeout = 3600
+
     def get(self, request):
-        agents = get_cached_agents()
-        return Response(agents)
+        paginator = self.pagination_class()
+        limit = paginator.get_limit(request)
+        offset = paginator.get_offset(request)
+        url = request.build_absolute_uri(request.path)
+        user_id = request.user.pk
+        key = versioned_key(
+            f"agents:page:user:{user_id}:{limit}:{offset}:{url}",
+            AGENTS_NAMESPACE,
+            agents_owner_namespace(user_id),
+            tasks_count_owner_namespace(user_id),
+        )
+        body, etag = get_or_compute(
+            key,
+            lambda: self.render_page(user_id, limit, offset, url),
+            timeout=self.cache_timeout,
+        )
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type="application/json")
+        response["ETag"] = etag
+        # Let browsers keep the page but revalidate it on every poll
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def render_page(self, user_id, limit, offset, url):
+        """Return the page as JSON bytes and its ETag."""
+        agents = (
+            Agent.objects.filter(owner_id=user_id)
+            .select_related("task_counts")
+            .order_by("-created_at", "-id")
+        )
+        count = agents.count()
+        url = replace_query_param(url, "limit", limit)
+        next_url = previous_url = None
+        if offset + limit < count:
+            next_url = replace_query_param(url, "offset", offset + limit)
+        if offset > 0:
+            previous_url = (
+                replace_query_param(url, "offset", offset - limit)
+                if offset - limit > 0
+                else remove_query_param(url, "offset")
+            )
+        body = JSONRenderer().render(
+            {
+                "count": count,
+                "next": next_url,
+                "previous": previous_url,
+                "results": AgentSerializer(
+                    agents[offset : offset + limit], many=True
+                ).data,
+            }
+        )
+        return body, f'"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"'
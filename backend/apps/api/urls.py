@@ -1,9 +1,13 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from apps.agents.views import AgentViewSet
+from apps.agents.views import AgentListCachedView, AgentViewSet
 from apps.tasks.views import TaskViewSet
 
 router = DefaultRouter()
 router.register("agents", AgentViewSet, basename="agent")
 router.register("tasks", TaskViewSet, basename="task")
 
-urlpatterns = router.urls
+urlpatterns = [
+    # Ahead of the router, whose agents/<pk>/ route would match "cached"
+    path("agents/cached/", AgentListCachedView.as_view(), name="agent-list-cached"),
+] + router.urls
@@ -0,0 +1,324 @@
+"""
+Generational (versioned) cache keys.
+
+Cached values that depend on an entity embed that entity's *generation* in
+their key, e.g. ``tasks:recent:agent:7:10|tasks:agent:7=1731000000123``.
+Invalidating the entity is then a single ``INCR`` of its generation: every
+key built from the old generation stops being read and simply ages out
+with its TTL. Callers no longer need to know (or enumerate) every key
+variant that was cached, such as each ``limit`` of a list.
+
+A key may embed several namespaces, so one value can be invalidated from
+several directions (an owner's agent list depends on both the owner and
+the global agent namespace).
+
+Generations are stored without expiry. A missing generation (evicted, or
+never set) starts from the current time in milliseconds rather than 1, so
+a reset never revives entries written under an earlier generation.
+
+Generations and ``get_or_compute`` entries are read through the
+in-process L1 of ``local_cache``; bumping a generation drops it from every
+process's L1.
+
+``get_or_compute`` is the cache-aside read used with those keys. It keeps
+a stale copy past expiry so that, when a hot entry expires, one process
+rebuilds it while the rest keep serving the old value instead of all
+querying the database at once.
+
+Model changes invalidate through ``invalidate_on_commit``: the bump waits
+for the transaction to commit (and is dropped on rollback), so no reader
+can re-cache the old rows in between. Inside ``invalidation_batch`` (each
+request, see ``CacheInvalidationMiddleware``, and each Celery task) the
+bumps are collected and sent together as one pipelined Redis call.
+"""
+import logging
+import math
+import random
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.db import transaction
+
+from .local_cache import get_tiered_cache
+
+logger = logging.getLogger(__name__)
+
+GENERATION_PREFIX = "gen:"
+
+# Namespaces committed inside the current invalidation_batch, or None
+_pending: ContextVar[set[str] | None] = ContextVar(
+    "cache_invalidation_batch", default=None
+)
+
+
+def generation_key(namespace: str) -> str:
+    return f"{GENERATION_PREFIX}{namespace}"
+
+
+def _initial_generation() -> int:
+    return int(time.time() * 1000)
+
+
+def get_generations(*namespaces: str) -> dict[str, int]:
+    """Current generation of each namespace, in one cache round trip."""
+    keys = {generation_key(ns): ns for ns in namespaces}
+    tiered = get_tiered_cache()
+    found = tiered.get_many(list(keys))
+    generations = {}
+    for key, namespace in keys.items():
+        generation = found.get(key)
+        if generation is None:
+            # add() so concurrent first readers settle on the same value
+            cache.add(key, _initial_generation(), timeout=None)
+            generation = tiered.get(key)
+        generations[namespace] = generation
+    return generations
+
+
+def versioned_key(base: str, *namespaces: str) -> str:
+    """
+    Build a cache key for ``base`` that changes whenever any of
+    ``namespaces`` is bumped.
+    """
+    generations = get_generations(*namespaces)
+    suffix = "|".join(f"{ns}={generations[ns]}" for ns in namespaces)
+    return f"{base}|{suffix}" if suffix else base
+
+
+def bump_generation(*namespaces: str) -> None:
+    """Invalidate every key built from ``namespaces``."""
+    keys = [generation_key(namespace) for namespace in namespaces]
+    if not keys:
+        return
+    client = get_redis_client()
+    if client is not None:
+        # One round trip for the whole batch. SET NX first: a generation
+        # that is not set yet starts fresh instead of INCR creating it at 1
+        initial = _initial_generation()
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            redis_key = cache.make_and_validate_key(key)
+            pipe.set(redis_key, initial, nx=True)
+            pipe.incr(redis_key)
+        pipe.execute()
+    else:
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Not set yet: nothing was cached under it, start a fresh one
+                cache.add(key, _initial_generation(), timeout=None)
+    # Every process must stop using its in-process copy of the old generation
+    get_tiered_cache().invalidate(keys)
+
+
+def invalidate_on_commit(*namespaces: str) -> None:
+    """
+    Bump ``namespaces`` once the current transaction commits; immediately
+    when there is none. Inside ``invalidation_batch`` the bump is deferred
+    to the end of the batch.
+    """
+    transaction.on_commit(lambda: _invalidate_committed(namespaces), robust=True)
+
+
+def _invalidate_committed(namespaces):
+    pending = _pending.get()
+    if pending is None:
+        bump_generation(*namespaces)
+    else:
+        pending.update(namespaces)
+
+
+def begin_invalidation_batch():
+    """Start collecting committed invalidations; returns a token, or None if nested."""
+    if _pending.get() is not None:
+        return None
+    return _pending.set(set())
+
+
+def end_invalidation_batch(token) -> None:
+    """Send everything collected since ``begin_invalidation_batch`` in one call."""
+    if token is None:
+        return
+    namespaces = _pending.get()
+    _pending.reset(token)
+    _send(namespaces)
+
+
+def flush_invalidations() -> None:
+    """Send the current batch's invalidations now and keep batching."""
+    namespaces = _pending.get()
+    if namespaces:
+        _send(set(namespaces))
+        namespaces.clear()
+
+
+def _send(namespaces):
+    if not namespaces:
+        return
+    try:
+        bump_generation(*sorted(namespaces))
+    except Exception:
+        # The writes are committed; the stale entries age out with their TTL
+        logger.exception(f"Could not invalidate cache namespaces {sorted(namespaces)}")
+
+
+@contextmanager
+def invalidation_batch():
+    """Batch the invalidations committed inside the block (nesting is a no-op)."""
+    token = begin_invalidation_batch()
+    try:
+        yield
+    finally:
+        end_invalidation_batch(token)
+
+
+_redis = None
+_release_script = None
+
+# Delete the lock only if it still holds our token
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def get_redis_client():
+    """
+    A ``redis.Redis`` client on the default cache's (write) server, or None
+    when the default cache is not Redis. For what the cache API cannot do
+    (pipelines, scripts); build keys with ``cache.make_and_validate_key``.
+    """
+    global _redis, _release_script
+    if not isinstance(caches["default"], RedisCache):
+        return None
+    if _redis is None:
+        import redis
+
+        location = settings.CACHES["default"]["LOCATION"]
+        if isinstance(location, str):
+            location = re.split("[;,]", location)
+        _redis = redis.Redis.from_url(location[0])
+        _release_script = _redis.register_script(RELEASE_SCRIPT)
+    return _redis
+
+
+def lock_key(key: str) -> str:
+    return f"lock:{key}"
+
+
+def acquire_lock(name: str, timeout: float) -> str | None:
+    """
+    Take the lock ``name`` for ``timeout`` seconds.
+
+    Returns:
+        The token to release it with, or None if someone else holds it
+    """
+    token = uuid.uuid4().hex
+    client = get_redis_client()
+    if client is None:
+        return token if cache.add(name, token, timeout=timeout) else None
+    key = cache.make_and_validate_key(name)
+    if client.set(key, token, nx=True, px=max(1, int(timeout * 1000))):
+        return token
+    return None
+
+
+def lock_owner(name: str) -> str | None:
+    """Token of whoever holds the lock ``name``, or None if it is free."""
+    client = get_redis_client()
+    if client is None:
+        return cache.get(name)
+    token = client.get(cache.make_and_validate_key(name))
+    return token.decode() if token is not None else None
+
+
+def release_lock(name: str, token: str) -> bool:
+    """
+    Release the lock ``name`` if ``token`` still holds it. A lock that
+    expired and was taken by someone else is left alone. Atomic on Redis
+    only; other cache backends check and delete in two steps.
+    """
+    client = get_redis_client()
+    if client is None:
+        if cache.get(name) != token:
+            return False
+        cache.delete(name)
+        return True
+    return bool(_release_script(keys=[cache.make_and_validate_key(name)], args=[token]))
+
+
+def get_or_compute(
+    key: str,
+    compute: Callable[[], Any],
+    timeout: int,
+    stale_timeout: int | None = None,
+    beta: float = 1.0,
+    lock_timeout: float = 10,
+) -> Any:
+    """
+    Cache-aside read of ``key`` that lets only one process recompute it.
+
+    Entries are stored as ``(value, expires_at, cost)`` and kept for
+    ``stale_timeout`` seconds (default: ``timeout``) past their logical
+    expiry. Reads then go:
+
+    * fresh entry: returned, except that a read may volunteer to refresh it
+      early with probability rising as expiry nears and with the recorded
+      recompute ``cost`` (XFetch; ``beta`` > 1 refreshes earlier);
+    * expired or volunteered: whoever wins the ``lock:<key>`` recomputes,
+      everyone else keeps returning the stale value meanwhile;
+    * nothing cached: the lock winner computes while the others poll for
+      its result for up to ``lock_timeout`` seconds, then give up waiting
+      and compute it themselves.
+    """
+    if stale_timeout is None:
+        stale_timeout = timeout
+    entry = get_tiered_cache().get(key)
+    if entry is not None:
+        value, expires_at, cost = entry
+        # -log(u) for u in (0, 1] is an exponential draw with mean 1
+        early = cost * beta * -math.log(1.0 - random.random())
+        if time.time() + early < expires_at:
+            return value
+        token = acquire_lock(lock_key(key), lock_timeout)
+        if token is None:
+            return value
+        return _recompute(key, compute, timeout, stale_timeout, token)
+
+    token = acquire_lock(lock_key(key), lock_timeout)
+    if token is not None:
+        return _recompute(key, compute, timeout, stale_timeout, token)
+    deadline = time.monotonic() + lock_timeout
+    delay = 0.01
+    while time.monotonic() < deadline:
+        time.sleep(delay)
+        entry = get_tiered_cache().get(key)
+        if entry is not None:
+            return entry[0]
+        delay = min(delay * 2, 0.2)
+    return compute()
+
+
+def _recompute(key, compute, timeout, stale_timeout, token):
+    try:
+        started = time.monotonic()
+        value = compute()
+        cost = time.monotonic() - started
+        get_tiered_cache().set(
+            key, (value, time.time() + timeout, cost), timeout + stale_timeout
+        )
+        return value
+    finally:
+        # Not a plain delete: after a slow compute the lock may have expired
+        # and been taken by another worker
+        release_lock(lock_key(key), token)
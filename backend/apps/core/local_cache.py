@@ -0,0 +1,296 @@
+"""
+Two-tier cache: a small in-process LRU (L1) in front of the Django cache
+(L2, Redis in production).
+
+Hot helpers such as ``get_cached_agents`` are read thousands of times per
+second per worker. Through L1 such a read is a dict lookup instead of a
+Redis round trip and an unpickle. L1 entries live for a few seconds at
+most (``TTL``), and there are at most ``MAX_ENTRIES`` of them per process.
+
+Writes and invalidations made through ``TieredCache`` drop the key from
+every process's L1. They go out on the invalidation backend:
+
+* ``LocalInvalidation`` - this process only; for development and tests.
+* ``RedisInvalidation`` - a Redis pub/sub channel that every worker
+  listens on from a daemon thread. A lost message costs at most ``TTL``
+  seconds of staleness.
+
+Values returned from L1 are shared between callers and must be treated as
+read-only.
+
+Hits and misses are counted per tier. Each process adds its counts to
+shared counters in the Django cache at most every ``STATS_FLUSH_INTERVAL``
+seconds, so counting adds no round trip to reads.
+
+Configured by the ``LOCAL_CACHE`` setting::
+
+    LOCAL_CACHE = {
+        "MAX_ENTRIES": 1024,
+        "TTL": 5,
+        "BACKEND": "apps.core.local_cache.RedisInvalidation",
+        "OPTIONS": {"url": "redis://127.0.0.1:6379/1"},
+    }
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "MAX_ENTRIES": 1024,
+    # Seconds an entry may be served from L1 without asking L2
+    "TTL": 5,
+    "BACKEND": "apps.core.local_cache.LocalInvalidation",
+    "OPTIONS": {},
+    "STATS_FLUSH_INTERVAL": 10,
+}
+
+STATS_PREFIX = "cache:tier:stats:"
+STAT_NAMES = ("l1_hits", "l1_misses", "l2_hits", "l2_misses")
+
+MISSING = object()
+
+
+def get_local_cache_setting(name: str) -> Any:
+    return getattr(settings, "LOCAL_CACHE", {}).get(name, DEFAULTS[name])
+
+
+class LRUCache:
+    """Bounded, TTL-limited mapping; least recently used entries go first."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # key -> (monotonic expiry, value)
+        self.entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            if entry[0] <= time.monotonic():
+                del self.entries[key]
+                return MISSING
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete_many(self, keys: Iterable[str]):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class LocalInvalidation:
+    """Invalidations reach this process only."""
+
+    def __init__(self, **options):
+        pass
+
+    def start(self, on_invalidate: Callable[[list[str]], None]):
+        pass
+
+    def publish(self, keys: list[str]):
+        pass
+
+
+class RedisInvalidation:
+    """Broadcasts invalidated keys to every process over Redis pub/sub."""
+
+    def __init__(
+        self,
+        url: str = "redis://127.0.0.1:6379/1",
+        channel: str = "cache:l1:invalidate",
+        **options,
+    ):
+        import redis
+
+        self.client = redis.Redis.from_url(url, **options)
+        self.channel = channel
+        # Lets the listener skip this process's own messages
+        self.sender = uuid.uuid4().hex
+
+    def start(self, on_invalidate: Callable[[list[str]], None]):
+        thread = threading.Thread(
+            target=self._listen,
+            args=(on_invalidate,),
+            name="local-cache-invalidation",
+            daemon=True,
+        )
+        thread.start()
+
+    def _listen(self, on_invalidate):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    payload = json.loads(message["data"])
+                    if payload["sender"] != self.sender:
+                        on_invalidate(payload["keys"])
+            except Exception:
+                logger.exception("Local cache invalidation listener failed")
+                time.sleep(1)
+
+    def publish(self, keys: list[str]):
+        payload = json.dumps({"sender": self.sender, "keys": keys})
+        try:
+            self.client.publish(self.channel, payload)
+        except Exception:
+            # Other processes converge within the L1 TTL
+            logger.exception("Could not publish local cache invalidation")
+
+
+class TieredCache:
+    """L1 ``LRUCache`` over the Django cache, kept coherent by ``invalidation``."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.enabled = get_local_cache_setting("ENABLED")
+        self.local = LRUCache(
+            get_local_cache_setting("MAX_ENTRIES"), get_local_cache_setting("TTL")
+        )
+        backend = import_string(get_local_cache_setting("BACKEND"))
+        self.invalidation = backend(**get_local_cache_setting("OPTIONS"))
+        self.stats_lock = threading.Lock()
+        self.counts: Counter = Counter()
+        self.last_flush = time.monotonic()
+        if self.enabled:
+            self.invalidation.start(self.local.delete_many)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys: list[str]) -> dict[str, Any]:
+        found = {}
+        remote = keys
+        if self.enabled:
+            remote = []
+            for key in keys:
+                value = self.local.get(key)
+                if value is MISSING:
+                    remote.append(key)
+                else:
+                    found[key] = value
+        l2_hits = 0
+        if remote:
+            fetched = cache.get_many(remote)
+            if self.enabled:
+                for key, value in fetched.items():
+                    self.local.set(key, value)
+            found.update(fetched)
+            l2_hits = len(fetched)
+        self._count(
+            l1_hits=len(keys) - len(remote),
+            l1_misses=len(remote),
+            l2_hits=l2_hits,
+            l2_misses=len(remote) - l2_hits,
+        )
+        return found
+
+    def set(self, key: str, value: Any, timeout: float | None):
+        """Write through to L2 and replace the key in every process's L1."""
+        cache.set(key, value, timeout)
+        if self.enabled:
+            self.local.set(key, value)
+            self.invalidation.publish([key])
+
+    def invalidate(self, keys: list[str]):
+        """Drop ``keys`` from every process's L1 (after they changed in L2)."""
+        if self.enabled:
+            self.local.delete_many(keys)
+            self.invalidation.publish(keys)
+
+    def _count(self, **amounts):
+        with self.stats_lock:
+            self.counts.update(amounts)
+            if time.monotonic() - self.last_flush < get_local_cache_setting(
+                "STATS_FLUSH_INTERVAL"
+            ):
+                return
+            pending, self.counts = self.counts, Counter()
+            self.last_flush = time.monotonic()
+        self._flush(pending)
+
+    def _flush(self, pending: Counter):
+        try:
+            for name, amount in pending.items():
+                if amount:
+                    cache.add(STATS_PREFIX + name, 0, timeout=None)
+                    cache.incr(STATS_PREFIX + name, amount)
+        except Exception:
+            logger.exception("Could not record cache tier stats")
+
+    def flush_stats(self):
+        with self.stats_lock:
+            pending, self.counts = self.counts, Counter()
+            self.last_flush = time.monotonic()
+        self._flush(pending)
+
+
+def get_stats() -> dict[str, Any]:
+    """Hits, misses and hit ratio per tier, summed over every process."""
+    get_tiered_cache().flush_stats()
+    values = cache.get_many([STATS_PREFIX + name for name in STAT_NAMES])
+    counts = {name: values.get(STATS_PREFIX + name, 0) for name in STAT_NAMES}
+    stats = {}
+    for tier in ("l1", "l2"):
+        hits, misses = counts[f"{tier}_hits"], counts[f"{tier}_misses"]
+        lookups = hits + misses
+        stats[tier] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+    return stats
+
+
+def reset_stats():
+    get_tiered_cache().flush_stats()
+    cache.delete_many([STATS_PREFIX + name for name in STAT_NAMES])
+
+
+_tiered = None
+_tiered_lock = threading.Lock()
+
+
+def get_tiered_cache() -> TieredCache:
+    """Return this process's tiered cache, rebuilt after a fork."""
+    global _tiered
+    if _tiered is None or _tiered.pid != os.getpid():
+        with _tiered_lock:
+            if _tiered is None or _tiered.pid != os.getpid():
+                _tiered = TieredCache()
+    return _tiered
+
+
+def reset_tiered_cache():
+    """Drop the L1 and re-read settings (used in tests)."""
+    global _tiered
+    _tiered = None
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import statistics
+import time
+
+import httpx
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Log in repeatedly through POST /api/auth/login/ against a running "
+        "server and report throughput and latency. Logins are throttled per "
+        "client (DEFAULT_THROTTLE_RATES), so raise the rate on the server "
+        "first or throttled requests count as failures."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("base_url", help="API root, e.g. http://localhost:8000/api")
+        parser.add_argument("--username", required=True)
+        parser.add_argument("--password", required=True)
+        parser.add_argument("--logins", type=int, default=500)
+        parser.add_argument(
+            "--concurrency", type=int, default=10, help="Parallel login requests"
+        )
+
+    def handle(self, *args, **options):
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        elapsed, latencies, failed = asyncio.run(self.run(options))
+        ok = len(latencies)
+        self.stdout.write(
+            f"{ok} logins in {elapsed:.2f}s ({ok / elapsed:.1f} logins/s), "
+            f"{failed} failed"
+        )
+        if ok:
+            latencies.sort()
+            p95 = latencies[min(ok - 1, int(ok * 0.95))]
+            self.stdout.write(
+                f"latency: median {statistics.median(latencies) * 1000:.1f}ms, "
+                f"p95 {p95 * 1000:.1f}ms"
+            )
+
+    async def run(self, options):
+        semaphore = asyncio.Semaphore(options["concurrency"])
+        credentials = {
+            "username": options["username"],
+            "password": options["password"],
+        }
+        latencies = []
+        failed = 0
+
+        async def login(client):
+            nonlocal failed
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/auth/login/", json=credentials)
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    failed += 1
+
+        async with httpx.AsyncClient(
+            base_url=options["base_url"].rstrip("/"), timeout=60
+        ) as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(login(client) for _ in range(options["logins"])))
+            elapsed = time.perf_counter() - started
+        return elapsed, latencies, failed
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+
+import httpx
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many concurrent SSE connections against a running server and "
+        "report how many stay open. Point it at a single ASGI worker to "
+        "measure connections-per-process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "url", help="Stream URL, e.g. http://localhost:8000/stream/tasks/"
+        )
+        parser.add_argument("--token", help="JWT access token appended as ?token=")
+        parser.add_argument("--connections", type=int, default=1000)
+        parser.add_argument(
+            "--duration", type=float, default=30.0, help="Seconds to hold each stream"
+        )
+        parser.add_argument(
+            "--ramp",
+            type=float,
+            default=5.0,
+            help="Seconds over which to open connections",
+        )
+
+    def handle(self, *args, **options):
+        # httpx logs every request at INFO, which would drown the report
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        stats = asyncio.run(self.run(options))
+        self.stdout.write(
+            f"connections requested: {options['connections']}\n"
+            f"connections opened:    {stats['opened']}\n"
+            f"still open at end:     {stats['held']}\n"
+            f"failed:                {stats['failed']}\n"
+            f"events received:       {stats['events']}\n"
+            f"keepalives received:   {stats['keepalives']}"
+        )
+        if stats["held"] == options["connections"]:
+            self.stdout.write(self.style.SUCCESS("✅ All connections held"))
+        else:
+            self.stdout.write(self.style.WARNING("⚠️  Some connections dropped"))
+
+    async def run(self, options):
+        stats = {"opened": 0, "held": 0, "failed": 0, "events": 0, "keepalives": 0}
+        params = {"token": options["token"]} if options["token"] else None
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        timeout = httpx.Timeout(10.0, read=None)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + options["ramp"] + options["duration"]
+        delay = options["ramp"] / max(options["connections"], 1)
+
+        async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+
+            async def consume():
+                try:
+                    async with client.stream(
+                        "GET", options["url"], params=params
+                    ) as response:
+                        response.raise_for_status()
+                        stats["opened"] += 1
+                        async with asyncio.timeout_at(deadline):
+                            async for line in response.aiter_lines():
+                                if line.startswith("data:"):
+                                    stats["events"] += 1
+                                elif line.startswith(": keepalive"):
+                                    stats["keepalives"] += 1
+                except TimeoutError:
+                    stats["held"] += 1
+                except Exception:
+                    stats["failed"] += 1
+
+            workers = []
+            for _ in range(options["connections"]):
+                workers.append(asyncio.create_task(consume()))
+                await asyncio.sleep(delay)
+            await asyncio.gather(*workers)
+
+        return stats
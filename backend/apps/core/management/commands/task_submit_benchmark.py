@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import time
+
+import httpx
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Submit the same prompts through POST /api/tasks/run/ (one request "
+        "per item) and POST /api/tasks/run-batch/ against a running server, "
+        "and compare wall time and throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("base_url", help="API root, e.g. http://localhost:8000/api")
+        parser.add_argument("--token", required=True, help="JWT access token")
+        parser.add_argument("--agent", type=int, required=True, help="Agent id")
+        parser.add_argument("--items", type=int, default=1000)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Items per run-batch request (at most TASK_BATCH['MAX_ITEMS'])",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=10,
+            help="Parallel requests for the single-item path",
+        )
+
+    def handle(self, *args, **options):
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        single, batch = asyncio.run(self.run(options))
+        for label, (elapsed, created) in (("single", single), ("batch", batch)):
+            self.stdout.write(
+                f"{label:<7} {created:>7} tasks in {elapsed:8.2f}s "
+                f"({created / elapsed:10.1f} tasks/s)"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"run-batch speedup: {single[0] / batch[0]:.1f}x")
+        )
+
+    async def run(self, options):
+        headers = {"Authorization": f"Bearer {options['token']}"}
+        prompts = [f"benchmark prompt {i}" for i in range(options["items"])]
+        async with httpx.AsyncClient(
+            base_url=options["base_url"].rstrip("/"), headers=headers, timeout=120
+        ) as client:
+            single = await self.submit_single(client, options, prompts)
+            batch = await self.submit_batch(client, options, prompts)
+        return single, batch
+
+    async def submit_single(self, client, options, prompts):
+        semaphore = asyncio.Semaphore(options["concurrency"])
+        created = 0
+
+        async def post(prompt):
+            nonlocal created
+            async with semaphore:
+                response = await client.post(
+                    "/tasks/run/",
+                    json={"agent": options["agent"], "input_text": prompt},
+                )
+                if response.status_code == 201:
+                    created += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(post(prompt) for prompt in prompts))
+        return time.perf_counter() - started, created
+
+    async def submit_batch(self, client, options, prompts):
+        created = 0
+        size = options["batch_size"]
+        started = time.perf_counter()
+        for i in range(0, len(prompts), size):
+            items = [
+                {"agent": options["agent"], "input_text": prompt}
+                for prompt in prompts[i : i + size]
+            ]
+            response = await client.post("/tasks/run-batch/", json={"items": items})
+            response.raise_for_status()
+            created += response.json()["count"]
+        return time.perf_counter() - started, created
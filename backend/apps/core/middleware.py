@@ -1,6 +1,8 @@
 import time
 import logging
 
+from .cache import invalidation_batch
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,3 +35,17 @@ class RequestLoggingMiddleware:
             f"{response.status_code} {duration:.2f}ms from {ip}"
         )
         return response
+
+
+class CacheInvalidationMiddleware:
+    """
+    Batch the cache invalidations committed while handling a request into
+    one Redis call, sent before the response goes out.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with invalidation_batch():
+            return self.get_response(request)
@@ -0,0 +1,122 @@
+"""
+Keyset pagination for long, append-mostly lists.
+
+``LimitOffsetPagination`` makes the database walk and discard ``offset``
+rows and runs a ``COUNT(*)`` for every page. ``KeysetPagination`` instead
+carries the last row's ``(created_at, id)`` in an opaque cursor and asks
+for the rows strictly after it::
+
+    WHERE created_at < :ts OR (created_at = :ts AND id < :id)
+    ORDER BY created_at DESC, id DESC
+    LIMIT page_size + 1
+
+so every page costs one index range read however deep the client is, and
+there is no count. ``id`` breaks ties between rows created in the same
+microsecond, which makes the position exact (DRF's ``CursorPagination``
+keys on a single field and falls back to offsets within ties).
+
+Clients that need totals or random access opt into limit/offset paging by
+passing ``limit`` or ``offset``. A custom ``ordering`` also falls back to
+it, since the cursor only describes a position in creation order.
+"""
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    LimitOffsetPagination,
+)
+from rest_framework.response import Response
+
+
+class KeysetPagination(CursorPagination):
+    """Newest-first cursor over ``(created_at, id)``, with offset paging on request."""
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    offset_pagination_class = LimitOffsetPagination
+    # Query parameters that switch a request to offset_pagination_class
+    offset_query_params = ("limit", "offset", "ordering")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if any(param in request.query_params for param in self.offset_query_params):
+            self.fallback = self.offset_pagination_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+        self.fallback = None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+
+        if reverse:
+            queryset = queryset.order_by("created_at", "id")
+        else:
+            queryset = queryset.order_by("-created_at", "-id")
+        if self.cursor:
+            queryset = queryset.filter(self.after(self.cursor.position, reverse))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_following = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_previous, self.has_next = has_following, True
+        else:
+            self.has_next, self.has_previous = has_following, self.cursor is not None
+        return self.page
+
+    def after(self, position, reverse):
+        """Filter for rows past ``position`` in the direction of travel."""
+        try:
+            created, pk = position.rsplit("|", 1)
+            created, pk = parse_datetime(created), int(pk)
+        except (AttributeError, TypeError, ValueError):
+            created = None
+        if created is None:
+            raise NotFound(self.invalid_cursor_message)
+        op = "gt" if reverse else "lt"
+        return Q(**{f"created_at__{op}": created}) | Q(
+            created_at=created, **{f"id__{op}": pk}
+        )
+
+    def get_position(self, row):
+        return f"{row.created_at.isoformat()}|{row.pk}"
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        cursor = Cursor(
+            offset=0, reverse=False, position=self.get_position(self.page[-1])
+        )
+        return self.encode_cursor(cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        cursor = Cursor(
+            offset=0, reverse=True, position=self.get_position(self.page[0])
+        )
+        return self.encode_cursor(cursor)
+
+    def get_paginated_response(self, data):
+        if self.fallback:
+            return self.fallback.get_paginated_response(data)
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(
+            view
+        ) + self.offset_pagination_class().get_schema_operation_parameters(view)
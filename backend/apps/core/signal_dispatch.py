@@ -0,0 +1,186 @@
+"""
+Asynchronous dispatch for signal receivers.
+
+The auth signal receivers (see ``signals``) run inside ``LoginView.post``
+and friends. They only copy the few values they need from the request and
+``dispatch`` a handler. A background thread runs the handlers in batches:
+it formats and writes the log line and returns the event, then hands the
+whole batch to the signal event queue in one call (one pipelined round
+trip on ``RedisSignalEventQueue``).
+
+The pending queue is bounded. When the flusher cannot keep up, new work
+is dropped and counted rather than making logins wait; the flusher logs
+how many were dropped.
+
+Configured by the ``SIGNAL_DISPATCH`` setting::
+
+    SIGNAL_DISPATCH = {
+        "ASYNC": True,  # False runs handlers inline (debugging)
+        "MAX_PENDING": 10000,
+        "BATCH_SIZE": 100,
+    }
+"""
+import logging
+import os
+import queue
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .signal_events import get_signal_event_queue
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ASYNC": True,
+    "MAX_PENDING": 10000,
+    "BATCH_SIZE": 100,
+}
+
+# (signal_type, event_data, level, timestamp), as taken by
+# SignalEventQueue.add_event
+Event = Tuple[str, Dict[str, Any], str, str]
+
+
+def get_dispatch_setting(name: str) -> Any:
+    return getattr(settings, "SIGNAL_DISPATCH", {}).get(name, DEFAULTS[name])
+
+
+class SignalDispatcher:
+    """Bounded queue of handler calls drained by one daemon flusher thread."""
+
+    def __init__(self, max_pending: int = 10000, batch_size: int = 100):
+        self.pid = os.getpid()
+        self.batch_size = batch_size
+        self.queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self.stats_lock = threading.Lock()
+        self.counts: Counter = Counter()
+        self.reported_drops = 0
+        self.thread: Optional[threading.Thread] = None
+
+    def dispatch(self, handler: Callable[..., Optional[Event]], *args) -> bool:
+        """
+        Queue ``handler(*args)`` for the flusher; never blocks.
+        The handler may return an ``Event`` to add to the signal event queue.
+
+        Returns:
+            False if the queue was full and the call was dropped
+        """
+        self._ensure_started()
+        try:
+            self.queue.put_nowait((handler, args))
+        except queue.Full:
+            self._count(dropped=1)
+            return False
+        self._count(queued=1)
+        return True
+
+    def _ensure_started(self):
+        if self.thread is not None:
+            return
+        with self.stats_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self._run, name="signal-dispatch", daemon=True
+                )
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            # Take whatever else is already waiting, up to a batch
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.deliver(batch)
+            finally:
+                # Handlers may use the database; let go of the connection
+                # between batches like a request would
+                close_old_connections()
+                for _ in batch:
+                    self.queue.task_done()
+
+    def deliver(self, batch):
+        """Run ``batch`` of ``(handler, args)`` and store the events they return."""
+        events = []
+        for handler, args in batch:
+            try:
+                event = handler(*args)
+            except Exception:
+                logger.exception(f"Signal handler {handler.__name__} failed")
+                self._count(failed=1)
+                continue
+            if event is not None:
+                events.append(event)
+        if events:
+            try:
+                get_signal_event_queue().add_events(events)
+            except Exception:
+                logger.exception(f"Could not store {len(events)} signal events")
+                self._count(failed=len(events))
+            else:
+                self._count(delivered=len(events))
+        self._report_drops()
+
+    def _report_drops(self):
+        with self.stats_lock:
+            dropped = self.counts["dropped"] - self.reported_drops
+            self.reported_drops = self.counts["dropped"]
+        if dropped:
+            logger.warning(f"Dropped {dropped} signal events: dispatch queue full")
+
+    def _count(self, **amounts):
+        with self.stats_lock:
+            self.counts.update(amounts)
+
+    def flush(self):
+        """Wait until everything queued so far has been handled (tests, shutdown)."""
+        if self.thread is not None:
+            self.queue.join()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Calls queued, dropped and failed, events delivered, and calls pending."""
+        with self.stats_lock:
+            stats = {
+                name: self.counts[name]
+                for name in ("queued", "dropped", "failed", "delivered")
+            }
+        stats["pending"] = self.queue.qsize()
+        return stats
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_signal_dispatcher() -> SignalDispatcher:
+    """Return this process's dispatcher, rebuilt after a fork."""
+    global _dispatcher
+    if _dispatcher is None or _dispatcher.pid != os.getpid():
+        with _dispatcher_lock:
+            if _dispatcher is None or _dispatcher.pid != os.getpid():
+                _dispatcher = SignalDispatcher(
+                    max_pending=get_dispatch_setting("MAX_PENDING"),
+                    batch_size=get_dispatch_setting("BATCH_SIZE"),
+                )
+    return _dispatcher
+
+
+def reset_signal_dispatcher():
+    """Drop the dispatcher so the next call re-reads settings (used in tests)."""
+    global _dispatcher
+    _dispatcher = None
+
+
+def dispatch(handler: Callable[..., Optional[Event]], *args):
+    """Run ``handler(*args)`` off the caller's thread (inline if not ``ASYNC``)."""
+    if get_dispatch_setting("ASYNC"):
+        get_signal_dispatcher().dispatch(handler, *args)
+    else:
+        get_signal_dispatcher().deliver([(handler, args)])
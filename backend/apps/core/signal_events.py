@@ -1,29 +1,79 @@
 """
 Signal event queue for streaming system signals to monitoring dashboard.
+
+Every event carries a ``seq`` that increases monotonically across the whole
+log. Readers remember the last ``seq`` they saw and ask for what came after
+it, so a read copies only the new events and positions stay valid after
+old events are dropped. Readers block until an event arrives instead of
+polling.
+
+The backend is selected with the ``SIGNAL_EVENTS`` setting, in the same
+shape as ``CACHES``::
+
+    SIGNAL_EVENTS = {
+        "BACKEND": "apps.core.signal_events.RedisSignalEventQueue",
+        "OPTIONS": {"url": "redis://127.0.0.1:6379/1", "maxlen": 1000},
+    }
+
+* ``SignalEventQueue`` (default) - an in-process ring buffer; only events
+  raised in the serving process are seen. For tests and single-process dev.
+* ``RedisSignalEventQueue`` - one Redis Stream shared by every web and
+  Celery process, so a stream shows events from all of them.
 """
+import asyncio
 import json
-from collections import deque
 from datetime import datetime
-from threading import Lock
-from typing import Any, Dict
+from threading import Condition, Lock
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND = "apps.core.signal_events.SignalEventQueue"
+
+
+def event_timestamp() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def build_event(
+    signal_type: str,
+    event_data: Dict[str, Any],
+    level: str,
+    timestamp: Optional[str] = None,
+):
+    return {
+        "timestamp": timestamp or event_timestamp(),
+        "signal_type": signal_type,
+        "level": level,
+        "data": event_data,
+    }
 
 
 class SignalEventQueue:
     """
-    Thread-safe queue for collecting signal events.
-    Keeps the last 1000 events in memory for streaming to clients.
+    Thread-safe ring buffer of signal events.
+    Keeps the last ``maxlen`` (1000) events in memory for streaming to clients.
+    ``seq`` is an integer counting from 1.
     """
 
-    def __init__(self, maxlen: int = 1000):
-        self.events = deque(maxlen=maxlen)
-        self.lock = Lock()
+    def __init__(self, maxlen: int = 1000, **options):
+        self.maxlen = maxlen
+        self.buffer: List[Optional[Dict[str, Any]]] = [None] * maxlen
+        # seq of the next event, and of the oldest one still readable
+        self.next_seq = 1
+        self.first_seq = 1
+        self.condition = Condition()
+        # (loop, future) pairs of async readers waiting for the next event
+        self.async_waiters: list = []
 
     def add_event(
         self,
         signal_type: str,
         event_data: Dict[str, Any],
         level: str = "info",
-    ):
+        timestamp: Optional[str] = None,
+    ) -> int:
         """
         Add a signal event to the queue.
 
@@ -31,42 +81,254 @@ class SignalEventQueue:
             signal_type: Type of signal (e.g., 'user_logged_in', 'user_logged_out')
             event_data: Dictionary containing event details
             level: Log level ('info', 'warning', 'error')
+            timestamp: When it happened (``event_timestamp()``); defaults to now
+
+        Returns:
+            The event's sequence number
+        """
+        return self.add_events([(signal_type, event_data, level, timestamp)])[0]
+
+    def add_events(self, events: List[tuple]) -> list:
+        """
+        Add several ``(signal_type, event_data, level[, timestamp])`` events
+        at once, waking readers once.
+
+        Returns:
+            The events' sequence numbers
         """
-        event = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "signal_type": signal_type,
-            "level": level,
-            "data": event_data,
-        }
+        built = [build_event(*event) for event in events]
 
-        with self.lock:
-            self.events.append(event)
+        with self.condition:
+            seqs = []
+            for event in built:
+                seq = self.next_seq
+                event["seq"] = seq
+                self.buffer[(seq - 1) % self.maxlen] = event
+                self.next_seq = seq + 1
+                seqs.append(seq)
+            self.first_seq = max(self.first_seq, self.next_seq - self.maxlen)
+            self.condition.notify_all()
+            waiters, self.async_waiters = self.async_waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                # The reader's loop has shut down
+                pass
+        return seqs
 
-    def get_events(self, since_index: int = 0) -> list:
+    @property
+    def latest_seq(self) -> int:
+        """Sequence number of the newest event (0 before the first one)."""
+        with self.condition:
+            return self.next_seq - 1
+
+    def get_events(self, since_seq: int = 0) -> list:
         """
-        Get events since a specific index.
+        Get events newer than ``since_seq``.
 
         Args:
-            since_index: Return events after this index
+            since_seq: ``seq`` of the last event already seen (0 for all)
 
         Returns:
-            List of events since the given index
+            List of events after ``since_seq``, oldest first. Events that were
+            overwritten before the reader caught up are skipped.
+        """
+        with self.condition:
+            return self._read(since_seq)
+
+    def _start(self, since_seq: int) -> int:
+        return max(since_seq + 1, self.first_seq)
+
+    def _read(self, since_seq: int) -> list:
+        start = self._start(since_seq)
+        return [
+            self.buffer[(seq - 1) % self.maxlen] for seq in range(start, self.next_seq)
+        ]
+
+    def wait_for_events(
+        self, since_seq: int = 0, timeout: Optional[float] = None
+    ) -> list:
+        """
+        Like ``get_events``, but block up to ``timeout`` seconds until there
+        is something newer than ``since_seq``. Returns [] on timeout.
         """
-        with self.lock:
-            if since_index < len(self.events):
-                return list(self.events)[since_index:]
-            return []
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self._start(since_seq) < self.next_seq, timeout
+            )
+            return self._read(since_seq)
+
+    async def await_events(
+        self, since_seq: int = 0, timeout: Optional[float] = None
+    ) -> list:
+        """Async ``wait_for_events``: waits on the event loop, not a thread."""
+        loop = asyncio.get_running_loop()
+        with self.condition:
+            events = self._read(since_seq)
+            if events:
+                return events
+            future = loop.create_future()
+            self.async_waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            with self.condition:
+                if (loop, future) in self.async_waiters:
+                    self.async_waiters.remove((loop, future))
+        return self.get_events(since_seq)
 
     def get_all_events(self) -> list:
         """Get all events in the queue."""
-        with self.lock:
-            return list(self.events)
+        return self.get_events(0)
 
     def clear(self):
-        """Clear all events from the queue."""
-        with self.lock:
-            self.events.clear()
+        """Clear all events from the queue; sequence numbers keep counting."""
+        with self.condition:
+            self.buffer = [None] * self.maxlen
+            self.first_seq = self.next_seq
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class RedisSignalEventQueue:
+    """
+    Cross-process signal event log on a Redis Stream.
+
+    ``add_event`` is one ``XADD ... MAXLEN ~ maxlen``, which keeps the stream
+    bounded (approximately, so trimming stays cheap) for every writer. ``seq``
+    is the stream entry id (``"<ms>-<n>"``); reads are ``XREAD`` from the
+    reader's last id, blocking for up to ``timeout`` when waiting.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://127.0.0.1:6379/1",
+        stream: str = "signals:events",
+        maxlen: int = 1000,
+        approximate: bool = True,
+        **options,
+    ):
+        import redis
+
+        self.url = url
+        self.stream = stream
+        self.maxlen = maxlen
+        self.approximate = approximate
+        self.options = options
+        self.client = redis.Redis.from_url(url, **options)
+        # Async client of the event loop it was created on
+        self._async = None
+
+    def add_event(
+        self,
+        signal_type: str,
+        event_data: Dict[str, Any],
+        level: str = "info",
+        timestamp: Optional[str] = None,
+    ) -> str:
+        """See ``SignalEventQueue.add_event``; returns the stream entry id."""
+        return self.add_events([(signal_type, event_data, level, timestamp)])[0]
+
+    def add_events(self, events: List[tuple]) -> list:
+        """See ``SignalEventQueue.add_events``; one pipelined round trip."""
+        pipe = self.client.pipeline(transaction=False)
+        for event in events:
+            pipe.xadd(
+                self.stream,
+                {"event": json.dumps(build_event(*event))},
+                maxlen=self.maxlen,
+                approximate=self.approximate,
+            )
+        return [_text(entry_id) for entry_id in pipe.execute()]
+
+    @property
+    def latest_seq(self):
+        entries = self.client.xrevrange(self.stream, count=1)
+        return _text(entries[0][0]) if entries else 0
+
+    def get_events(self, since_seq=0) -> list:
+        """See ``SignalEventQueue.get_events``."""
+        return self._decode(
+            self.client.xread({self.stream: since_seq or "0-0"}, count=self.maxlen)
+        )
+
+    def wait_for_events(self, since_seq=0, timeout: Optional[float] = None) -> list:
+        """See ``SignalEventQueue.wait_for_events``."""
+        return self._decode(
+            self.client.xread(
+                {self.stream: since_seq or "0-0"},
+                count=self.maxlen,
+                block=_block_ms(timeout),
+            )
+        )
+
+    async def await_events(self, since_seq=0, timeout: Optional[float] = None):
+        """See ``SignalEventQueue.await_events``."""
+        response = await self._async_client().xread(
+            {self.stream: since_seq or "0-0"},
+            count=self.maxlen,
+            block=_block_ms(timeout),
+        )
+        return self._decode(response)
+
+    def _async_client(self):
+        import redis.asyncio
+
+        loop = asyncio.get_running_loop()
+        if self._async is None or self._async[0] is not loop:
+            self._async = (loop, redis.asyncio.Redis.from_url(self.url, **self.options))
+        return self._async[1]
+
+    def _decode(self, response) -> list:
+        events = []
+        for _, entries in response or ():
+            for entry_id, fields in entries:
+                event = json.loads(fields.get(b"event") or fields.get("event"))
+                event["seq"] = _text(entry_id)
+                events.append(event)
+        return events
+
+    def get_all_events(self) -> list:
+        """Get all events in the stream."""
+        return self.get_events(0)
+
+    def clear(self):
+        """Delete the stream."""
+        self.client.delete(self.stream)
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _block_ms(timeout: Optional[float]) -> int:
+    # XREAD BLOCK 0 waits forever; the smallest finite wait is 1ms
+    return 0 if timeout is None else max(1, int(timeout * 1000))
+
+
+_queue = None
+_queue_lock = Lock()
+
+
+def get_signal_event_queue():
+    """Return the process-wide event queue configured by ``SIGNAL_EVENTS``."""
+    global _queue
+    if _queue is not None:
+        return _queue
+
+    with _queue_lock:
+        if _queue is None:
+            config = getattr(settings, "SIGNAL_EVENTS", {})
+            backend = import_string(config.get("BACKEND", DEFAULT_BACKEND))
+            _queue = backend(**config.get("OPTIONS", {}))
+    return _queue
 
 
-# Global signal event queue instance
-signal_event_queue = SignalEventQueue()
+def reset_signal_event_queue():
+    """Drop the cached queue so the next call re-reads settings (used in tests)."""
+    global _queue
+    _queue = None
@@ -1,3 +1,12 @@
+"""
+Auth signal receivers feeding the log and the signal event stream.
+
+Receivers run inside the login/logout request, so they only copy what they
+need off the request and ``dispatch`` the rest (formatting, logging and
+storing the event) to the background flusher in ``signal_dispatch``. The
+event's timestamp is taken here too, so it records when the signal fired,
+not when the flusher got to it.
+"""
 import logging
 from django.contrib.auth.signals import (
     user_logged_in,
@@ -6,7 +15,8 @@ from django.contrib.auth.signals import (
 )
 from django.dispatch import receiver
 
-from .signal_events import signal_event_queue
+from .signal_dispatch import dispatch
+from .signal_events import event_timestamp
 
 logger = logging.getLogger(__name__)
 
@@ -16,25 +26,34 @@ def log_user_logged_in(sender, request, user, **kwargs):
     """
     Log when a user successfully logs in.
     """
-    ip_address = get_client_ip(request)
-    user_agent = request.META.get("HTTP_USER_AGENT", "Unknown")
+    dispatch(
+        record_logged_in,
+        user.id,
+        user.username,
+        user.email,
+        get_client_ip(request),
+        request.META.get("HTTP_USER_AGENT", "Unknown"),
+        event_timestamp(),
+    )
+
 
+def record_logged_in(user_id, username, email, ip_address, user_agent, timestamp):
     logger.info(
-        f"User logged in: {user.username} (ID: {user.id}) from IP: {ip_address}, "
+        f"User logged in: {username} (ID: {user_id}) from IP: {ip_address}, "
         f"User-Agent: {user_agent}"
     )
-
-    # Add event to queue for live streaming
-    signal_event_queue.add_event(
-        signal_type="user_logged_in",
-        event_data={
-            "user_id": user.id,
-            "username": user.username,
-            "email": user.email,
+    # Event for live streaming
+    return (
+        "user_logged_in",
+        {
+            "user_id": user_id,
+            "username": username,
+            "email": email,
             "ip_address": ip_address,
             "user_agent": user_agent,
         },
-        level="info",
+        "info",
+        timestamp,
     )
 
 
@@ -44,28 +63,35 @@ def log_user_logged_out(sender, request, user, **kwargs):
     Log when a user logs out.
     """
     if user:
-        ip_address = get_client_ip(request)
-        logger.info(
-            f"User logged out: {user.username} (ID: {user.id}) from IP: {ip_address}"
-        )
-
-        # Add event to queue for live streaming
-        signal_event_queue.add_event(
-            signal_type="user_logged_out",
-            event_data={
-                "user_id": user.id,
-                "username": user.username,
-                "ip_address": ip_address,
-            },
-            level="info",
+        dispatch(
+            record_logged_out,
+            user.id,
+            user.username,
+            get_client_ip(request),
+            event_timestamp(),
         )
     else:
-        logger.info("User logged out (anonymous session)")
-        signal_event_queue.add_event(
-            signal_type="user_logged_out",
-            event_data={"message": "Anonymous session logged out"},
-            level="info",
-        )
+        dispatch(record_anonymous_logout, event_timestamp())
+
+
+def record_logged_out(user_id, username, ip_address, timestamp):
+    logger.info(f"User logged out: {username} (ID: {user_id}) from IP: {ip_address}")
+    return (
+        "user_logged_out",
+        {"user_id": user_id, "username": username, "ip_address": ip_address},
+        "info",
+        timestamp,
+    )
+
+
+def record_anonymous_logout(timestamp):
+    logger.info("User logged out (anonymous session)")
+    return (
+        "user_logged_out",
+        {"message": "Anonymous session logged out"},
+        "info",
+        timestamp,
+    )
 
 
 @receiver(user_login_failed)
@@ -73,26 +99,29 @@ def log_user_login_failed(sender, credentials, request, **kwargs):
     """
     Log when a login attempt fails.
     """
-    ip_address = get_client_ip(request) if request else "Unknown"
-    username = credentials.get("username", "Unknown")
-    user_agent = (
-        request.META.get("HTTP_USER_AGENT", "Unknown") if request else "Unknown"
+    dispatch(
+        record_login_failed,
+        credentials.get("username", "Unknown"),
+        get_client_ip(request) if request else "Unknown",
+        request.META.get("HTTP_USER_AGENT", "Unknown") if request else "Unknown",
+        event_timestamp(),
     )
 
+
+def record_login_failed(username, ip_address, user_agent, timestamp):
     logger.warning(
         f"Failed login attempt for username: {username} from IP: {ip_address}, "
         f"User-Agent: {user_agent}"
     )
-
-    # Add event to queue for live streaming
-    signal_event_queue.add_event(
-        signal_type="user_login_failed",
-        event_data={
+    return (
+        "user_login_failed",
+        {
             "username": username,
             "ip_address": ip_address,
             "user_agent": user_agent,
         },
-        level="warning",
+        "warning",
+        timestamp,
     )
 
 
@@ -2,47 +2,95 @@
 Server-Sent Events (SSE) endpoint for streaming system signals.
 """
 import json
-import time
 
-from django.http import StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 
-from .signal_events import signal_event_queue
+from .signal_events import get_signal_event_queue
+
+# Seconds between keepalive comments when no signal event arrives
+KEEPALIVE_INTERVAL = 15
 
 
 def signal_event_stream():
     """
     Generator yielding signal events as they occur.
-    Checks for new events every second.
+    Blocks on the event queue until an event arrives, sending a keepalive
+    comment after ``KEEPALIVE_INTERVAL`` idle seconds.
     """
-    last_index = 0
+    last_seq = 0
 
     while True:
-        # Get new events since last check
-        events = signal_event_queue.get_events(since_index=last_index)
+        events = get_signal_event_queue().wait_for_events(
+            last_seq, timeout=KEEPALIVE_INTERVAL
+        )
+        if not events:
+            # Keepalive comment to prevent proxy timeouts
+            yield ": keepalive\n\n"
+            continue
+        for event in events:
+            yield f"data: {json.dumps(event)}\n\n"
+        last_seq = events[-1]["seq"]
 
-        if events:
-            for event in events:
-                yield f"data: {json.dumps(event)}\n\n"
-            last_index += len(events)
 
-        # Send keepalive comment every second to prevent timeout
-        yield ": keepalive\n\n"
-        time.sleep(1)
+async def asignal_event_stream():
+    """
+    Async generator yielding signal events as they occur.
+    Same protocol as ``signal_event_stream`` but waits on the event loop,
+    so an idle stream does not hold a worker thread.
+    """
+    last_seq = 0
 
+    while True:
+        events = await get_signal_event_queue().await_events(
+            last_seq, timeout=KEEPALIVE_INTERVAL
+        )
+        if not events:
+            yield ": keepalive\n\n"
+            continue
+        for event in events:
+            yield f"data: {json.dumps(event)}\n\n"
+        last_seq = events[-1]["seq"]
 
-@require_http_methods(["GET"])
-def signal_stream_view(request):
+
+def event_stream_response(request, sync_stream, async_stream, *args):
     """
-    SSE endpoint for streaming system signals.
-    Only accessible to superusers.
-    Supports authentication via query parameter for SSE compatibility.
+    Build an SSE response suited to the server handling the request.
+
+    Under ASGI the async generator is served, so an idle stream costs one
+    coroutine on the event loop instead of a whole worker. The sync generator
+    keeps ``runserver`` and WSGI deployments working.
+
+    Args:
+        request: The incoming request
+        sync_stream: Generator function used under WSGI
+        async_stream: Async generator function used under ASGI
+        *args: Arguments passed to whichever generator function is used
+    """
+    if isinstance(request, ASGIRequest):
+        stream = async_stream(*args)
+    else:
+        stream = sync_stream(*args)
+
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Disable buffering in nginx
+    return response
+
+
+def authenticate_stream_request(request):
+    """
+    Authenticate an SSE request.
+    EventSource cannot send an Authorization header, so a JWT access token
+    may be passed as the ``token`` query parameter instead.
+
+    Returns:
+        None if ``request.user`` is authenticated, otherwise a 401 JsonResponse
     """
-    from django.http import JsonResponse
     from rest_framework_simplejwt.authentication import JWTAuthentication
     from rest_framework_simplejwt.exceptions import InvalidToken
 
-    # Try to authenticate using JWT from query parameter
     token = request.GET.get("token")
 
     if token:
@@ -54,16 +102,24 @@ def signal_stream_view(request):
         except InvalidToken:
             return JsonResponse({"error": "Invalid token"}, status=401)
 
-    # Check if user is authenticated and is a superuser
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required"}, status=401)
 
+    return None
+
+
+@require_http_methods(["GET"])
+def signal_stream_view(request):
+    """
+    SSE endpoint for streaming system signals.
+    Only accessible to superusers.
+    Supports authentication via query parameter for SSE compatibility.
+    """
+    error_response = authenticate_stream_request(request)
+    if error_response is not None:
+        return error_response
+
     if not request.user.is_superuser:
         return JsonResponse({"error": "Superuser access required"}, status=403)
 
-    response = StreamingHttpResponse(
-        signal_event_stream(), content_type="text/event-stream"
-    )
-    response["Cache-Control"] = "no-cache"
-    response["X-Accel-Buffering"] = "no"  # Disable buffering in nginx
-    return response
+    return event_stream_response(request, signal_event_stream, asignal_event_stream)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class TaskConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.tasks"
+
+    def ready(self):
+        """Connect the task counter and cache invalidation signal handlers."""
+        import apps.tasks.counters  # noqa: F401
+        import apps.tasks.invalidation  # noqa: F401
@@ -0,0 +1,62 @@
+"""
+Bulk task submission for POST /api/tasks/run-batch/.
+
+A batch costs one ownership query, one multi-row INSERT per
+``INSERT_BATCH_SIZE`` rows, and one push onto the owner's fair-share queue
+(see ``scheduling``), from which tasks reach Celery one ``CHUNK_SIZE``
+message per owner turn, instead of a query, an INSERT and a publish for
+every item. Pending snapshots are not pushed to the event bus; subscribers
+see batch tasks from their first ``running`` event.
+"""
+from django.conf import settings
+
+from .counters import record_created
+from .invalidation import invalidate_created
+from .models import AgentTask
+from .scheduling import get_task_scheduler
+from .tasks import dispatch_batch_tasks
+
+DEFAULTS = {
+    "MAX_ITEMS": 1000,
+    "INSERT_BATCH_SIZE": 500,
+}
+
+
+def get_batch_setting(name):
+    return getattr(settings, "TASK_BATCH", {}).get(name, DEFAULTS[name])
+
+
+def create_tasks(owner, items) -> list[int]:
+    """Insert pending tasks for validated ``items`` and return their ids."""
+    tasks = AgentTask.objects.bulk_create(
+        [
+            AgentTask(
+                agent_id=item["agent"],
+                owner=owner,
+                input_text=item["input_text"],
+                status=AgentTask.STATUS_PENDING,
+            )
+            for item in items
+        ],
+        batch_size=get_batch_setting("INSERT_BATCH_SIZE"),
+    )
+    # bulk_create skips post_save; one counter UPDATE per agent instead
+    record_created(tasks)
+    invalidate_created(tasks)
+    return [task.pk for task in tasks]
+
+
+def enqueue_tasks(owner_id, task_ids):
+    """
+    Queue ``task_ids`` behind the owner's earlier batch work and dispatch.
+    If they cannot be queued the tasks are deleted again, so none is left
+    pending with nothing to run it.
+    """
+    if not task_ids:
+        return
+    try:
+        get_task_scheduler().push(owner_id, task_ids)
+    except Exception:
+        AgentTask.objects.filter(pk__in=task_ids).delete()
+        raise
+    dispatch_batch_tasks()
@@ -1,86 +1,104 @@
-from django.core.cache import cache
 from apps.agents.models import Agent
+from apps.core.cache import bump_generation, get_or_compute, versioned_key
+from .counters import get_owner_counts
 from .models import AgentTask
-from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import timedelta
 
 
+# Generation namespaces (see apps.core.cache); bumping one invalidates
+# every key built from it. Agent and task writes bump them on commit (see
+# invalidation), so the TTLs below only bound writes that bypass signals.
+AGENTS_NAMESPACE = "agents"
+# The unscoped list, which any owner's change invalidates
+AGENTS_GLOBAL_NAMESPACE = "agents:global"
+
+
+def agents_owner_namespace(user_id):
+    return f"agents:owner:{user_id}"
+
+
+def tasks_owner_namespace(user_id):
+    return f"tasks:owner:{user_id}"
+
+
+def tasks_count_owner_namespace(user_id):
+    """Bumped only when the owner's per-agent ``tasks_count`` changes."""
+    return f"tasks:count:owner:{user_id}"
+
+
+def tasks_agent_namespace(agent_id):
+    return f"tasks:agent:{agent_id}"
+
+
 def get_cached_agents(user_id=None):
     """
-    Cache agent list for 5 minutes.
+    Cache agent list for an hour (then served stale while one process
+    rebuilds it; see ``get_or_compute``).
     If user_id is provided, cache per-user.
     """
     if user_id:
-        key = f"agents:list:user:{user_id}"
+        key = versioned_key(
+            f"agents:list:user:{user_id}",
+            AGENTS_NAMESPACE,
+            agents_owner_namespace(user_id),
+        )
     else:
-        key = "agents:list"
+        key = versioned_key("agents:list", AGENTS_NAMESPACE, AGENTS_GLOBAL_NAMESPACE)
 
-    agents = cache.get(key)
-    if agents is None:
+    def load():
         queryset = Agent.objects.all()
         if user_id:
             queryset = queryset.filter(owner_id=user_id)
-        agents = list(queryset.values("id", "name", "created_at", "owner_id"))
-        cache.set(key, agents, timeout=300)  # Cache for 5 minutes
-    return agents
+        return list(queryset.values("id", "name", "created_at", "owner_id"))
+
+    return get_or_compute(key, load, timeout=3600)  # Cache for 1 hour
 
 
 def invalidate_agent_cache(user_id=None):
-    """Invalidate agent cache for a specific user or globally."""
+    """
+    Invalidate the agent lists that include ``user_id``'s agents: theirs and
+    the global one. Without a user, every user's list is invalidated too.
+    """
     if user_id:
-        cache.delete(f"agents:list:user:{user_id}")
-    cache.delete("agents:list")
+        bump_generation(agents_owner_namespace(user_id), AGENTS_GLOBAL_NAMESPACE)
+    else:
+        bump_generation(AGENTS_NAMESPACE)
 
 
 def get_cached_task_stats(user_id):
     """
-    Cache task statistics for a user (5 minutes).
-    Returns counts by status.
+    Cache task statistics for a user (1 hour).
+    Returns counts by status, read from the user's ``OwnerTaskCounts`` row.
     """
-    key = f"tasks:stats:user:{user_id}"
-    stats = cache.get(key)
-
-    if stats is None:
-        stats = AgentTask.objects.filter(owner_id=user_id).aggregate(
-            total=Count("id"),
-            pending=Count("id", filter=Q(status=AgentTask.STATUS_PENDING)),
-            running=Count("id", filter=Q(status=AgentTask.STATUS_RUNNING)),
-            completed=Count("id", filter=Q(status=AgentTask.STATUS_COMPLETED)),
-            failed=Count("id", filter=Q(status=AgentTask.STATUS_FAILED)),
-        )
-        cache.set(key, stats, timeout=300)
-
-    return stats
+    key = versioned_key(f"tasks:stats:user:{user_id}", tasks_owner_namespace(user_id))
+    return get_or_compute(key, lambda: get_owner_counts(user_id), timeout=3600)
 
 
 def invalidate_task_stats(user_id):
     """Invalidate task statistics cache for a user."""
-    cache.delete(f"tasks:stats:user:{user_id}")
+    bump_generation(tasks_owner_namespace(user_id))
 
 
 def get_cached_recent_tasks(agent_id, limit=10):
     """
-    Cache recent tasks for an agent (2 minutes).
+    Cache recent tasks for an agent (1 hour).
     Returns list of task dicts.
     """
-    key = f"tasks:recent:agent:{agent_id}:{limit}"
-    tasks = cache.get(key)
+    key = versioned_key(
+        f"tasks:recent:agent:{agent_id}:{limit}", tasks_agent_namespace(agent_id)
+    )
 
-    if tasks is None:
-        tasks = list(
+    def load():
+        return list(
             AgentTask.objects.filter(agent_id=agent_id)
             .order_by("-created_at")[:limit]
             .values("id", "input_text", "output_text", "status", "created_at")
         )
-        cache.set(key, tasks, timeout=120)  # Cache for 2 minutes
 
-    return tasks
+    return get_or_compute(key, load, timeout=3600)  # Cache for 1 hour
 
 
 def invalidate_agent_tasks_cache(agent_id):
-    """Invalidate all task caches for an agent."""
-    # Note: This is a simple implementation. For production, consider using
-    # cache key patterns or Redis SCAN to delete all matching keys
-    for limit in [10, 20, 50]:
-        cache.delete(f"tasks:recent:agent:{agent_id}:{limit}")
+    """Invalidate all task caches for an agent, whatever ``limit`` they used."""
+    bump_generation(tasks_agent_namespace(agent_id))
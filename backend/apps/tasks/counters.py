@@ -0,0 +1,145 @@
+"""
+Denormalized task counts per agent and per owner, broken down by status.
+
+``AgentTaskCounts`` and ``OwnerTaskCounts`` hold one row per agent / owner
+with a column per status, so the agent list's ``tasks_count`` and the
+owner's task stats are a primary-key lookup instead of a ``COUNT`` over the
+owner's whole task history.
+
+Rows are moved with ``F()`` increments, so concurrent workers never
+overwrite each other's counts:
+
+* ``post_save`` of a new task adds one to its status;
+* ``post_save`` that changes ``status`` moves one from the stored status
+  (remembered by ``AgentTask.from_db``) to the new one;
+* ``post_delete`` subtracts one.
+
+``bulk_create`` and ``QuerySet.update`` send no signals: callers that use
+them report through ``record_created`` (see ``batch.create_tasks``) or must
+not touch ``status``. ``manage.py rebuild_task_counters`` recomputes every
+row from ``AgentTask`` should the counts ever drift.
+"""
+import logging
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import AgentTask, AgentTaskCounts, OwnerTaskCounts
+
+logger = logging.getLogger(__name__)
+
+
+def _bump(model, key, deltas, create=True):
+    """Add ``deltas`` ({status: n}) to the ``model`` row for ``key``."""
+    deltas = {status: n for status, n in deltas.items() if n}
+    if not deltas:
+        return
+    updates = {status: F(status) + n for status, n in deltas.items()}
+    if model.objects.filter(**key).update(**updates) or not create:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Another process created the row first
+        model.objects.filter(**key).update(**updates)
+
+
+def _group(counts):
+    """``{(id, status): n}`` -> ``{id: {status: n}}``."""
+    grouped = defaultdict(dict)
+    for (pk, status), n in counts.items():
+        grouped[pk][status] = n
+    return grouped
+
+
+def _bump_all(model, field, counts):
+    """Apply ``counts`` keyed by ``(id, status)``, one UPDATE per id."""
+    for pk, deltas in _group(counts).items():
+        _bump(model, {field: pk}, deltas)
+
+
+def record_created(tasks):
+    """Count newly inserted ``tasks`` (for ``bulk_create``, which sends no signals)."""
+    by_agent, by_owner = Counter(), Counter()
+    for task in tasks:
+        by_agent[task.agent_id, task.status] += 1
+        by_owner[task.owner_id, task.status] += 1
+    _bump_all(AgentTaskCounts, "agent_id", by_agent)
+    _bump_all(OwnerTaskCounts, "owner_id", by_owner)
+
+
+def record_status_change(task, old_status, new_status):
+    """Move ``task`` from ``old_status`` to ``new_status`` in both counters."""
+    deltas = {old_status: -1, new_status: 1}
+    _bump(AgentTaskCounts, {"agent_id": task.agent_id}, deltas)
+    _bump(OwnerTaskCounts, {"owner_id": task.owner_id}, deltas)
+
+
+def record_deleted(task, status):
+    # The counter rows may be going away in the same cascade; never recreate them
+    _bump(AgentTaskCounts, {"agent_id": task.agent_id}, {status: -1}, create=False)
+    _bump(OwnerTaskCounts, {"owner_id": task.owner_id}, {status: -1}, create=False)
+
+
+def get_owner_counts(owner_id):
+    """Return ``{"total", "pending", "running", "completed", "failed"}`` for an owner."""
+    counts = OwnerTaskCounts.objects.filter(owner_id=owner_id).first()
+    return (counts or OwnerTaskCounts()).as_dict()
+
+
+def rebuild():
+    """Recompute every counter row from ``AgentTask``; returns rows written."""
+    by_agent = Counter()
+    by_owner = Counter()
+    rows = AgentTask.objects.values("agent_id", "owner_id", "status").annotate(
+        n=Count("id")
+    )
+    for row in rows.order_by():
+        by_agent[row["agent_id"], row["status"]] += row["n"]
+        by_owner[row["owner_id"], row["status"]] += row["n"]
+
+    def build(model, field, counts):
+        return [model(**{field: pk}, **n) for pk, n in _group(counts).items()]
+
+    with transaction.atomic():
+        AgentTaskCounts.objects.all().delete()
+        OwnerTaskCounts.objects.all().delete()
+        agents = AgentTaskCounts.objects.bulk_create(
+            build(AgentTaskCounts, "agent_id", by_agent)
+        )
+        owners = OwnerTaskCounts.objects.bulk_create(
+            build(OwnerTaskCounts, "owner_id", by_owner)
+        )
+    return len(agents) + len(owners)
+
+
+@receiver(post_save, sender=AgentTask)
+def count_saved_task(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    if raw:
+        # loaddata: run rebuild_task_counters afterwards
+        return
+    if created:
+        record_created([instance])
+    elif update_fields is not None and "status" not in update_fields:
+        return
+    else:
+        stored = getattr(instance, "_stored_status", None)
+        if stored is None:
+            logger.warning(
+                f"Task {instance.pk} saved without a loaded status; counters not moved"
+            )
+        elif stored != instance.status:
+            record_status_change(instance, stored, instance.status)
+    instance._stored_status = instance.status
+
+
+@receiver(post_delete, sender=AgentTask)
+def count_deleted_task(sender, instance, **kwargs):
+    status = getattr(instance, "_stored_status", None) or instance.status
+    record_deleted(instance, status)
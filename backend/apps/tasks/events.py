@@ -0,0 +1,381 @@
+"""
+Task event bus for pushing AgentTask status transitions to SSE subscribers.
+
+Publishers (the Celery task and the task views) emit one event per status
+transition, and each SSE connection subscribes to its owner's channel only.
+Database load therefore no longer grows with the number of open streams.
+
+The backend is selected with the ``TASK_EVENT_BUS`` setting, in the same
+shape as ``CACHES``::
+
+    TASK_EVENT_BUS = {
+        "BACKEND": "apps.tasks.events.RedisTaskEventBus",
+        "OPTIONS": {"url": "redis://127.0.0.1:6379/1", "replay_size": 100},
+    }
+
+Every published event gets a per-owner, monotonically increasing
+``event_id`` and is kept in a bounded per-owner replay buffer, so a client
+that reconnects with ``Last-Event-ID`` receives only the events it missed.
+Transient events (streamed output deltas) skip numbering and the buffer.
+"""
+import asyncio
+import json
+import logging
+import queue
+from collections import defaultdict, deque
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = "apps.tasks.events.InMemoryTaskEventBus"
+
+
+def serialize_task(task) -> Dict[str, Any]:
+    """Build the SSE payload for a task (same shape the stream always sent)."""
+    return {
+        "id": task.id,
+        "agent": task.agent_id,
+        "status": task.status,
+        "output_text": task.output_text or "",
+        "input_text": task.input_text,
+        "created_at": task.created_at.isoformat(),
+        "updated_at": task.updated_at.isoformat(),
+        "started_at": task.started_at.isoformat() if task.started_at else None,
+        "finished_at": task.finished_at.isoformat() if task.finished_at else None,
+    }
+
+
+class InMemorySubscription:
+    """Subscription handle for ``InMemoryTaskEventBus``."""
+
+    def __init__(self, bus: "InMemoryTaskEventBus", owner_id: int, maxsize: int):
+        self.bus = bus
+        self.owner_id = owner_id
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+
+    def deliver(self, event: Dict[str, Any]):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # A stalled client must not block publishers; it will miss events.
+            logger.warning(f"Dropping task event for slow subscriber {self.owner_id}")
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait up to ``timeout`` seconds for the next event."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class AsyncInMemorySubscription:
+    """
+    Asyncio subscription handle for ``InMemoryTaskEventBus``.
+    Publishers may run on any thread; events are handed to the subscriber's
+    event loop with ``call_soon_threadsafe``.
+    """
+
+    def __init__(self, bus: "InMemoryTaskEventBus", owner_id: int, maxsize: int):
+        self.bus = bus
+        self.owner_id = owner_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, event: Dict[str, Any]):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The subscriber's loop has shut down; it is about to be closed.
+            pass
+
+    def _put(self, event: Dict[str, Any]):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning(f"Dropping task event for slow subscriber {self.owner_id}")
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait up to ``timeout`` seconds for the next event."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        self.bus.unsubscribe(self)
+
+
+class InMemoryTaskEventBus:
+    """
+    In-process event bus.
+    Used by tests and single-process development servers; events published
+    from another process (e.g. a Celery worker) are not seen.
+    Also serves as the local fan-out behind ``RedisTaskEventBus``.
+    """
+
+    def __init__(self, max_pending: int = 1000, replay_size: int = 100, **options):
+        self.max_pending = max_pending
+        self.replay_size = replay_size
+        self.subscribers: Dict[int, set] = defaultdict(set)
+        self.sequences: Dict[int, int] = defaultdict(int)
+        self.buffers: Dict[int, deque] = {}
+        self.lock = Lock()
+
+    def publish(self, owner_id: int, event: Dict[str, Any]) -> int:
+        """Assign the next event id, buffer the event and deliver it."""
+        with self.lock:
+            self.sequences[owner_id] += 1
+            event = {**event, "event_id": self.sequences[owner_id]}
+            buffer = self.buffers.get(owner_id)
+            if buffer is None:
+                buffer = self.buffers[owner_id] = deque(maxlen=self.replay_size)
+            buffer.append(event)
+            # Deliver under the lock so subscribers see ids in order
+            self._deliver(owner_id, event)
+        return event["event_id"]
+
+    def publish_transient(self, owner_id: int, event: Dict[str, Any]):
+        """Deliver an event live without numbering or buffering it."""
+        self.fan_out(owner_id, event)
+
+    def fan_out(self, owner_id: int, event: Dict[str, Any]):
+        """Deliver an already-numbered event to local subscribers only."""
+        with self.lock:
+            self._deliver(owner_id, event)
+
+    def _deliver(self, owner_id: int, event: Dict[str, Any]):
+        for subscription in self.subscribers.get(owner_id, ()):
+            subscription.deliver(event)
+
+    def replay(
+        self, owner_id: int, last_event_id: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return buffered events newer than ``last_event_id``.
+
+        Returns:
+            List of missed events (possibly empty), or None when the buffer no
+            longer covers the gap and the client must reload its task list
+        """
+        with self.lock:
+            buffer = list(self.buffers.get(owner_id, ()))
+            latest = self.sequences.get(owner_id, 0)
+        return replay_from_buffer(buffer, latest, last_event_id)
+
+    def subscribe(self, owner_id: int) -> InMemorySubscription:
+        return self._add(InMemorySubscription(self, owner_id, self.max_pending))
+
+    async def asubscribe(self, owner_id: int) -> AsyncInMemorySubscription:
+        return self._add(AsyncInMemorySubscription(self, owner_id, self.max_pending))
+
+    def _add(self, subscription):
+        with self.lock:
+            self.subscribers[subscription.owner_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            owner_subscribers = self.subscribers.get(subscription.owner_id)
+            if owner_subscribers is not None:
+                owner_subscribers.discard(subscription)
+                if not owner_subscribers:
+                    del self.subscribers[subscription.owner_id]
+
+
+def replay_from_buffer(
+    buffer: List[Dict[str, Any]], latest: int, last_event_id: int
+) -> Optional[List[Dict[str, Any]]]:
+    """Select the events after ``last_event_id`` from an ordered replay buffer."""
+    oldest = buffer[0]["event_id"] if buffer else latest + 1
+    if last_event_id > latest or last_event_id < oldest - 1:
+        # Either the id predates a restart or the gap fell out of the buffer
+        return None
+    return [event for event in buffer if event["event_id"] > last_event_id]
+
+
+class RedisSubscription:
+    """Subscription handle for ``RedisTaskEventBus``."""
+
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait up to ``timeout`` seconds for the next event."""
+        message = self.pubsub.get_message(
+            ignore_subscribe_messages=True, timeout=timeout
+        )
+        if message is None:
+            return None
+        return json.loads(message["data"])
+
+    def close(self):
+        self.pubsub.close()
+
+
+class RedisTaskEventBus:
+    """
+    Cross-process event bus on Redis pub/sub.
+    One channel per owner, so each stream only receives its own tasks.
+
+    Async subscribers (ASGI streams) share a single pattern subscription per
+    process and are fanned out locally, so thousands of open streams cost one
+    Redis connection rather than one each.
+
+    Event ids come from an INCR counter per owner and the replay buffer is a
+    sorted set scored by event id, trimmed to ``replay_size`` entries. One
+    Lua script takes the id, buffers and publishes, so concurrent publishers
+    for the same owner cannot deliver ids out of order.
+    """
+
+    channel_prefix = "tasks:events:owner:"
+    sequence_prefix = "tasks:events:seq:"
+    buffer_prefix = "tasks:events:buffer:"
+
+    # KEYS: sequence, buffer. ARGV: event JSON without its closing brace,
+    # replay_size, replay_ttl, channel.
+    PUBLISH_SCRIPT = """
+    local event_id = redis.call('INCR', KEYS[1])
+    local payload = ARGV[1] .. '"event_id": ' .. event_id .. '}'
+    redis.call('ZADD', KEYS[2], event_id, payload)
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, -(tonumber(ARGV[2]) + 1))
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+    redis.call('PUBLISH', ARGV[4], payload)
+    return event_id
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://127.0.0.1:6379/1",
+        replay_size: int = 100,
+        replay_ttl: int = 86400,
+        **options,
+    ):
+        import redis
+
+        self.url = url
+        self.replay_size = replay_size
+        self.replay_ttl = replay_ttl
+        self.options = options
+        self.client = redis.Redis.from_url(url, **options)
+        self.publish_script = self.client.register_script(self.PUBLISH_SCRIPT)
+        self.local = InMemoryTaskEventBus()
+        self._listener: Optional[asyncio.Task] = None
+
+    def channel(self, owner_id: int) -> str:
+        return f"{self.channel_prefix}{owner_id}"
+
+    def publish(self, owner_id: int, event: Dict[str, Any]) -> int:
+        """Assign the next event id, buffer the event and publish it."""
+        # The script appends the event_id member and the closing brace
+        head = json.dumps(
+            {key: value for key, value in event.items() if key != "event_id"}
+        )
+        head = head[:-1] + (", " if head != "{}" else "")
+        return self.publish_script(
+            keys=[
+                f"{self.sequence_prefix}{owner_id}",
+                f"{self.buffer_prefix}{owner_id}",
+            ],
+            args=[head, self.replay_size, self.replay_ttl, self.channel(owner_id)],
+        )
+
+    def publish_transient(self, owner_id: int, event: Dict[str, Any]):
+        """Deliver an event live without numbering or buffering it."""
+        self.client.publish(self.channel(owner_id), json.dumps(event))
+
+    def replay(
+        self, owner_id: int, last_event_id: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """See ``InMemoryTaskEventBus.replay``."""
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(f"{self.sequence_prefix}{owner_id}")
+        pipe.zrange(f"{self.buffer_prefix}{owner_id}", 0, -1)
+        latest, members = pipe.execute()
+        buffer = [json.loads(member) for member in members]
+        return replay_from_buffer(buffer, int(latest or 0), last_event_id)
+
+    def subscribe(self, owner_id: int) -> RedisSubscription:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel(owner_id))
+        return RedisSubscription(pubsub)
+
+    async def asubscribe(self, owner_id: int) -> AsyncInMemorySubscription:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return await self.local.asubscribe(owner_id)
+
+    async def _listen(self):
+        """Relay every owner channel into the local fan-out, reconnecting on errors."""
+        import redis.asyncio
+
+        while True:
+            client = redis.asyncio.Redis.from_url(self.url, **self.options)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{self.channel_prefix}*")
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    owner_id = int(message["channel"].rsplit(b":", 1)[1])
+                    self.local.fan_out(owner_id, json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Task event listener lost its Redis connection")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+
+
+_bus = None
+
+
+def get_task_event_bus():
+    """Return the process-wide event bus configured by ``TASK_EVENT_BUS``."""
+    global _bus
+    if _bus is not None:
+        return _bus
+
+    config = getattr(settings, "TASK_EVENT_BUS", {})
+    backend = import_string(config.get("BACKEND", DEFAULT_BACKEND))
+    _bus = backend(**config.get("OPTIONS", {}))
+    return _bus
+
+
+def reset_task_event_bus():
+    """Drop the cached bus so the next call re-reads settings (used in tests)."""
+    global _bus
+    _bus = None
+
+
+def publish_task_event(task):
+    """
+    Publish the current state of ``task`` to its owner's subscribers.
+    Failures are logged rather than raised so a bus outage never fails a task.
+    """
+    try:
+        get_task_event_bus().publish(task.owner_id, serialize_task(task))
+    except Exception:
+        logger.exception(f"Failed to publish event for task {task.id}")
+
+
+def publish_task_delta(task, delta: str):
+    """
+    Push a chunk of streamed output to the task owner's subscribers.
+    Deltas are transient: a reconnecting client catches up from the last
+    flushed snapshot instead of replaying every chunk.
+    """
+    try:
+        get_task_event_bus().publish_transient(
+            task.owner_id, {"type": "delta", "id": task.id, "delta": delta}
+        )
+    except Exception:
+        logger.exception(f"Failed to publish output delta for task {task.id}")
@@ -0,0 +1,94 @@
+"""
+Invalidate the task caches (see ``cache``) when agents and tasks change.
+
+Every ``post_save`` / ``post_delete`` of an ``Agent`` or ``AgentTask``
+bumps the generations of the cached values built from it, once the
+transaction commits (``invalidate_on_commit``):
+
+* a task: its agent's recent tasks, its owner's stats unless the save
+  left ``status`` alone (streamed output, for instance), and its owner's
+  ``tasks_count`` only when it is created or deleted;
+* an agent: its owner's agent list and the global one.
+
+Requests (``CacheInvalidationMiddleware``) and Celery tasks (the
+``task_prerun`` / ``task_postrun`` handlers below) batch these into a
+single pipelined Redis call, however many rows they touch.
+
+``bulk_create`` and ``QuerySet.update`` send no signals: callers that use
+them report through ``invalidate_created`` (see ``batch.create_tasks``).
+"""
+from celery.signals import task_postrun, task_prerun
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.agents.models import Agent
+from apps.core.cache import (
+    begin_invalidation_batch,
+    end_invalidation_batch,
+    invalidate_on_commit,
+)
+
+from .cache import (
+    AGENTS_GLOBAL_NAMESPACE,
+    agents_owner_namespace,
+    tasks_agent_namespace,
+    tasks_count_owner_namespace,
+    tasks_owner_namespace,
+)
+from .models import AgentTask
+
+# Celery task id -> token of the batch opened for it
+_batches = {}
+
+
+def invalidate_created(tasks):
+    """Invalidate for newly inserted ``tasks`` (for ``bulk_create``)."""
+    namespaces = set()
+    for task in tasks:
+        namespaces.add(tasks_agent_namespace(task.agent_id))
+        namespaces.add(tasks_owner_namespace(task.owner_id))
+        namespaces.add(tasks_count_owner_namespace(task.owner_id))
+    invalidate_on_commit(*sorted(namespaces))
+
+
+@receiver(post_save, sender=AgentTask)
+def invalidate_saved_task(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    if raw:
+        return
+    namespaces = [tasks_agent_namespace(instance.agent_id)]
+    if created or update_fields is None or "status" in update_fields:
+        namespaces.append(tasks_owner_namespace(instance.owner_id))
+    if created:
+        namespaces.append(tasks_count_owner_namespace(instance.owner_id))
+    invalidate_on_commit(*namespaces)
+
+
+@receiver(post_delete, sender=AgentTask)
+def invalidate_deleted_task(sender, instance, **kwargs):
+    invalidate_on_commit(
+        tasks_agent_namespace(instance.agent_id),
+        tasks_owner_namespace(instance.owner_id),
+        tasks_count_owner_namespace(instance.owner_id),
+    )
+
+
+@receiver(post_save, sender=Agent)
+@receiver(post_delete, sender=Agent)
+def invalidate_agent(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_on_commit(
+        agents_owner_namespace(instance.owner_id), AGENTS_GLOBAL_NAMESPACE
+    )
+
+
+@task_prerun.connect
+def begin_task_batch(task_id=None, **kwargs):
+    _batches[task_id] = begin_invalidation_batch()
+
+
+@task_postrun.connect
+def end_task_batch(task_id=None, **kwargs):
+    end_invalidation_batch(_batches.pop(task_id, None))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.tasks.counters import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-agent and per-owner task counts by status from "
+        "AgentTask. Run after loaddata, raw SQL, or QuerySet.update() calls "
+        "that changed task status without going through save()."
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} task counter rows"))
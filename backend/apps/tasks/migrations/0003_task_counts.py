@@ -0,0 +1,83 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counts(apps, schema_editor):
+    AgentTask = apps.get_model("tasks", "AgentTask")
+    AgentTaskCounts = apps.get_model("tasks", "AgentTaskCounts")
+    OwnerTaskCounts = apps.get_model("tasks", "OwnerTaskCounts")
+    agents, owners = {}, {}
+    rows = AgentTask.objects.values("agent_id", "owner_id", "status").annotate(
+        n=Count("id")
+    )
+    for row in rows.order_by():
+        agent = agents.setdefault(row["agent_id"], {})
+        agent[row["status"]] = agent.get(row["status"], 0) + row["n"]
+        owner = owners.setdefault(row["owner_id"], {})
+        owner[row["status"]] = owner.get(row["status"], 0) + row["n"]
+    AgentTaskCounts.objects.bulk_create(
+        AgentTaskCounts(agent_id=pk, **counts) for pk, counts in agents.items()
+    )
+    OwnerTaskCounts.objects.bulk_create(
+        OwnerTaskCounts(owner_id=pk, **counts) for pk, counts in owners.items()
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("agents", "0002_agent_cache_responses"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tasks", "0002_agenttask_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AgentTaskCounts",
+            fields=[
+                ("pending", models.IntegerField(default=0)),
+                ("running", models.IntegerField(default=0)),
+                ("completed", models.IntegerField(default=0)),
+                ("failed", models.IntegerField(default=0)),
+                (
+                    "agent",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="task_counts",
+                        serialize=False,
+                        to="agents.agent",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="OwnerTaskCounts",
+            fields=[
+                ("pending", models.IntegerField(default=0)),
+                ("running", models.IntegerField(default=0)),
+                ("completed", models.IntegerField(default=0)),
+                ("failed", models.IntegerField(default=0)),
+                (
+                    "owner",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="task_counts",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.RunPython(populate_counts, migrations.RunPython.noop),
+    ]
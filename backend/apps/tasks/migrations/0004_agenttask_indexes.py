@@ -0,0 +1,91 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndexConcurrentlyOnPostgres(AddIndexConcurrently):
+    """
+    ``CREATE INDEX CONCURRENTLY`` on PostgreSQL, so building the indexes
+    never blocks writes to a large task table; a plain ``AddIndex``
+    elsewhere (SQLite in development and tests).
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("agents", "0002_agent_cache_responses"),
+        ("tasks", "0003_task_counts"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name="agenttask",
+            index=models.Index(
+                fields=["owner", "-created_at"], name="task_owner_created_idx"
+            ),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="agenttask",
+            index=models.Index(
+                fields=["owner", "status", "-created_at"], name="task_owner_status_idx"
+            ),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="agenttask",
+            index=models.Index(
+                fields=["agent", "-created_at"], name="task_agent_created_idx"
+            ),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="agenttask",
+            index=models.Index(
+                condition=models.Q(("status__in", ["pending", "running"])),
+                fields=["status", "created_at"],
+                name="task_active_idx",
+            ),
+        ),
+        # Drop the single-column FK indexes only once the composites exist
+        migrations.AlterField(
+            model_name="agenttask",
+            name="agent",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tasks",
+                to="agents.agent",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="agenttask",
+            name="owner",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tasks",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
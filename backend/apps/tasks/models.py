@@ -15,9 +15,16 @@ class AgentTask(models.Model):
         (STATUS_COMPLETED, "completed"),
         (STATUS_FAILED, "failed"),
     ]
-    agent = models.ForeignKey(Agent, on_delete=models.CASCADE, related_name="tasks")
+    # The composite indexes in Meta lead with these columns, so the FKs need
+    # no single-column index of their own
+    agent = models.ForeignKey(
+        Agent, on_delete=models.CASCADE, related_name="tasks", db_index=False
+    )
     owner = models.ForeignKey(
-        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="tasks"
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="tasks",
+        db_index=False,
     )
     input_text = models.TextField()
     output_text = models.TextField(blank=True, null=True)
@@ -29,3 +36,73 @@ class AgentTask(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # TaskViewSet: owner's tasks newest first, optionally by status
+            models.Index(
+                fields=["owner", "-created_at"], name="task_owner_created_idx"
+            ),
+            models.Index(
+                fields=["owner", "status", "-created_at"],
+                name="task_owner_status_idx",
+            ),
+            # Recent tasks per agent (agent list prefetch, get_cached_recent_tasks)
+            models.Index(
+                fields=["agent", "-created_at"], name="task_agent_created_idx"
+            ),
+            # Tasks still in flight; stays small as tasks finish
+            models.Index(
+                fields=["status", "created_at"],
+                condition=models.Q(status__in=["pending", "running"]),
+                name="task_active_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Stored status, so a later save can move the counters (see counters.py)
+        instance._stored_status = instance.__dict__.get("status")
+        return instance
+
+
+class TaskCounts(models.Model):
+    """
+    Task totals by status, one column per status. Maintained incrementally
+    by ``apps.tasks.counters`` and rebuilt by ``rebuild_task_counters``.
+    """
+
+    pending = models.IntegerField(default=0)
+    running = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def total(self):
+        return self.pending + self.running + self.completed + self.failed
+
+    def as_dict(self):
+        return {
+            "total": self.total,
+            "pending": self.pending,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+class AgentTaskCounts(TaskCounts):
+    agent = models.OneToOneField(
+        Agent, on_delete=models.CASCADE, primary_key=True, related_name="task_counts"
+    )
+
+
+class OwnerTaskCounts(TaskCounts):
+    owner = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="task_counts",
+    )
@@ -0,0 +1,217 @@
+"""
+Per-owner fair-share queues for batch task execution.
+
+Interactive runs (``TaskViewSet.run``, ``perform_create``) go straight to
+the default Celery queue. Batch submissions are parked here instead, one
+FIFO per owner, and ``dispatch_batch_tasks`` moves them to the ``batch``
+Celery queue round-robin by owner, ``CHUNK_SIZE`` tasks per turn, keeping
+at most ``MAX_IN_FLIGHT`` dispatched at once. A 10k-task backlog from one
+user therefore takes one turn in the rotation, not the whole worker pool,
+and never sits in front of interactive work.
+
+Backends:
+
+* ``InMemoryFairShareQueue`` - single process; for development and tests.
+  Slots are taken where tasks are dispatched and given back where they
+  finish, so this only works when both happen in one process: inline
+  runs (no broker) or ``CELERY_TASK_ALWAYS_EAGER``. With a real broker the
+  in-flight count never drains.
+* ``RedisFairShareQueue`` - shared by every web and worker process; a Lua
+  script makes each round-robin turn atomic.
+
+Configured by the ``TASK_SCHEDULER`` setting.
+"""
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+
+DEFAULTS = {
+    "BACKEND": "apps.tasks.scheduling.InMemoryFairShareQueue",
+    "OPTIONS": {},
+    "QUEUE": "batch",
+    "CHUNK_SIZE": 25,
+    "MAX_IN_FLIGHT": 200,
+}
+
+
+def get_scheduler_setting(name):
+    return getattr(settings, "TASK_SCHEDULER", {}).get(name, DEFAULTS[name])
+
+
+class InMemoryFairShareQueue:
+    """Round-robin over per-owner deques, guarded by a lock."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # owner_id -> pending task ids; dict order is the rotation
+        self.queues: "OrderedDict[int, deque]" = OrderedDict()
+        self.dispatched = 0
+
+    def push(self, owner_id: int, task_ids: List[int]):
+        with self.lock:
+            self.queues.setdefault(owner_id, deque()).extend(task_ids)
+
+    def take(self, quantum: int, max_in_flight: int) -> List[Tuple[int, List[int]]]:
+        """
+        Take up to ``quantum`` tasks from each owner in turn until the
+        in-flight budget is spent. Nothing is taken while fewer than
+        ``quantum`` slots are free, so work is refilled in whole chunks.
+        """
+        with self.lock:
+            budget = max_in_flight - self.dispatched
+            if budget < quantum and self.dispatched > 0:
+                return []
+            turns = []
+            while budget > 0 and self.queues:
+                owner_id, pending = self.queues.popitem(last=False)
+                ids = [
+                    pending.popleft() for _ in range(min(quantum, budget, len(pending)))
+                ]
+                if pending:
+                    self.queues[owner_id] = pending
+                if ids:
+                    turns.append((owner_id, ids))
+                    budget -= len(ids)
+            self.dispatched += sum(len(ids) for _, ids in turns)
+            return turns
+
+    def done(self, count: int = 1):
+        with self.lock:
+            self.dispatched = max(self.dispatched - count, 0)
+
+    def in_flight(self) -> int:
+        return self.dispatched
+
+    def depths(self) -> Dict[int, int]:
+        with self.lock:
+            return {owner: len(pending) for owner, pending in self.queues.items()}
+
+
+# KEYS: ring, in-flight counter. ARGV: owner key prefix, quantum, max in flight.
+# Returns a flat list: owner_id, comma-separated ids, owner_id, ids, ...
+TAKE_SCRIPT = """
+local ring, counter, prefix = KEYS[1], KEYS[2], ARGV[1]
+local quantum, max_in_flight = tonumber(ARGV[2]), tonumber(ARGV[3])
+local in_flight = tonumber(redis.call('GET', counter) or '0')
+local budget = max_in_flight - in_flight
+if budget < quantum and in_flight > 0 then
+    return {}
+end
+local turns = {}
+local taken = 0
+while budget > 0 and redis.call('LLEN', ring) > 0 do
+    local owner = redis.call('LPOP', ring)
+    local key = prefix .. owner
+    local ids = redis.call('LPOP', key, math.min(quantum, budget))
+    if redis.call('LLEN', key) > 0 then
+        redis.call('RPUSH', ring, owner)
+    end
+    if ids then
+        table.insert(turns, owner)
+        table.insert(turns, table.concat(ids, ','))
+        budget = budget - #ids
+        taken = taken + #ids
+    end
+end
+if taken > 0 then
+    redis.call('INCRBY', counter, taken)
+end
+return turns
+"""
+
+# KEYS: ring, owner queue. ARGV: owner_id, task ids...
+# Ids go in slices: unpack() of ~8000 values overflows the Lua stack.
+PUSH_SCRIPT = """
+local unpack = unpack or table.unpack
+local slice = 1000
+local was_empty = redis.call('LLEN', KEYS[2]) == 0
+for first = 2, #ARGV, slice do
+    redis.call('RPUSH', KEYS[2], unpack(ARGV, first, math.min(first + slice - 1, #ARGV)))
+end
+if was_empty then
+    redis.call('RPUSH', KEYS[1], ARGV[1])
+end
+"""
+
+
+class RedisFairShareQueue:
+    """
+    Fair-share queues in Redis: a list per owner, a ring list of owners with
+    pending work, and an in-flight counter. The counter expires after
+    ``in_flight_ttl`` seconds without dispatches so slots leaked by a
+    crashed worker come back once the system goes idle.
+    """
+
+    ring_key = "tasks:fair:ring"
+    counter_key = "tasks:fair:in_flight"
+    queue_prefix = "tasks:fair:owner:"
+
+    def __init__(
+        self,
+        url: str = "redis://127.0.0.1:6379/1",
+        in_flight_ttl: int = 3600,
+        **options,
+    ):
+        import redis
+
+        self.client = redis.Redis.from_url(url, **options)
+        self.in_flight_ttl = in_flight_ttl
+        self._take = self.client.register_script(TAKE_SCRIPT)
+        self._push = self.client.register_script(PUSH_SCRIPT)
+
+    def push(self, owner_id: int, task_ids: List[int]):
+        if task_ids:
+            self._push(
+                keys=[self.ring_key, f"{self.queue_prefix}{owner_id}"],
+                args=[owner_id, *task_ids],
+            )
+
+    def take(self, quantum: int, max_in_flight: int) -> List[Tuple[int, List[int]]]:
+        flat = self._take(
+            keys=[self.ring_key, self.counter_key],
+            args=[self.queue_prefix, quantum, max_in_flight],
+        )
+        if flat:
+            self.client.expire(self.counter_key, self.in_flight_ttl)
+        return [
+            (int(owner), [int(pk) for pk in ids.split(b",")])
+            for owner, ids in zip(flat[::2], flat[1::2])
+        ]
+
+    def done(self, count: int = 1):
+        if self.client.decrby(self.counter_key, count) < 0:
+            self.client.set(self.counter_key, 0)
+
+    def in_flight(self) -> int:
+        return int(self.client.get(self.counter_key) or 0)
+
+    def depths(self) -> Dict[int, int]:
+        owners = [int(owner) for owner in self.client.lrange(self.ring_key, 0, -1)]
+        pipe = self.client.pipeline(transaction=False)
+        for owner in owners:
+            pipe.llen(f"{self.queue_prefix}{owner}")
+        return dict(zip(owners, pipe.execute()))
+
+
+_scheduler = None
+
+
+def get_task_scheduler():
+    """Return the process-wide fair-share queue configured by ``TASK_SCHEDULER``."""
+    global _scheduler
+    if _scheduler is None:
+        backend = import_string(get_scheduler_setting("BACKEND"))
+        _scheduler = backend(**get_scheduler_setting("OPTIONS"))
+    return _scheduler
+
+
+def reset_task_scheduler():
+    """Drop the cached scheduler so the next call re-reads settings (used in tests)."""
+    global _scheduler
+    _scheduler = None
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from apps.agents.models import Agent
+from .batch import get_batch_setting
 from .models import AgentTask
 
 
@@ -26,3 +28,29 @@ class AgentTaskSerializer(serializers.ModelSerializer):
             "started_at",
             "finished_at",
         ]
+
+
+class AgentTaskBatchItemSerializer(serializers.Serializer):
+    agent = serializers.IntegerField()
+    input_text = serializers.CharField()
+
+
+class AgentTaskBatchSerializer(serializers.Serializer):
+    items = AgentTaskBatchItemSerializer(many=True, allow_empty=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["items"].max_length = get_batch_setting("MAX_ITEMS")
+
+    def validate_items(self, items):
+        # One query for every agent referenced by the batch
+        agent_ids = {item["agent"] for item in items}
+        owned = set(
+            Agent.objects.filter(
+                pk__in=agent_ids, owner=self.context["request"].user
+            ).values_list("pk", flat=True)
+        )
+        missing = sorted(agent_ids - owned)
+        if missing:
+            raise serializers.ValidationError(f"Agents not found: {missing}")
+        return items
@@ -1,40 +1,124 @@
 import json
-import time
-from django.http import StreamingHttpResponse
-from django.utils.timezone import now
-from .models import AgentTask
-
-
-def task_event_stream():
-    """Generator yielding updates every 2 seconds."""
-    last_check = now()
-    while True:
-        # Fetch tasks updated after last_check
-        updates = AgentTask.objects.filter(updated_at__gte=last_check)
-        last_check = now()
-
-        for task in updates:
-            data = {
-                "id": task.id,
-                "agent": task.agent_id,
-                "status": task.status,
-                "output_text": task.output_text or "",
-                "input_text": task.input_text,
-                "created_at": task.created_at.isoformat(),
-                "updated_at": task.updated_at.isoformat(),
-                "started_at": task.started_at.isoformat() if task.started_at else None,
-                "finished_at": task.finished_at.isoformat()
-                if task.finished_at
-                else None,
-            }
-            yield f"data: {json.dumps(data)}\n\n"
-
-        time.sleep(2)
 
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import require_http_methods
 
+from apps.core.sse import authenticate_stream_request, event_stream_response
+
+from .events import get_task_event_bus
+
+# Seconds between keepalive comments when no task event arrives
+KEEPALIVE_INTERVAL = 15
+
+# Tells the client its Last-Event-ID is outside the replay buffer and it
+# must reload the task list instead of relying on the stream
+RESET_MESSAGE = "event: reset\ndata: {}\n\n"
+
+
+def format_event(event):
+    """
+    Render a bus event as an SSE message.
+    Numbered events carry their ``id`` so the client can resume; transient
+    events (output deltas) are sent as named events without one.
+    """
+    if "event_id" not in event:
+        return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    return f"id: {event['event_id']}\ndata: {json.dumps(event)}\n\n"
+
+
+def is_new(event, high_water):
+    """Skip live events the replay already sent; transient events are always new."""
+    return "event_id" not in event or event["event_id"] > high_water
+
+
+def replay_messages(owner_id, last_event_id):
+    """
+    Build the catch-up messages for a reconnecting client.
+
+    Returns:
+        Tuple of (messages, high-water event id already sent)
+    """
+    if last_event_id is None:
+        return [], 0
+
+    events = get_task_event_bus().replay(owner_id, last_event_id)
+    if events is None:
+        return [RESET_MESSAGE], 0
+    high_water = events[-1]["event_id"] if events else last_event_id
+    return [format_event(event) for event in events], high_water
+
+
+def task_event_stream(owner_id, last_event_id=None):
+    """
+    Generator yielding task events for one owner as they are published.
+    Blocks on the event bus instead of polling the database.
+    """
+    # Subscribe before replaying so nothing published in between is lost
+    subscription = get_task_event_bus().subscribe(owner_id)
+    try:
+        messages, high_water = replay_messages(owner_id, last_event_id)
+        yield from messages
+        while True:
+            event = subscription.get(timeout=KEEPALIVE_INTERVAL)
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            if is_new(event, high_water):
+                yield format_event(event)
+    finally:
+        subscription.close()
+
+
+async def atask_event_stream(owner_id, last_event_id=None):
+    """
+    Async generator yielding task events for one owner.
+    Used under ASGI, where each open stream is a coroutine on the event loop.
+    """
+    subscription = await get_task_event_bus().asubscribe(owner_id)
+    try:
+        messages, high_water = await sync_to_async(
+            replay_messages, thread_sensitive=False
+        )(owner_id, last_event_id)
+        for message in messages:
+            yield message
+        while True:
+            event = await subscription.get(timeout=KEEPALIVE_INTERVAL)
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            if is_new(event, high_water):
+                yield format_event(event)
+    finally:
+        await subscription.aclose()
+
+
+def get_last_event_id(request):
+    """
+    Read the resume position from the ``Last-Event-ID`` header (sent by
+    EventSource on reconnect) or the ``last_event_id`` query parameter.
+    """
+    value = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@require_http_methods(["GET"])
 def task_stream_view(request):
-    response = StreamingHttpResponse(
-        task_event_stream(), content_type="text/event-stream"
+    """
+    SSE endpoint streaming the authenticated user's task updates.
+    Supports authentication via query parameter for SSE compatibility.
+    Resumes from ``Last-Event-ID`` using the event bus replay buffer.
+    """
+    error_response = authenticate_stream_request(request)
+    if error_response is not None:
+        return error_response
+
+    return event_stream_response(
+        request,
+        task_event_stream,
+        atask_event_stream,
+        request.user.pk,
+        get_last_event_id(request),
     )
-    response["Cache-Control"] = "no-cache"
-    return response
@@ -0,0 +1,69 @@
+"""
+Incremental output writer for streamed agent runs.
+
+Every chunk is pushed to subscribers immediately as a transient delta, while
+writes to ``AgentTask.output_text`` are coalesced: the first chunk is
+flushed right away (so time-to-first-token is one chunk), after which the
+row is updated at most every ``FLUSH_EVERY_CHUNKS`` chunks or
+``FLUSH_INTERVAL_MS`` milliseconds, whichever comes first.
+"""
+import time
+
+from django.conf import settings
+
+from .events import publish_task_delta, publish_task_event
+
+DEFAULTS = {
+    "ENABLED": False,
+    "FLUSH_EVERY_CHUNKS": 32,
+    "FLUSH_INTERVAL_MS": 500,
+}
+
+
+def get_streaming_setting(name):
+    return getattr(settings, "AGENT_STREAMING", {}).get(name, DEFAULTS[name])
+
+
+class TaskOutputWriter:
+    """Accumulate streamed output for a task and flush it in batches."""
+
+    def __init__(self, task, flush_every_chunks=None, flush_interval_ms=None):
+        self.task = task
+        self.flush_every_chunks = flush_every_chunks or get_streaming_setting(
+            "FLUSH_EVERY_CHUNKS"
+        )
+        self.flush_interval = (
+            flush_interval_ms or get_streaming_setting("FLUSH_INTERVAL_MS")
+        ) / 1000
+        self.parts = []
+        self.pending = 0
+        self.flushes = 0
+        self.last_flush = time.monotonic()
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def write(self, chunk: str):
+        """Publish a chunk now and persist it when a flush threshold is hit."""
+        self.parts.append(chunk)
+        self.pending += 1
+        publish_task_delta(self.task, chunk)
+
+        if (
+            self.flushes == 0
+            or self.pending >= self.flush_every_chunks
+            or time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        """Write accumulated output to the row and publish a snapshot event."""
+        if not self.pending:
+            return
+        self.task.output_text = self.text
+        self.task.save(update_fields=["output_text", "updated_at"])
+        publish_task_event(self.task)
+        self.pending = 0
+        self.flushes += 1
+        self.last_flush = time.monotonic()
@@ -1,37 +1,242 @@
-from celery import shared_task
+import logging
+import random
+import threading
+
+from celery import group, shared_task
+from django.db import connections
 from django.utils import timezone
+from apps.core.cache import flush_invalidations
+from .events import publish_task_event
 from .models import AgentTask
+from .scheduling import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    get_scheduler_setting,
+    get_task_scheduler,
+)
+from .streaming import TaskOutputWriter, get_streaming_setting
 
 # Import the openai wrapper to call the model (mockable in tests)
-from utils.openai_client import run_agent_sync
+from utils.async_engine import get_engine
+from utils.openai_client import (
+    get_client_setting,
+    request_key,
+    run_agent_async,
+    run_agent_sync,
+    stream_agent_async,
+    stream_agent_sync,
+)
+from utils.rate_limiter import RateLimited, get_limiter_setting, get_rate_limiter
+from utils.single_flight import get_single_flight
+
+logger = logging.getLogger(__name__)
+
+_dispatching = threading.local()
+
+
+def generate_output(task):
+    """
+    Run the agent for ``task`` and return the full output text.
+    With ``AGENT_STREAMING["ENABLED"]`` the output is streamed into the row
+    and to subscribers as it is generated instead of arriving all at once.
+    With ``OPENAI_CLIENT["ASYNC_ENABLED"]`` the HTTP call runs on the shared
+    async engine; this thread only waits, and DB writes stay on it.
+
+    Identical requests running concurrently (a retried or double-clicked
+    run) are coalesced: one task calls the model and every other gets the
+    same output (see ``utils.single_flight``).
+
+    The thread's database connection is closed before the wait, so a
+    worker with ``--concurrency=100`` does not hold 100 idle connections
+    while the model answers; the next query opens a fresh one.
+    """
+    _release_db_connections()
+    flight = get_single_flight().begin(request_key(task.agent, task.input_text))
+    output = flight.wait()
+    if output is not None:
+        if get_streaming_setting("ENABLED"):
+            TaskOutputWriter(task).write(output)
+        return output
+
+    try:
+        output = _call_agent(task)
+    except BaseException:
+        flight.abort()
+        raise
+    flight.finish(output)
+    return output
+
+
+def _release_db_connections():
+    for connection in connections.all(initialized_only=True):
+        # Closing inside a transaction would roll it back
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+def _call_agent(task):
+    use_engine = get_client_setting("ASYNC_ENABLED")
+
+    if not get_streaming_setting("ENABLED"):
+        if use_engine:
+            return get_engine().run(run_agent_async(task.agent, task.input_text))
+        return run_agent_sync(task.agent, task.input_text)
+
+    if use_engine:
+        chunks = get_engine().iterate(stream_agent_async(task.agent, task.input_text))
+    else:
+        chunks = stream_agent_sync(task.agent, task.input_text)
+
+    writer = TaskOutputWriter(task)
+    for chunk in chunks:
+        writer.write(chunk)
+    return writer.text
 
 
 @shared_task(bind=True)
-def run_agent_task_async(self, task_id):
+def run_agent_task_async(self, task_id, priority=PRIORITY_INTERACTIVE):
     """
     Celery task that runs an AgentTask using OpenAI and updates the DB.
-    For Day 2 we provide this placeholder — Day 3 will cover retries, logging, streaming.
+    Batch tasks (``priority="batch"``) hand their fair-share slot back when
+    they finish, which dispatches the next owner's turn. A re-queued task
+    keeps its slot until the retry finishes; one run inside a batch turn
+    (``run_batch_turn``) is re-queued as its own message.
     """
+    requeued = False
     try:
         task = AgentTask.objects.select_related("agent").get(pk=task_id)
         task.status = AgentTask.STATUS_RUNNING
         task.started_at = timezone.now()
         task.save(update_fields=["status", "started_at", "updated_at"])
+        publish_task_event(task)
+        # Don't hold "running" back from cached stats for the whole LLM call
+        flush_invalidations()
 
         # call OpenAI wrapper
-        output = run_agent_sync(task.agent, task.input_text)
+        output = generate_output(task)
         task.output_text = output
         task.status = AgentTask.STATUS_COMPLETED
         task.finished_at = timezone.now()
         task.save(update_fields=["output_text", "status", "finished_at", "updated_at"])
+        publish_task_event(task)
         return {"status": "ok"}
-    except Exception as ex:
-        # mark failed
+    except RateLimited as limited:
+        # Backpressure: go back to pending and re-queue instead of failing
+        if (
+            not self.request.called_directly
+            and self.request.retries < get_limiter_setting("MAX_RETRIES")
+        ):
+            countdown = _requeue(task_id, limited)
+            requeued = True
+            raise self.retry(countdown=countdown, max_retries=None)
+        if priority == PRIORITY_BATCH and _requeue_alone(task_id, limited):
+            requeued = True
+            return {"status": "requeued"}
+        _mark_failed(task_id)
+        raise
+    except Exception:
+        _mark_failed(task_id)
+        raise
+    finally:
+        if priority == PRIORITY_BATCH and not requeued:
+            get_task_scheduler().done()
+            dispatch_batch_tasks()
+
+
+def _mark_failed(task_id):
+    try:
+        task = AgentTask.objects.get(pk=task_id)
+        task.status = AgentTask.STATUS_FAILED
+        task.finished_at = timezone.now()
+        task.save(update_fields=["status", "finished_at", "updated_at"])
+        publish_task_event(task)
+    except Exception:
+        pass
+
+
+def _requeue(task_id, limited):
+    """Return the task to pending and the jittered countdown before its retry."""
+    jitter = get_limiter_setting("RETRY_JITTER")
+    countdown = limited.retry_after * (1 + random.uniform(0, jitter))
+    task = AgentTask.objects.get(pk=task_id)
+    task.status = AgentTask.STATUS_PENDING
+    task.started_at = None
+    task.save(update_fields=["status", "started_at", "updated_at"])
+    publish_task_event(task)
+    try:
+        limiter = get_rate_limiter()
+        limiter.record(limited.model, "delayed")
+        limiter.record(limited.model, "wait_seconds", countdown)
+        if limited.throttled:
+            limiter.record(limited.model, "throttled")
+    except Exception:
+        logger.exception(f"Could not record rate-limit delay for task {task_id}")
+    logger.info(f"Task {task_id} delayed {countdown:.2f}s by {limited}")
+    return countdown
+
+
+def _requeue_alone(task_id, limited):
+    """
+    Send a rate-limited task of a batch turn back to the batch queue as its
+    own message. Returns False if it could not be sent.
+    """
+    countdown = _requeue(task_id, limited)
+    try:
+        run_agent_task_async.apply_async(
+            (task_id, PRIORITY_BATCH),
+            countdown=countdown,
+            queue=get_scheduler_setting("QUEUE"),
+        )
+    except Exception:
+        logger.exception(f"Could not re-queue batch task {task_id}")
+        return False
+    return True
+
+
+@shared_task
+def run_batch_turn(task_ids):
+    """
+    Run one owner turn of batch tasks, one after another. Each task releases
+    its own slot, and a failure only fails that task, not the rest of the
+    turn.
+    """
+    for pk in task_ids:
         try:
-            task = AgentTask.objects.get(pk=task_id)
-            task.status = AgentTask.STATUS_FAILED
-            task.finished_at = timezone.now()
-            task.save(update_fields=["status", "finished_at", "updated_at"])
+            run_agent_task_async(pk, PRIORITY_BATCH)
         except Exception:
-            pass
-        raise
+            logger.exception(f"Batch task {pk} failed")
+
+
+@shared_task
+def dispatch_batch_tasks():
+    """
+    Move batch tasks from the per-owner fair-share queues to the batch
+    Celery queue, one ``CHUNK_SIZE`` turn per owner, while in-flight slots
+    are free. Runs after every batch submission and completion, and from
+    beat as a safety net.
+    """
+    # An inline fallback run re-enters here on completion; the loop below
+    # already picks up the next turn
+    if getattr(_dispatching, "active", False):
+        return
+    _dispatching.active = True
+    try:
+        scheduler = get_task_scheduler()
+        quantum = get_scheduler_setting("CHUNK_SIZE")
+        max_in_flight = get_scheduler_setting("MAX_IN_FLIGHT")
+        while turns := scheduler.take(quantum, max_in_flight):
+            _publish_turns(turns)
+    finally:
+        _dispatching.active = False
+
+
+def _publish_turns(turns):
+    # One message per owner turn, all sent over one producer connection
+    messages = group(run_batch_turn.s(ids) for _, ids in turns)
+    try:
+        messages.apply_async(queue=get_scheduler_setting("QUEUE"))
+    except Exception:
+        # If Celery isn't available, run inline like TaskViewSet.run (local dev)
+        logger.warning("Broker unavailable; running batch tasks inline")
+        for _, ids in turns:
+            run_batch_turn(ids)
@@ -2,16 +2,24 @@ from apps.agents.models import Agent
 from django.utils import timezone
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.throttling import UserRateThrottle
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 
+from apps.core import local_cache
+from apps.core.pagination import KeysetPagination
 from apps.core.permissions import IsOwnerOrReadOnly
+from utils import completion_cache
+from utils.rate_limiter import get_rate_limiter
 
+from .batch import create_tasks, enqueue_tasks
+from .events import publish_task_event
+from .export import CONTENT_TYPES, export_response
 from .filters import AgentTaskFilter
+from .scheduling import get_task_scheduler
 from .models import AgentTask
-from .serializers import AgentTaskSerializer
+from .serializers import AgentTaskBatchSerializer, AgentTaskSerializer
 from .tasks import run_agent_task_async
 
 
@@ -24,6 +32,8 @@ class TaskViewSet(viewsets.ModelViewSet):
     filterset_class = AgentTaskFilter
     ordering_fields = ["created_at", "status", "agent__name"]
     throttle_classes = [UserRateThrottle]
+    # Cursor on (created_at, id); ?limit=/?offset= for offset paging with a count
+    pagination_class = KeysetPagination
 
     def get_object(self):
         obj = super().get_object()
@@ -39,7 +49,12 @@ class TaskViewSet(viewsets.ModelViewSet):
         return qs
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        task = serializer.save(owner=self.request.user)
+        publish_task_event(task)
+
+    def perform_update(self, serializer):
+        task = serializer.save()
+        publish_task_event(task)
 
     @action(detail=False, methods=["post"], url_path="run", url_name="run")
     def run(self, request):
@@ -66,6 +81,7 @@ class TaskViewSet(viewsets.ModelViewSet):
             input_text=input_text,
             status=AgentTask.STATUS_PENDING,
         )
+        publish_task_event(task)
         # Trigger Celery asynchronous worker — can be run sync in tests by invoking run_agent_task_async(task.id) directly
         try:
             run_agent_task_async.delay(task.id)
@@ -74,3 +90,92 @@ class TaskViewSet(viewsets.ModelViewSet):
             run_agent_task_async(task.id)
         serializer = self.get_serializer(task)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], url_path="run-batch", url_name="run-batch")
+    def run_batch(self, request):
+        """
+        Create and enqueue many tasks in one request:
+        ``{"items": [{"agent": 1, "input_text": "..."}, ...]}``.
+        At most ``TASK_BATCH["MAX_ITEMS"]`` items per request.
+        """
+        serializer = AgentTaskBatchSerializer(
+            data=request.data, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        ids = create_tasks(request.user, serializer.validated_data["items"])
+        enqueue_tasks(request.user.pk, ids)
+        return Response({"ids": ids, "count": len(ids)}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"], url_path="export", url_name="export")
+    def export(self, request):
+        """
+        Stream every matching task as NDJSON (default) or CSV
+        (``?output=csv``). Accepts the same filters and ``?ordering=`` as
+        the list.
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in CONTENT_TYPES:
+            raise ValidationError(
+                {"output": f"Must be one of {sorted(CONTENT_TYPES)}."}
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(request._request, queryset, output)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="completion-cache-stats",
+        url_name="completion-cache-stats",
+        permission_classes=[IsAdminUser],
+    )
+    def completion_cache_stats(self, request):
+        """Hit/miss counters for the LLM response cache (staff only)."""
+        return Response(completion_cache.get_stats())
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="queue-stats",
+        url_name="queue-stats",
+        permission_classes=[IsAdminUser],
+    )
+    def queue_stats(self, request):
+        """Fair-share queue depth per owner and dispatched batch tasks (staff only)."""
+        scheduler = get_task_scheduler()
+        depths = scheduler.depths()
+        return Response(
+            {
+                "in_flight": scheduler.in_flight(),
+                "queued": sum(depths.values()),
+                "owners": {str(owner): depth for owner, depth in depths.items()},
+            }
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="rate-limit-stats",
+        url_name="rate-limit-stats",
+        permission_classes=[IsAdminUser],
+    )
+    def rate_limit_stats(self, request):
+        """Delays imposed by the LLM rate limiter, per model (staff only)."""
+        stats = get_rate_limiter().get_stats()
+        for values in stats.values():
+            values["avg_wait_seconds"] = (
+                round(values["wait_seconds"] / values["delayed"], 3)
+                if values["delayed"]
+                else 0.0
+            )
+        return Response(stats)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="cache-stats",
+        url_name="cache-stats",
+        permission_classes=[IsAdminUser],
+    )
+    def cache_stats(self, request):
+        """Hit ratio of the in-process and Redis cache tiers (staff only)."""
+        return Response(local_cache.get_stats())
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.users"
+
+    def ready(self):
+        """Replace Django's per-login last_login write (see signals)."""
+        import apps.users.signals  # noqa: F401
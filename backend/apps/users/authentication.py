@@ -0,0 +1,39 @@
+"""
+Stateless JWT authentication.
+
+simplejwt's ``JWTAuthentication`` queries the ``User`` row on every
+request, though most views only need ``request.user.pk`` to filter by
+owner. ``StatelessJWTAuthentication`` reads the row through
+``get_user_row`` instead, a short-lived per-process cache, so most
+requests never touch the users table.
+
+Deleted and inactive users are still rejected on every request, but a
+change reaches other workers' caches only after ``USER_ROW_CACHE["TTL"]``.
+"""
+from django.contrib.auth.models import User
+from django.db import router
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .selectors import get_user_row
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Needs the stored password hash
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                "Token contained no recognizable user identification"
+            ) from e
+
+        row = get_user_row(user_id=User._meta.pk.to_python(user_id))
+        if row is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not row["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return User.from_db(router.db_for_read(User), list(row), list(row.values()))
@@ -2,11 +2,20 @@
 User selectors - Query logic for user data retrieval.
 Following HackSoft Django Styleguide - all query logic lives in selectors.
 """
-from typing import Optional
+import threading
+from typing import Any, Optional
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
 
+from apps.core.local_cache import MISSING, LRUCache
+
+USER_ROW_CACHE_DEFAULTS = {
+    "MAX_ENTRIES": 1024,
+    "TTL": 30,
+}
+
 
 def get_user_by_id(*, user_id: int) -> Optional[User]:
     """
@@ -75,3 +84,58 @@ def user_exists(*, username: str = None, email: str = None) -> bool:
         query = query.filter(email=email)
 
     return query.exists()
+
+
+_user_rows = None
+_user_rows_lock = threading.Lock()
+
+
+def get_user_row_setting(name: str) -> Any:
+    return getattr(settings, "USER_ROW_CACHE", {}).get(
+        name, USER_ROW_CACHE_DEFAULTS[name]
+    )
+
+
+def get_user_row_cache() -> LRUCache:
+    """Return this process's cache of user rows."""
+    global _user_rows
+    if _user_rows is None:
+        with _user_rows_lock:
+            if _user_rows is None:
+                _user_rows = LRUCache(
+                    max_entries=get_user_row_setting("MAX_ENTRIES"),
+                    ttl=get_user_row_setting("TTL"),
+                )
+    return _user_rows
+
+
+def reset_user_row_cache():
+    """Drop every cached user row and re-read settings (used in tests)."""
+    global _user_rows
+    _user_rows = None
+
+
+def get_user_row(*, user_id: int) -> Optional[dict[str, Any]]:
+    """
+    Retrieve a user's column values, keyed by attname.
+
+    Served from a small per-process cache for ``USER_ROW_CACHE["TTL"]``
+    seconds. Saving or deleting a user drops it from this process's cache
+    only; other workers may see the old row until it expires.
+
+    Args:
+        user_id: User's primary key
+
+    Returns:
+        Dict of column values if found, None otherwise
+    """
+    rows = get_user_row_cache()
+    row = rows.get(user_id)
+    if row is MISSING:
+        row = User.objects.filter(pk=user_id).values().first()
+        rows.set(user_id, row)
+    return row
+
+
+def forget_user_row(*, user_id: int):
+    get_user_row_cache().delete_many([user_id])
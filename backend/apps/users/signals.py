@@ -0,0 +1,66 @@
+"""
+Deferred ``last_login`` updates.
+
+Django writes ``last_login`` from a ``user_logged_in`` receiver, and
+simplejwt's ``UPDATE_LAST_LOGIN`` writes it again from the token
+serializer: two UPDATEs inside every login. Both are off. Instead the
+receiver below skips users whose ``last_login`` (already loaded by
+``authenticate``) is newer than ``LAST_LOGIN["INTERVAL"]``, and
+dispatches the write for the rest to the background flusher
+(``apps.core.signal_dispatch``), so the login response never waits on it.
+
+Saving or deleting a user also drops this process's cached row (see
+``selectors.get_user_row``). Queryset ``update()`` sends no signals, so
+code that changes users that way (``is_active`` included) must call
+``forget_user_row`` itself, as ``write_last_login`` does.
+"""
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import User, update_last_login
+from django.contrib.auth.signals import user_logged_in
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.core.signal_dispatch import dispatch
+
+from .selectors import forget_user_row
+
+DEFAULTS = {
+    "INTERVAL": 300,
+}
+
+
+def get_last_login_setting(name: str) -> Any:
+    return getattr(settings, "LAST_LOGIN", {}).get(name, DEFAULTS[name])
+
+
+user_logged_in.disconnect(update_last_login, dispatch_uid="update_last_login")
+
+
+@receiver(user_logged_in)
+def record_last_login(sender, request, user, **kwargs):
+    now = timezone.now()
+    interval = timedelta(seconds=get_last_login_setting("INTERVAL"))
+    if user.last_login is not None and now - user.last_login < interval:
+        return
+    user.last_login = now
+    dispatch(write_last_login, user.pk, now, now - interval)
+
+
+def write_last_login(user_id, when, older_than):
+    # Conditional, so a late or repeated write never moves last_login back
+    get_user_model().objects.filter(
+        Q(last_login__isnull=True) | Q(last_login__lt=older_than), pk=user_id
+    ).update(last_login=when)
+    forget_user_row(user_id=user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    forget_user_row(user_id=instance.pk)
@@ -2,15 +2,12 @@
 User views - API endpoints for authentication and user management.
 Following HackSoft Django Styleguide - views are thin and delegate to services/selectors.
 """
-from django.contrib.auth.signals import (
-    user_logged_in,
-    user_logged_out,
-    user_login_failed,
-)
+from django.contrib.auth.signals import user_logged_in, user_logged_out
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 
@@ -70,31 +67,18 @@ class LoginView(TokenObtainPairView):
     permission_classes = [AllowAny]
 
     def post(self, request, *args, **kwargs):
-        # Try to authenticate and get tokens
-        response = super().post(request, *args, **kwargs)
-
-        # If successful (status 200), trigger user_logged_in signal
-        if response.status_code == 200:
-            # Get the user from the validated credentials
-            from django.contrib.auth import get_user_model
-
-            User = get_user_model()
-            username = request.data.get("username")
-            try:
-                user = User.objects.get(username=username)
-                # Send the signal (this triggers our signal handlers)
-                user_logged_in.send(sender=user.__class__, request=request, user=user)
-            except User.DoesNotExist:
-                pass
-        else:
-            # Login failed, trigger user_login_failed signal
-            user_login_failed.send(
-                sender=self.__class__,
-                credentials={"username": request.data.get("username")},
-                request=request,
-            )
+        serializer = self.get_serializer(data=request.data)
+        try:
+            # On bad credentials authenticate() sends user_login_failed
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0]) from e
+
+        # The serializer already authenticated the user; no second lookup
+        user = serializer.user
+        user_logged_in.send(sender=user.__class__, request=request, user=user)
 
-        return response
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
 class LogoutView(APIView):
@@ -3,6 +3,12 @@ ASGI config for agentarium project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+This is the production entry point: the SSE endpoints (/stream/tasks/ and
+/stream/signals/) switch to async generators under ASGI, so one worker holds
+thousands of idle streams on its event loop. Run it with, e.g.:
+
+    gunicorn config.asgi:application -k uvicorn_worker.UvicornWorker --workers 3
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
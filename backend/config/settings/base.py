@@ -144,11 +144,12 @@ INSTALLED_APPS += ["corsheaders"]
 MIDDLEWARE += [
     "corsheaders.middleware.CorsMiddleware",
     "apps.core.middleware.RequestLoggingMiddleware",
+    "apps.core.middleware.CacheInvalidationMiddleware",
 ]
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.StatelessJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_FILTER_BACKENDS": (
@@ -175,6 +176,115 @@ CACHES = {
     }
 }
 
+# Task event bus feeding /stream/tasks/ (in-process by default; Redis in prod)
+TASK_EVENT_BUS = {
+    "BACKEND": "apps.tasks.events.InMemoryTaskEventBus",
+}
+
+# Signal event log feeding /stream/signals/ (in-process by default; Redis in prod)
+SIGNAL_EVENTS = {
+    "BACKEND": "apps.core.signal_events.SignalEventQueue",
+    "OPTIONS": {"maxlen": 1000},
+}
+
+# Auth signal receivers hand logging and event storage to a background thread
+# through a bounded queue; work beyond MAX_PENDING is dropped and counted
+SIGNAL_DISPATCH = {
+    "ASYNC": True,
+    "MAX_PENDING": 10000,
+    "BATCH_SIZE": 100,
+}
+
+# Stream LLM output into AgentTask as it is generated. Chunks are pushed to
+# subscribers immediately; DB writes are coalesced by chunk count or time.
+AGENT_STREAMING = {
+    "ENABLED": False,
+    "FLUSH_EVERY_CHUNKS": 32,
+    "FLUSH_INTERVAL_MS": 500,
+}
+
+# Outbound OpenAI client. With ASYNC_ENABLED, completions run on one asyncio
+# loop per worker process (utils.async_engine) over a shared keep-alive pool,
+# so a thread-pool Celery worker can keep hundreds of calls in flight.
+OPENAI_CLIENT = {
+    "ASYNC_ENABLED": False,
+    "MAX_CONNECTIONS": 200,
+    "MAX_KEEPALIVE_CONNECTIONS": 100,
+    "KEEPALIVE_EXPIRY": 30,  # seconds an idle connection is kept open
+    "TIMEOUT": 60,
+    "MAX_IN_FLIGHT_PER_MODEL": {"default": 50},
+}
+
+# Response cache for identical deterministic prompts (temperature 0, or
+# Agent.cache_responses). Keyed by a hash of the full request.
+COMPLETION_CACHE = {
+    "ENABLED": True,
+    "TTL": 60 * 60 * 24,
+    "MAX_ENTRY_BYTES": 64 * 1024,
+}
+
+# Coalesce identical concurrent agent runs into one upstream call. Workers
+# coordinate through a Redis lock; threads of one worker share in-process.
+SINGLE_FLIGHT = {
+    "ENABLED": True,
+    "LOCK_TTL": 120,
+    "RESULT_TTL": 60,
+}
+
+# POST /api/tasks/run-batch/: item cap per request
+TASK_BATCH = {
+    "MAX_ITEMS": 1000,
+    "INSERT_BATCH_SIZE": 500,
+}
+
+# Batch tasks wait in per-owner fair-share queues and are dispatched to the
+# "batch" Celery queue round-robin by owner, CHUNK_SIZE tasks per turn, with
+# at most MAX_IN_FLIGHT dispatched. Interactive runs use the default queue.
+# The in-memory backend only works with inline or eager execution: with a
+# real broker, slots are given back in the worker and never reach the web
+# process. prod.py uses RedisFairShareQueue.
+TASK_SCHEDULER = {
+    "BACKEND": "apps.tasks.scheduling.InMemoryFairShareQueue",
+    "QUEUE": "batch",
+    "CHUNK_SIZE": 25,
+    "MAX_IN_FLIGHT": 200,
+}
+
+# Token buckets per model in front of the OpenAI client. Over-limit calls
+# (and provider 429s) re-queue the Celery task with a countdown instead of
+# completing it with an error string.
+LLM_RATE_LIMITS = {
+    "BACKEND": "utils.rate_limiter.InMemoryRateLimiter",
+    "LIMITS": {
+        "default": {"REQUESTS_PER_MINUTE": 500, "TOKENS_PER_MINUTE": 200_000},
+    },
+    "RETRY_JITTER": 0.1,
+    "MAX_RETRIES": 20,
+}
+
+# Per-process LRU in front of CACHES["default"] for the versioned task caches
+# (apps.core.cache). Entries are served locally for at most TTL seconds;
+# writes and generation bumps evict them in every process via BACKEND.
+LOCAL_CACHE = {
+    "BACKEND": "apps.core.local_cache.LocalInvalidation",
+    "MAX_ENTRIES": 1024,
+    "TTL": 5,
+}
+
+# Minimum seconds between two last_login writes for the same user. The write
+# happens on the signal dispatch thread, not in the login request.
+LAST_LOGIN = {
+    "INTERVAL": 300,
+}
+
+# User rows read by StatelessJWTAuthentication on every request, per process.
+# Other workers see a saved, deactivated or deleted user only after TTL
+# seconds.
+USER_ROW_CACHE = {
+    "MAX_ENTRIES": 1024,
+    "TTL": 30,
+}
+
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",  # React dev
@@ -193,7 +303,8 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
-    "UPDATE_LAST_LOGIN": True,
+    # last_login is written off the login path instead (see LAST_LOGIN above)
+    "UPDATE_LAST_LOGIN": False,
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,
     "AUTH_HEADER_TYPES": ("Bearer",),
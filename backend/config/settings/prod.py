@@ -53,6 +53,45 @@ CACHES = {
     }
 }
 
+# Task event bus - Redis pub/sub so Celery workers reach every web process
+TASK_EVENT_BUS = {
+    "BACKEND": "apps.tasks.events.RedisTaskEventBus",
+    "OPTIONS": {"url": REDIS_URL, "replay_size": 100},
+}
+
+# Signal events - one Redis Stream so every web and worker process is seen
+SIGNAL_EVENTS = {
+    "BACKEND": "apps.core.signal_events.RedisSignalEventQueue",
+    "OPTIONS": {"url": REDIS_URL, "maxlen": 1000},
+}
+
+# Fair-share batch queues shared by every web and worker process
+TASK_SCHEDULER = {
+    **TASK_SCHEDULER,
+    "BACKEND": "apps.tasks.scheduling.RedisFairShareQueue",
+    "OPTIONS": {"url": REDIS_URL},
+}
+
+# Rate-limit buckets shared by every worker
+LLM_RATE_LIMITS = {
+    **LLM_RATE_LIMITS,
+    "BACKEND": "utils.rate_limiter.RedisRateLimiter",
+    "OPTIONS": {"url": REDIS_URL},
+}
+
+# L1 invalidations fan out to every worker over Redis pub/sub
+LOCAL_CACHE = {
+    **LOCAL_CACHE,
+    "BACKEND": "apps.core.local_cache.RedisInvalidation",
+    "OPTIONS": {"url": REDIS_URL},
+}
+
+# Stream LLM output token by token (see AGENT_STREAMING in base.py)
+AGENT_STREAMING = {**AGENT_STREAMING, "ENABLED": True}
+
+# Multiplex LLM calls on the shared async engine (see OPENAI_CLIENT in base.py)
+OPENAI_CLIENT = {**OPENAI_CLIENT, "ASYNC_ENABLED": True}
+
 # Celery Configuration
 CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", REDIS_URL)
 CELERY_RESULT_BACKEND = os.environ.get("CELERY_RESULT_BACKEND", REDIS_URL)
@@ -64,6 +103,14 @@ CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 CELERY_WORKER_PREFETCH_MULTIPLIER = 1
 CELERY_WORKER_MAX_TASKS_PER_CHILD = 1000
+# Batch dispatch is driven by task completions; beat only restarts it if a
+# worker died mid-turn
+CELERY_BEAT_SCHEDULE = {
+    "dispatch-batch-tasks": {
+        "task": "apps.tasks.tasks.dispatch_batch_tasks",
+        "schedule": 30.0,
+    },
+}
 
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = "/static/"
@@ -2,9 +2,35 @@ import pytest
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 
+from apps.core.local_cache import reset_tiered_cache
+from apps.users.selectors import reset_user_row_cache
+
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def inline_signal_dispatch(settings):
+    # Handlers that write (last_login) would race the test's transaction
+    # from the flusher thread
+    settings.SIGNAL_DISPATCH = {**settings.SIGNAL_DISPATCH, "ASYNC": False}
+
+
+@pytest.fixture(autouse=True)
+def local_cache():
+    # Tests clear the shared cache behind L1's back; start each with an empty L1
+    reset_tiered_cache()
+    yield
+    reset_tiered_cache()
+
+
+@pytest.fixture(autouse=True)
+def user_row_cache():
+    # Rolled-back tests reuse user pks; don't serve a previous test's row
+    reset_user_row_cache()
+    yield
+    reset_user_row_cache()
+
+
 @pytest.fixture
 def user(db):
     return User.objects.create_user(
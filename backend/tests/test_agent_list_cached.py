@@ -0,0 +1,127 @@
+"""Tests for the cached, owner-scoped agent list."""
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.agents.models import Agent
+from apps.tasks.models import AgentTask
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def no_throttle(monkeypatch):
+    monkeypatch.setattr("apps.agents.views.AgentListCachedView.throttle_classes", [])
+
+
+@pytest.fixture
+def url():
+    return reverse("agent-list-cached")
+
+
+@pytest.fixture
+def agents(user):
+    return [Agent.objects.create(owner=user, name=f"Agent {i}") for i in range(5)]
+
+
+@pytest.mark.django_db
+class TestAgentListCached:
+    """Test GET /api/agents/cached/."""
+
+    def test_lists_own_agents_newest_first(self, api_client, url, agents):
+        other = User.objects.create_user(username="other", password="pass")
+        Agent.objects.create(owner=other, name="Theirs")
+
+        response = api_client.get(url)
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/json"
+        data = response.json()
+        assert data["count"] == 5
+        assert [a["name"] for a in data["results"]] == [
+            f"Agent {i}" for i in reversed(range(5))
+        ]
+        assert "recent_tasks" not in data["results"][0]
+
+    def test_paginates(self, api_client, url, agents):
+        first = api_client.get(url, {"limit": 2}).json()
+        assert len(first["results"]) == 2
+        assert first["previous"] is None
+
+        second = api_client.get(first["next"]).json()
+        assert [a["name"] for a in second["results"]] == ["Agent 2", "Agent 1"]
+        assert "offset" not in second["previous"]
+
+        last = api_client.get(second["next"]).json()
+        assert last["next"] is None
+
+    def test_hit_runs_no_queries(self, api_client, url, agents):
+        api_client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url)
+
+        assert response.json()["count"] == 5
+        assert len(queries) == 0
+
+    def test_not_modified(self, api_client, url, agents):
+        etag = api_client.get(url)["ETag"]
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response["ETag"] == etag
+        assert "no-cache" in response["Cache-Control"]
+
+    def test_etag_changes_with_agents(
+        self, api_client, user, url, agents, django_capture_on_commit_callbacks
+    ):
+        etag = api_client.get(url)["ETag"]
+        with django_capture_on_commit_callbacks(execute=True):
+            Agent.objects.create(owner=user, name="New")
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+        assert response.json()["count"] == 6
+
+    def test_tasks_count_follows_task_writes(
+        self, api_client, user, url, agents, django_capture_on_commit_callbacks
+    ):
+        api_client.get(url)
+        with django_capture_on_commit_callbacks(execute=True):
+            AgentTask.objects.create(agent=agents[0], owner=user, input_text="x")
+
+        results = api_client.get(url).json()["results"]
+
+        assert results[-1]["tasks_count"] == 1
+
+    def test_task_status_changes_keep_the_page(
+        self, api_client, user, url, agents, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            task = AgentTask.objects.create(agent=agents[0], owner=user, input_text="x")
+        api_client.get(url)
+        with django_capture_on_commit_callbacks(execute=True):
+            task.status = AgentTask.STATUS_COMPLETED
+            task.save(update_fields=["status", "updated_at"])
+
+        with CaptureQueriesContext(connection) as queries:
+            assert api_client.get(url).status_code == 200
+
+        assert len(queries) == 0
+
+    def test_requires_authentication(self, client, url):
+        assert client.get(url).status_code == 401
@@ -0,0 +1,81 @@
+"""Tests for the bounded recent_tasks prefetch on the agent list."""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.agents.models import Agent
+from apps.agents.views import AgentViewSet
+from apps.tasks.counters import record_created
+from apps.tasks.models import AgentTask
+
+
+@pytest.fixture
+def agents(user):
+    agents = [Agent.objects.create(owner=user, name=f"Agent {i}") for i in range(3)]
+    tasks = AgentTask.objects.bulk_create(
+        AgentTask(agent=agent, owner=user, input_text=f"{agent.name} task {n}")
+        for agent in agents
+        for n in range(30)
+    )
+    record_created(tasks)
+    return agents
+
+
+@pytest.mark.django_db
+class TestRecentTasksPrefetch:
+    """Test the per-agent top-N prefetch."""
+
+    def test_recent_tasks_are_limited_per_agent(self, api_client, agents):
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get("/api/agents/?recent_tasks=3")
+
+        assert response.status_code == 200
+        results = response.data["results"]
+        assert len(results) == 3
+        for agent in results:
+            assert agent["tasks_count"] == 30
+            assert len(agent["recent_tasks"]) == 3
+
+        # COUNT for pagination, the agent page, and one prefetch for all agents
+        assert len(ctx.captured_queries) == 3
+        prefetch = ctx.captured_queries[-1]["sql"]
+        assert "ROW_NUMBER()" in prefetch
+        assert "PARTITION BY" in prefetch
+
+    def test_prefetch_fetches_only_top_n_rows(self, agents):
+        view = AgentViewSet()
+        view.request = Request(APIRequestFactory().get("/api/agents/?recent_tasks=4"))
+
+        with CaptureQueriesContext(connection) as ctx:
+            loaded = list(view.get_queryset())
+
+        # Rows materialised by the prefetch query, not rows in the table
+        assert sum(len(agent.recent_tasks) for agent in loaded) == 3 * 4
+        assert len(ctx.captured_queries) == 2
+
+    def test_recent_tasks_are_newest_first(self, api_client, agents):
+        response = api_client.get("/api/agents/?recent_tasks=2")
+        first = response.data["results"][0]
+        latest = AgentTask.objects.filter(agent_id=first["id"]).order_by(
+            "-created_at", "-id"
+        )[:2]
+        assert [t["id"] for t in first["recent_tasks"]] == [t.id for t in latest]
+
+    def test_default_and_maximum_limit(self, api_client, agents):
+        response = api_client.get("/api/agents/")
+        assert len(response.data["results"][0]["recent_tasks"]) == 5
+
+        response = api_client.get("/api/agents/?recent_tasks=1000")
+        assert len(response.data["results"][0]["recent_tasks"]) == 30
+
+    def test_zero_skips_the_prefetch(self, api_client, agents):
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get("/api/agents/?recent_tasks=0")
+        assert "recent_tasks" not in response.data["results"][0]
+        assert len(ctx.captured_queries) == 2
+
+    def test_invalid_limit_is_rejected(self, api_client, agents):
+        response = api_client.get("/api/agents/?recent_tasks=lots")
+        assert response.status_code == 400
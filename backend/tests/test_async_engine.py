@@ -0,0 +1,157 @@
+"""Tests for the shared async engine and the async OpenAI client path."""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.db import connections
+
+from apps.agents.models import Agent
+from apps.tasks.models import AgentTask
+from apps.tasks.tasks import run_agent_task_async
+from utils import openai_client
+from utils.async_engine import AsyncEngine
+
+
+@pytest.fixture
+def engine():
+    engine = AsyncEngine()
+    yield engine
+    engine.stop()
+
+
+class FakeCompletions:
+    """Stand-in for ``client.chat.completions`` that tracks concurrency."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+
+    async def create(self, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        message = SimpleNamespace(content=f"reply from {kwargs['model']}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def fake_async_client(monkeypatch, settings):
+    # Measure real calls, not completion-cache hits
+    settings.COMPLETION_CACHE = {"ENABLED": False}
+    completions = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(openai_client, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(openai_client, "_get_async_client", lambda: client)
+    monkeypatch.setattr(openai_client, "_model_semaphores", {})
+    return completions
+
+
+class TestAsyncEngine:
+    """Test running coroutines from synchronous callers."""
+
+    def test_run_returns_result(self, engine):
+        async def add(a, b):
+            return a + b
+
+        assert engine.run(add(2, 3)) == 5
+
+    def test_calls_are_multiplexed_on_one_loop(self, engine):
+        async def wait():
+            await asyncio.sleep(0.2)
+
+        started = time.monotonic()
+        futures = [engine.submit(wait()) for _ in range(200)]
+        for future in futures:
+            future.result()
+
+        # 200 waits of 0.2s overlap instead of running back to back
+        assert time.monotonic() - started < 2
+
+    def test_iterate_bridges_async_iterator(self, engine):
+        async def count():
+            for i in range(3):
+                yield i
+
+        assert list(engine.iterate(count())) == [0, 1, 2]
+
+    def test_iterate_reraises_errors(self, engine):
+        async def broken():
+            yield 1
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            list(engine.iterate(broken()))
+
+
+class TestAsyncClientPath:
+    """Test per-model in-flight limits on the async client path."""
+
+    def test_in_flight_is_capped_per_model(self, engine, fake_async_client, settings):
+        settings.OPENAI_CLIENT = {"MAX_IN_FLIGHT_PER_MODEL": {"default": 5}}
+        agent = SimpleNamespace(description="", model="gpt-4o-mini", temperature=0)
+
+        futures = [
+            engine.submit(openai_client.run_agent_async(agent, f"prompt {i}"))
+            for i in range(40)
+        ]
+        results = [future.result() for future in futures]
+
+        assert results == ["reply from gpt-4o-mini"] * 40
+        assert fake_async_client.peak == 5
+
+    def test_limits_are_independent_per_model(
+        self, engine, fake_async_client, settings
+    ):
+        settings.OPENAI_CLIENT = {
+            "MAX_IN_FLIGHT_PER_MODEL": {"default": 2, "gpt-4o": 3}
+        }
+        agents = [
+            SimpleNamespace(description="", model=model, temperature=0)
+            for model in ("gpt-4o-mini", "gpt-4o")
+        ]
+
+        futures = [
+            engine.submit(openai_client.run_agent_async(agent, "hi"))
+            for agent in agents
+            for _ in range(10)
+        ]
+        for future in futures:
+            future.result()
+
+        assert fake_async_client.peak == 5
+
+    @pytest.mark.django_db
+    def test_task_runs_on_engine_when_enabled(self, user, settings):
+        settings.OPENAI_CLIENT = {"ASYNC_ENABLED": True}
+        agent = Agent.objects.create(owner=user, name="EngineAgent")
+        task = AgentTask.objects.create(agent=agent, owner=user, input_text="Hi")
+
+        run_agent_task_async(task.id)
+
+        task.refresh_from_db()
+        assert task.status == AgentTask.STATUS_COMPLETED
+        assert task.output_text.startswith("[Mock Response]")
+
+    @pytest.mark.django_db(transaction=True)
+    def test_no_db_connection_is_held_while_waiting(self, user, monkeypatch):
+        agent = Agent.objects.create(owner=user, name="EngineAgent")
+        task = AgentTask.objects.create(agent=agent, owner=user, input_text="Hi")
+        calls = []
+        # In-memory SQLite ignores close(), so record it instead
+        monkeypatch.setattr(
+            connections["default"], "close", lambda: calls.append("close")
+        )
+
+        def run(agent, prompt):
+            calls.append("model")
+            return "ok"
+
+        monkeypatch.setattr("apps.tasks.tasks.run_agent_sync", run)
+        run_agent_task_async(task.id)
+
+        assert calls == ["close", "model"]
+        task.refresh_from_db()
+        assert task.status == AgentTask.STATUS_COMPLETED
@@ -2,7 +2,7 @@
 import pytest
 from django.core.cache import cache
 from apps.agents.models import Agent
-from apps.tasks.cache import get_cached_agents
+from apps.tasks.cache import get_cached_agents, invalidate_agent_cache
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -55,8 +55,7 @@ class TestCaching:
         agents1 = get_cached_agents()
         assert len(agents1) == 1
 
-        # Clear cache (use correct cache key)
-        cache.delete("agents:list")
+        invalidate_agent_cache()
 
         # Create new agent
         Agent.objects.create(owner=user, name="Agent2")
@@ -0,0 +1,205 @@
+"""Tests for invalidating the task caches on agent and task writes."""
+import pytest
+import redis
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.agents.models import Agent
+from apps.core.cache import (
+    bump_generation,
+    get_generations,
+    invalidate_on_commit,
+    invalidation_batch,
+)
+from apps.tasks.batch import create_tasks
+from apps.tasks.cache import (
+    get_cached_agents,
+    get_cached_recent_tasks,
+    get_cached_task_stats,
+)
+from apps.tasks.models import AgentTask
+from apps.tasks.tasks import run_agent_task_async
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def bumps(monkeypatch):
+    """Record each bump_generation call instead of only its effect."""
+    calls = []
+    bump = bump_generation
+
+    def recording_bump(*namespaces):
+        calls.append(set(namespaces))
+        bump(*namespaces)
+
+    monkeypatch.setattr("apps.core.cache.bump_generation", recording_bump)
+    return calls
+
+
+@pytest.fixture
+def agent(user):
+    return Agent.objects.create(owner=user, name="Cached")
+
+
+@pytest.mark.django_db
+class TestInvalidationOnWrite:
+    """Test that ORM writes invalidate once their transaction commits."""
+
+    def test_new_task_invalidates_stats_and_recent(
+        self, user, agent, django_capture_on_commit_callbacks
+    ):
+        assert get_cached_task_stats(user.pk)["total"] == 0
+        assert get_cached_recent_tasks(agent.pk) == []
+
+        with django_capture_on_commit_callbacks(execute=True):
+            AgentTask.objects.create(agent=agent, owner=user, input_text="x")
+
+        assert get_cached_task_stats(user.pk)["total"] == 1
+        assert len(get_cached_recent_tasks(agent.pk)) == 1
+
+    def test_status_change_invalidates_stats(
+        self, user, agent, django_capture_on_commit_callbacks
+    ):
+        task = AgentTask.objects.create(agent=agent, owner=user, input_text="x")
+        assert get_cached_task_stats(user.pk)["pending"] == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            task.status = AgentTask.STATUS_COMPLETED
+            task.save(update_fields=["status", "updated_at"])
+
+        assert get_cached_task_stats(user.pk)["completed"] == 1
+
+    def test_output_save_leaves_stats_cached(
+        self, user, agent, bumps, django_capture_on_commit_callbacks
+    ):
+        task = AgentTask.objects.create(agent=agent, owner=user, input_text="x")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            task.output_text = "partial"
+            task.save(update_fields=["output_text", "updated_at"])
+
+        assert bumps == [{f"tasks:agent:{agent.pk}"}]
+
+    def test_deleted_task_invalidates(
+        self, user, agent, django_capture_on_commit_callbacks
+    ):
+        task = AgentTask.objects.create(agent=agent, owner=user, input_text="x")
+        assert get_cached_task_stats(user.pk)["total"] == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            task.delete()
+
+        assert get_cached_task_stats(user.pk)["total"] == 0
+        assert get_cached_recent_tasks(agent.pk) == []
+
+    def test_agent_write_invalidates_lists(
+        self, user, agent, django_capture_on_commit_callbacks
+    ):
+        assert len(get_cached_agents(user.pk)) == 1
+        assert len(get_cached_agents()) == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Agent.objects.create(owner=user, name="Second")
+
+        assert len(get_cached_agents(user.pk)) == 2
+        assert len(get_cached_agents()) == 2
+
+    def test_bulk_created_tasks_invalidate(
+        self, user, agent, django_capture_on_commit_callbacks
+    ):
+        assert get_cached_task_stats(user.pk)["total"] == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            create_tasks(user, [{"agent": agent.pk, "input_text": "a"}] * 3)
+
+        assert get_cached_task_stats(user.pk)["total"] == 3
+
+    def test_rollback_does_not_invalidate(
+        self, user, agent, bumps, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    AgentTask.objects.create(agent=agent, owner=user, input_text="x")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        assert callbacks == []
+        assert bumps == []
+
+
+@pytest.mark.django_db
+class TestInvalidationBatch:
+    """Test that a batch sends its invalidations as one call."""
+
+    def test_batch_bumps_once(self, bumps, django_capture_on_commit_callbacks):
+        with invalidation_batch():
+            with django_capture_on_commit_callbacks(execute=True):
+                invalidate_on_commit("ns:a", "ns:b")
+                invalidate_on_commit("ns:b", "ns:c")
+            assert bumps == []
+
+        assert bumps == [{"ns:a", "ns:b", "ns:c"}]
+
+    def test_nested_batch_is_flushed_by_outermost(
+        self, bumps, django_capture_on_commit_callbacks
+    ):
+        with invalidation_batch():
+            with invalidation_batch():
+                with django_capture_on_commit_callbacks(execute=True):
+                    invalidate_on_commit("ns:a")
+            assert bumps == []
+
+        assert bumps == [{"ns:a"}]
+
+    def test_bump_is_one_round_trip(self, monkeypatch):
+        before = get_generations("ns:a", "ns:b")
+        executed = []
+        execute = redis.client.Pipeline.execute
+
+        def counting_execute(pipe, *args, **kwargs):
+            executed.append(len(pipe.command_stack))
+            return execute(pipe, *args, **kwargs)
+
+        monkeypatch.setattr(redis.client.Pipeline, "execute", counting_execute)
+
+        bump_generation("ns:a", "ns:b", "ns:new")
+
+        assert executed == [6]
+        after = get_generations("ns:a", "ns:b", "ns:new")
+        assert after["ns:a"] == before["ns:a"] + 1
+        assert after["ns:b"] == before["ns:b"] + 1
+        assert after["ns:new"] > before["ns:a"]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBatchScopes:
+    """Test that requests and Celery tasks each flush one batch."""
+
+    def test_request_batches_invalidations(self, api_client, bumps):
+        response = api_client.post(
+            "/api/agents/", {"name": "New", "description": "d"}, format="json"
+        )
+
+        assert response.status_code == 201
+        assert len(bumps) == 1
+
+    def test_celery_task_batches_invalidations(self, user, agent, bumps, monkeypatch):
+        monkeypatch.setattr(
+            "apps.tasks.tasks.run_agent_sync", lambda *args, **kwargs: "done"
+        )
+        task = AgentTask.objects.create(agent=agent, owner=user, input_text="x")
+        bumps.clear()
+
+        run_agent_task_async.apply(args=(task.pk,))
+
+        # "running" is flushed early; output and completion go out together
+        assert len(bumps) == 2
+        assert f"tasks:owner:{user.pk}" in bumps[-1]
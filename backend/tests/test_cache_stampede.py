@@ -0,0 +1,158 @@
+"""Tests for the stampede-safe cache-aside helper."""
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+
+from apps.core.cache import (
+    acquire_lock,
+    get_or_compute,
+    lock_key,
+    lock_owner,
+    release_lock,
+)
+from apps.core.local_cache import reset_tiered_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings):
+    # expire() rewrites entries in the shared cache directly, bypassing L1
+    settings.LOCAL_CACHE = {"ENABLED": False}
+    reset_tiered_cache()
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class Loader:
+    """Counts calls; optionally slow, to widen the race window."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            n = self.calls
+        time.sleep(self.delay)
+        return f"value {n}"
+
+
+def expire(key):
+    value, _, cost = cache.get(key)
+    cache.set(key, (value, time.time() - 1, cost), 60)
+
+
+class TestGetOrCompute:
+    """Test that only one caller rebuilds a missing or expired entry."""
+
+    def test_caches_value(self):
+        load = Loader()
+        assert get_or_compute("k", load, timeout=60) == "value 1"
+        assert get_or_compute("k", load, timeout=60) == "value 1"
+        assert load.calls == 1
+
+    def test_cold_miss_computes_once(self):
+        load = Loader(delay=0.3)
+        results = []
+
+        def read():
+            results.append(get_or_compute("k", load, timeout=60))
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert load.calls == 1
+        assert results == ["value 1"] * 8
+
+    def test_expired_entry_served_stale_while_locked(self):
+        load = Loader()
+        get_or_compute("k", load, timeout=60)
+        expire("k")
+        cache.add(lock_key("k"), 1, timeout=10)
+
+        # Someone else holds the lock: the stale copy comes back immediately
+        assert get_or_compute("k", load, timeout=60) == "value 1"
+        assert load.calls == 1
+
+    def test_expired_entry_refreshed_by_lock_winner(self):
+        load = Loader()
+        get_or_compute("k", load, timeout=60)
+        expire("k")
+
+        assert get_or_compute("k", load, timeout=60) == "value 2"
+        assert cache.get(lock_key("k")) is None
+
+    def test_early_refresh_scales_with_cost(self, monkeypatch):
+        load = Loader()
+        get_or_compute("k", load, timeout=60)
+        value, expires_at, _ = cache.get("k")
+        # Ten seconds to expiry, but the value took 30s to build
+        cache.set("k", (value, time.time() + 10, 30.0), 60)
+        monkeypatch.setattr("apps.core.cache.random.random", lambda: 0.5)
+
+        assert get_or_compute("k", load, timeout=60) == "value 2"
+
+    def test_cheap_value_not_refreshed_early(self, monkeypatch):
+        load = Loader()
+        get_or_compute("k", load, timeout=60)
+        monkeypatch.setattr("apps.core.cache.random.random", lambda: 0.5)
+
+        get_or_compute("k", load, timeout=60)
+
+        assert load.calls == 1
+
+    def test_waiters_compute_themselves_if_leader_vanishes(self):
+        cache.add(lock_key("k"), 1, timeout=10)
+        load = Loader()
+        assert get_or_compute("k", load, timeout=60, lock_timeout=0.2) == "value 1"
+
+    def test_lock_released_when_compute_fails(self):
+        def broken():
+            raise RuntimeError("db down")
+
+        with pytest.raises(RuntimeError):
+            get_or_compute("k", broken, timeout=60)
+        assert cache.get(lock_key("k")) is None
+
+    def test_slow_compute_leaves_a_retaken_lock_alone(self):
+        taken = {}
+
+        def slow():
+            time.sleep(0.3)
+            # Our lock expired meanwhile and another worker took it
+            taken["token"] = acquire_lock(lock_key("k"), 10)
+            return "value"
+
+        get_or_compute("k", slow, timeout=60, lock_timeout=0.1)
+
+        assert taken["token"] is not None
+        assert lock_owner(lock_key("k")) == taken["token"]
+
+
+class TestLocks:
+    """Test token-owned locks in the default cache."""
+
+    def test_only_one_holder(self):
+        token = acquire_lock("lock:x", 10)
+        assert token is not None
+        assert acquire_lock("lock:x", 10) is None
+        assert lock_owner("lock:x") == token
+
+    def test_release_needs_the_holders_token(self):
+        token = acquire_lock("lock:x", 10)
+        assert release_lock("lock:x", "someone else") is False
+        assert lock_owner("lock:x") == token
+        assert release_lock("lock:x", token) is True
+        assert lock_owner("lock:x") is None
+
+    def test_lock_expires(self):
+        acquire_lock("lock:x", 0.05)
+        time.sleep(0.1)
+        assert acquire_lock("lock:x", 10) is not None
@@ -0,0 +1,149 @@
+"""Tests for the LLM response cache."""
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+
+from utils import completion_cache, openai_client
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class FakeCompletions:
+    """Stand-in for ``client.chat.completions`` that counts API calls."""
+
+    def __init__(self, content="cached reply", error=None):
+        self.content = content
+        self.error = error
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        if kwargs.get("stream"):
+            return iter(
+                SimpleNamespace(
+                    choices=[SimpleNamespace(delta=SimpleNamespace(content=c))]
+                )
+                for c in ("cached ", "reply")
+            )
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    completions = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(openai_client, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(openai_client, "_get_client", lambda: client)
+    return completions
+
+
+def make_agent(temperature=0, cache_responses=False):
+    return SimpleNamespace(
+        description="",
+        model="gpt-4o-mini",
+        temperature=temperature,
+        cache_responses=cache_responses,
+    )
+
+
+class TestCacheKey:
+    """Test which requests are eligible for caching."""
+
+    def test_deterministic_request_is_cacheable(self):
+        kwargs = {"model": "gpt-4o-mini", "temperature": 0, "messages": []}
+        assert completion_cache.key_for(make_agent(), kwargs)
+
+    def test_sampled_request_is_not_cacheable(self):
+        kwargs = {"model": "gpt-4o-mini", "temperature": 0.7, "messages": []}
+        assert completion_cache.key_for(make_agent(temperature=0.7), kwargs) is None
+
+    def test_opt_in_flag_makes_sampled_request_cacheable(self):
+        agent = make_agent(temperature=0.7, cache_responses=True)
+        kwargs = {"model": "gpt-4o-mini", "temperature": 0.7, "messages": []}
+        assert completion_cache.key_for(agent, kwargs)
+
+    def test_key_changes_with_request(self):
+        agent = make_agent()
+        a = completion_cache.key_for(agent, {"temperature": 0, "model": "a"})
+        b = completion_cache.key_for(agent, {"temperature": 0, "model": "b"})
+        assert a != b
+
+    def test_disabled_setting_skips_cache(self, settings):
+        settings.COMPLETION_CACHE = {"ENABLED": False}
+        assert completion_cache.key_for(make_agent(), {"temperature": 0}) is None
+
+
+class TestCachedCompletions:
+    """Test the cache on the OpenAI client call paths."""
+
+    def test_repeated_prompt_is_served_from_cache(self, completions):
+        agent = make_agent()
+        first = openai_client.run_agent_sync(agent, "Summarize")
+        second = openai_client.run_agent_sync(agent, "Summarize")
+
+        assert first == second == "cached reply"
+        assert completions.calls == 1
+        stats = completion_cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    def test_sampled_agent_always_calls_api(self, completions):
+        agent = make_agent(temperature=0.7)
+        openai_client.run_agent_sync(agent, "Summarize")
+        openai_client.run_agent_sync(agent, "Summarize")
+        assert completions.calls == 2
+
+    def test_streamed_response_is_cached(self, completions):
+        agent = make_agent()
+        streamed = "".join(openai_client.stream_agent_sync(agent, "Summarize"))
+        cached = list(openai_client.stream_agent_sync(agent, "Summarize"))
+
+        assert cached == [streamed]
+        assert completions.calls == 1
+
+    def test_errors_are_not_cached(self, completions):
+        completions.error = RuntimeError("rate limited")
+        agent = make_agent()
+        assert openai_client.run_agent_sync(agent, "Hi").startswith("[Error]")
+
+        completions.error = None
+        assert openai_client.run_agent_sync(agent, "Hi") == "cached reply"
+        assert completions.calls == 2
+
+    def test_oversized_response_is_not_stored(self, completions, settings):
+        settings.COMPLETION_CACHE = {"MAX_ENTRY_BYTES": 4}
+        agent = make_agent()
+        openai_client.run_agent_sync(agent, "Hi")
+        openai_client.run_agent_sync(agent, "Hi")
+
+        assert completions.calls == 2
+        assert completion_cache.get_stats()["skipped_too_large"] == 2
+
+
+@pytest.mark.django_db
+class TestCacheStatsEndpoint:
+    """Test the staff-only stats endpoint."""
+
+    def test_staff_can_read_stats(self, api_client, user):
+        user.is_staff = True
+        user.save()
+        url = reverse("task-completion-cache-stats")
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data) >= {"hits", "misses", "hit_ratio"}
+
+    def test_regular_user_is_forbidden(self, api_client):
+        url = reverse("task-completion-cache-stats")
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
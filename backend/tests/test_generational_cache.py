@@ -0,0 +1,112 @@
+"""Tests for generational cache keys and the task caches built on them."""
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from apps.agents.models import Agent
+from apps.core.cache import (
+    bump_generation,
+    generation_key,
+    get_generations,
+    versioned_key,
+)
+from apps.core.local_cache import reset_tiered_cache
+from apps.tasks.cache import (
+    get_cached_agents,
+    get_cached_recent_tasks,
+    get_cached_task_stats,
+    invalidate_agent_cache,
+    invalidate_agent_tasks_cache,
+    invalidate_task_stats,
+)
+from apps.tasks.models import AgentTask
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class TestGenerations:
+    """Test the versioned key helper."""
+
+    def test_key_is_stable_until_bumped(self):
+        first = versioned_key("thing", "ns:a")
+        assert versioned_key("thing", "ns:a") == first
+
+        bump_generation("ns:a")
+
+        assert versioned_key("thing", "ns:a") != first
+
+    def test_bump_is_scoped_to_namespace(self):
+        other = versioned_key("thing", "ns:b")
+        bump_generation("ns:a")
+        assert versioned_key("thing", "ns:b") == other
+
+    def test_key_depends_on_every_namespace(self):
+        key = versioned_key("thing", "ns:a", "ns:b")
+        bump_generation("ns:b")
+        assert versioned_key("thing", "ns:a", "ns:b") != key
+
+    def test_lost_generation_does_not_revive_old_keys(self):
+        old = get_generations("ns:a")["ns:a"]
+        bump_generation("ns:a")
+        cache.delete(generation_key("ns:a"))
+        reset_tiered_cache()
+        # Restarting from the clock lands past any generation already used
+        assert get_generations("ns:a")["ns:a"] > old + 1
+
+
+@pytest.mark.django_db
+class TestTaskCaches:
+    """Test that invalidation reaches every cached variant."""
+
+    def test_recent_tasks_invalidated_for_any_limit(self, user):
+        agent = Agent.objects.create(owner=user, name="A")
+        AgentTask.objects.create(agent=agent, owner=user, input_text="first")
+        assert len(get_cached_recent_tasks(agent.pk, limit=7)) == 1
+
+        AgentTask.objects.create(agent=agent, owner=user, input_text="second")
+        assert len(get_cached_recent_tasks(agent.pk, limit=7)) == 1
+
+        invalidate_agent_tasks_cache(agent.pk)
+        assert len(get_cached_recent_tasks(agent.pk, limit=7)) == 2
+
+    def test_task_stats_invalidation(self, user):
+        agent = Agent.objects.create(owner=user, name="A")
+        assert get_cached_task_stats(user.pk)["total"] == 0
+        AgentTask.objects.create(agent=agent, owner=user, input_text="x")
+
+        invalidate_task_stats(user.pk)
+
+        assert get_cached_task_stats(user.pk)["total"] == 1
+
+    def test_owner_invalidation_leaves_other_owners_cached(self, user):
+        other = User.objects.create_user(username="other", password="pass")
+        get_cached_agents(user.pk)
+        get_cached_agents(other.pk)
+        get_cached_agents()
+        Agent.objects.create(owner=user, name="Mine")
+        Agent.objects.create(owner=other, name="Theirs")
+
+        invalidate_agent_cache(user.pk)
+
+        assert len(get_cached_agents(user.pk)) == 1
+        assert len(get_cached_agents()) == 2
+        assert get_cached_agents(other.pk) == []
+
+    def test_global_invalidation_reaches_every_owner(self, user):
+        other = User.objects.create_user(username="other", password="pass")
+        get_cached_agents(user.pk)
+        get_cached_agents(other.pk)
+        Agent.objects.create(owner=user, name="Mine")
+        Agent.objects.create(owner=other, name="Theirs")
+
+        invalidate_agent_cache()
+
+        assert len(get_cached_agents(user.pk)) == 1
+        assert len(get_cached_agents(other.pk)) == 1
@@ -0,0 +1,210 @@
+"""Tests for the in-process L1 in front of the Django cache."""
+import time
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+
+from apps.core import local_cache
+from apps.core.cache import bump_generation, get_generations, get_or_compute
+from apps.core.local_cache import (
+    MISSING,
+    LRUCache,
+    RedisInvalidation,
+    TieredCache,
+    get_stats,
+    get_tiered_cache,
+    reset_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def count_remote_reads(monkeypatch):
+    reads = []
+    get_many = cache.get_many
+
+    def counting_get_many(keys, *args, **kwargs):
+        reads.append(list(keys))
+        return get_many(keys, *args, **kwargs)
+
+    monkeypatch.setattr(cache, "get_many", counting_get_many)
+    return reads
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestLRUCache:
+    """Test the bounded local mapping."""
+
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(max_entries=2, ttl=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+
+        assert lru.get("b") is MISSING
+        assert lru.get("a") == 1
+        assert len(lru) == 2
+
+    def test_entries_expire(self):
+        lru = LRUCache(max_entries=2, ttl=0.05)
+        lru.set("a", 1)
+        time.sleep(0.06)
+        assert lru.get("a") is MISSING
+
+    def test_caches_falsy_values(self):
+        lru = LRUCache(max_entries=2, ttl=60)
+        lru.set("a", None)
+        assert lru.get("a") is None
+
+
+class TestTieredCache:
+    """Test reads and writes through both tiers."""
+
+    def test_second_read_skips_redis(self, monkeypatch):
+        cache.set("k", "v")
+        reads = count_remote_reads(monkeypatch)
+        tiered = get_tiered_cache()
+
+        assert tiered.get("k") == "v"
+        assert tiered.get("k") == "v"
+
+        assert reads == [["k"]]
+
+    def test_get_many_fetches_only_local_misses(self, monkeypatch):
+        cache.set_many({"a": 1, "b": 2})
+        tiered = get_tiered_cache()
+        tiered.get("a")
+        reads = count_remote_reads(monkeypatch)
+
+        assert tiered.get_many(["a", "b", "c"]) == {"a": 1, "b": 2}
+        assert reads == [["b", "c"]]
+
+    def test_set_writes_through(self):
+        tiered = get_tiered_cache()
+        tiered.get("k")
+        tiered.set("k", "new", 60)
+
+        assert cache.get("k") == "new"
+        assert tiered.get("k") == "new"
+
+    def test_bump_drops_local_generation(self):
+        before = get_generations("ns:a")["ns:a"]
+        bump_generation("ns:a")
+        assert get_generations("ns:a")["ns:a"] == before + 1
+
+    def test_get_or_compute_served_locally(self, monkeypatch):
+        get_or_compute("k", lambda: "v", timeout=60)
+        reads = count_remote_reads(monkeypatch)
+
+        assert get_or_compute("k", lambda: "other", timeout=60) == "v"
+        assert reads == []
+
+    def test_disabled_always_reads_redis(self, settings, monkeypatch):
+        settings.LOCAL_CACHE = {"ENABLED": False}
+        tiered = TieredCache()
+        cache.set("k", "v")
+        reads = count_remote_reads(monkeypatch)
+
+        tiered.get("k")
+        tiered.get("k")
+
+        assert len(reads) == 2
+
+
+class TestRedisInvalidation:
+    """Test that writes in one process evict the key from another's L1."""
+
+    @pytest.fixture
+    def processes(self, settings):
+        settings.LOCAL_CACHE = {
+            "BACKEND": "apps.core.local_cache.RedisInvalidation",
+            "OPTIONS": {"url": "redis://127.0.0.1:6379/2"},
+        }
+        try:
+            client = RedisInvalidation(**settings.LOCAL_CACHE["OPTIONS"]).client
+            listeners = client.pubsub_numsub("cache:l1:invalidate")[0][1]
+        except Exception:
+            pytest.skip("Redis is not available")
+        first, second = TieredCache(), TieredCache()
+        # Let both listeners subscribe before anything is published
+        wait_for(
+            lambda: client.pubsub_numsub("cache:l1:invalidate")[0][1] >= listeners + 2
+        )
+        return first, second
+
+    def test_set_evicts_other_process(self, processes):
+        first, second = processes
+        cache.set("k", "old")
+        assert second.get("k") == "old"
+
+        first.set("k", "new", 60)
+
+        assert wait_for(lambda: second.local.get("k") is MISSING)
+        assert second.get("k") == "new"
+
+    def test_own_messages_are_ignored(self, processes):
+        first, _ = processes
+        first.set("k", "v", 60)
+        time.sleep(0.1)
+        assert first.local.get("k") == "v"
+
+    def test_publish_failure_does_not_raise(self):
+        backend = RedisInvalidation(url="redis://127.0.0.1:1/0")
+        # Other processes fall back to the L1 TTL
+        backend.publish(["k"])
+
+
+class TestStats:
+    """Test the per-tier hit counters."""
+
+    def test_counts_each_tier(self):
+        reset_stats()
+        cache.set("k", "v")
+        tiered = get_tiered_cache()
+        tiered.get("k")
+        tiered.get("k")
+        tiered.get("missing")
+
+        stats = get_stats()
+
+        assert stats["l1"] == {"hits": 1, "misses": 2, "hit_ratio": 0.3333}
+        assert stats["l2"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+    def test_counts_flushed_periodically(self, settings):
+        settings.LOCAL_CACHE = {"STATS_FLUSH_INTERVAL": 0}
+        reset_stats()
+        tiered = get_tiered_cache()
+        tiered.get("missing")
+        assert cache.get(local_cache.STATS_PREFIX + "l1_misses") == 1
+
+
+@pytest.mark.django_db
+class TestCacheStatsEndpoint:
+    """Test the staff-only tier stats endpoint."""
+
+    def test_staff_can_read_stats(self, api_client, user):
+        user.is_staff = True
+        user.save()
+        response = api_client.get(reverse("task-cache-stats"))
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data["l1"]) == {"hits", "misses", "hit_ratio"}
+
+    def test_regular_user_is_forbidden(self, api_client):
+        response = api_client.get(reverse("task-cache-stats"))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
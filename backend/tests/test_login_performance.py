@@ -0,0 +1,121 @@
+"""Tests for the login hot path: queries per login and deferred last_login."""
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.core.signal_events import get_signal_event_queue, reset_signal_event_queue
+from apps.users.selectors import get_user_row
+from apps.users.views import LoginView
+
+LOGIN_URL = "/api/auth/login/"
+
+
+@pytest.fixture(autouse=True)
+def fast_login(settings, monkeypatch):
+    # Fast hashing, so the tests exercise everything around it. For timings
+    # against a real server, see ``manage.py login_benchmark``
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    monkeypatch.setattr(LoginView, "throttle_classes", [])
+    reset_signal_event_queue()
+    yield
+    reset_signal_event_queue()
+
+
+@pytest.fixture
+def login_user(db):
+    user = User.objects.create_user(username="loginuser", password="pass")
+    user.last_login = timezone.now()
+    user.save(update_fields=["last_login"])
+    return user
+
+
+def login(client, password="pass"):
+    return client.post(
+        LOGIN_URL,
+        {"username": "loginuser", "password": password},
+        content_type="application/json",
+    )
+
+
+@pytest.mark.django_db
+class TestLoginQueries:
+    """Test that a login only touches the database where it has to."""
+
+    def test_two_queries_per_login(self, client, login_user):
+        logins = 50
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(logins):
+                assert login(client).status_code == 200
+
+        # SELECT the user, INSERT the outstanding refresh token
+        assert len(queries) == 2 * logins
+
+    def test_response_has_tokens(self, client, login_user):
+        data = login(client).json()
+        assert set(data) >= {"access", "refresh"}
+
+    def test_failed_login_is_rejected_and_recorded(self, client, login_user):
+        response = login(client, password="wrong")
+
+        assert response.status_code == 401
+        (failed,) = get_signal_event_queue().get_all_events()
+        assert failed["signal_type"] == "user_login_failed"
+
+    def test_login_event_still_recorded(self, client, login_user):
+        login(client)
+
+        (logged_in,) = get_signal_event_queue().get_all_events()
+        assert logged_in["signal_type"] == "user_logged_in"
+        assert logged_in["data"]["user_id"] == login_user.pk
+
+
+@pytest.mark.django_db
+class TestDeferredLastLogin:
+    """Test that last_login is written at most once per interval."""
+
+    def test_stale_last_login_is_written(self, client, login_user):
+        stale = timezone.now() - timedelta(hours=1)
+        User.objects.filter(pk=login_user.pk).update(last_login=stale)
+
+        login(client)
+
+        login_user.refresh_from_db()
+        assert login_user.last_login > stale
+
+    def test_first_login_is_written(self, client, login_user):
+        User.objects.filter(pk=login_user.pk).update(last_login=None)
+
+        login(client)
+
+        login_user.refresh_from_db()
+        assert login_user.last_login is not None
+
+    def test_recent_last_login_is_kept(self, client, login_user):
+        recent = login_user.last_login
+
+        login(client)
+
+        login_user.refresh_from_db()
+        assert login_user.last_login == recent
+
+    def test_write_drops_the_cached_row(self, client, login_user):
+        stale = timezone.now() - timedelta(hours=1)
+        User.objects.filter(pk=login_user.pk).update(last_login=stale)
+        assert get_user_row(user_id=login_user.pk)["last_login"] == stale
+
+        login(client)
+
+        assert get_user_row(user_id=login_user.pk)["last_login"] > stale
+
+    def test_interval_setting(self, settings, client, login_user):
+        settings.LAST_LOGIN = {"INTERVAL": 0}
+        recent = login_user.last_login
+
+        login(client)
+
+        login_user.refresh_from_db()
+        assert login_user.last_login > recent
@@ -0,0 +1,222 @@
+"""Tests for the per-model rate limiter and task backpressure."""
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from celery.exceptions import Retry
+from openai import RateLimitError
+
+from apps.agents.models import Agent
+from apps.tasks.models import AgentTask
+from apps.tasks.tasks import run_agent_task_async
+from utils import openai_client
+from utils.rate_limiter import (
+    InMemoryRateLimiter,
+    RateLimited,
+    RedisRateLimiter,
+    get_rate_limiter,
+    reset_rate_limiter,
+)
+
+
+@pytest.fixture(autouse=True)
+def limiter(settings):
+    settings.COMPLETION_CACHE = {"ENABLED": False}
+    reset_rate_limiter()
+    yield get_rate_limiter()
+    reset_rate_limiter()
+
+
+@pytest.fixture
+def redis_limiter():
+    limiter = RedisRateLimiter(url="redis://127.0.0.1:6379/2")
+    limiter.client.flushdb()
+    yield limiter
+    limiter.client.flushdb()
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        return InMemoryRateLimiter()
+    return request.getfixturevalue("redis_limiter")
+
+
+@pytest.fixture
+def limits(settings):
+    def configure(rpm=1000, tpm=1_000_000):
+        settings.LLM_RATE_LIMITS = {
+            "LIMITS": {
+                "default": {"REQUESTS_PER_MINUTE": rpm, "TOKENS_PER_MINUTE": tpm}
+            },
+            "RETRY_JITTER": 0,
+        }
+
+    return configure
+
+
+class FakeCompletions:
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        message = SimpleNamespace(content="ok")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    completions = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(openai_client, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(openai_client, "_get_client", lambda: client)
+    return completions
+
+
+def provider_429(retry_after="7"):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(
+        429, headers={"retry-after": retry_after}, request=request
+    )
+    return RateLimitError("Rate limit reached", response=response, body=None)
+
+
+agent = SimpleNamespace(description="", model="gpt-4o-mini", temperature=0.7)
+
+
+class TestTokenBuckets:
+    """Test the bucket arithmetic on both backends."""
+
+    def test_requests_per_minute(self, backend, limits):
+        limits(rpm=2)
+        assert backend.acquire("gpt-4o-mini", 10) == 0
+        assert backend.acquire("gpt-4o-mini", 10) == 0
+        # One request refills every 30s
+        assert backend.acquire("gpt-4o-mini", 10) == pytest.approx(30, abs=0.5)
+
+    def test_tokens_per_minute(self, backend, limits):
+        limits(tpm=1000)
+        assert backend.acquire("gpt-4o-mini", 800) == 0
+        # 200 left, 400 needed: 200 tokens take 12s to refill
+        assert backend.acquire("gpt-4o-mini", 400) == pytest.approx(12, abs=0.5)
+
+    def test_refused_call_reserves_nothing(self, backend, limits):
+        limits(tpm=1000)
+        backend.acquire("gpt-4o-mini", 900)
+        backend.acquire("gpt-4o-mini", 500)
+        assert backend.acquire("gpt-4o-mini", 100) == 0
+
+    def test_models_have_separate_buckets(self, backend, limits):
+        limits(rpm=1)
+        assert backend.acquire("gpt-4o-mini", 1) == 0
+        assert backend.acquire("gpt-4o", 1) == 0
+        assert backend.acquire("gpt-4o", 1) > 0
+
+    def test_bucket_refills_over_time(self, limits, monkeypatch):
+        limits(rpm=60)
+        clock = {"now": 100.0}
+        monkeypatch.setattr("utils.rate_limiter.time.monotonic", lambda: clock["now"])
+        backend = InMemoryRateLimiter()
+        for _ in range(60):
+            backend.acquire("gpt-4o-mini", 1)
+        assert backend.acquire("gpt-4o-mini", 1) == pytest.approx(1)
+        clock["now"] += 1
+        assert backend.acquire("gpt-4o-mini", 1) == 0
+
+
+class TestClientBackpressure:
+    """Test that the client raises instead of returning error strings."""
+
+    def test_over_limit_call_is_not_sent(self, completions, limits):
+        limits(rpm=1)
+        assert openai_client.run_agent_sync(agent, "hi") == "ok"
+        with pytest.raises(RateLimited) as exc:
+            openai_client.run_agent_sync(agent, "hi")
+        assert completions.calls == 1
+        assert not exc.value.throttled
+
+    def test_provider_429_is_raised_with_retry_after(self, completions):
+        completions.error = provider_429("7")
+        with pytest.raises(RateLimited) as exc:
+            openai_client.run_agent_sync(agent, "hi")
+        assert exc.value.retry_after == 7
+        assert exc.value.throttled
+
+    def test_provider_429_while_streaming(self, completions):
+        completions.error = provider_429("3")
+        with pytest.raises(RateLimited):
+            list(openai_client.stream_agent_sync(agent, "hi"))
+
+    def test_other_errors_still_become_error_output(self, completions):
+        completions.error = RuntimeError("boom")
+        assert openai_client.run_agent_sync(agent, "hi").startswith("[Error]")
+
+
+@pytest.mark.django_db
+class TestTaskRequeue:
+    """Test that rate-limited tasks are delayed, not completed with garbage."""
+
+    @pytest.fixture
+    def task(self, user):
+        db_agent = Agent.objects.create(owner=user, name="Limited")
+        return AgentTask.objects.create(agent=db_agent, owner=user, input_text="Hi")
+
+    @pytest.fixture
+    def retries(self, monkeypatch):
+        calls = []
+
+        def fake_retry(**kwargs):
+            calls.append(kwargs)
+            return Retry()
+
+        monkeypatch.setattr(run_agent_task_async, "retry", fake_retry)
+        return calls
+
+    def test_limited_task_is_requeued_as_pending(
+        self, task, retries, limiter, monkeypatch
+    ):
+        def limited(agent, prompt):
+            raise RateLimited("gpt-4o-mini", 4.0, throttled=True)
+
+        monkeypatch.setattr("apps.tasks.tasks.run_agent_sync", limited)
+
+        run_agent_task_async.apply(args=[task.id])
+
+        task.refresh_from_db()
+        assert task.status == AgentTask.STATUS_PENDING
+        assert task.started_at is None
+        assert not task.output_text
+        assert 4.0 <= retries[0]["countdown"] <= 4.4
+        stats = limiter.get_stats()["gpt-4o-mini"]
+        assert stats["delayed"] == 1
+        assert stats["throttled"] == 1
+        assert stats["wait_seconds"] == retries[0]["countdown"]
+
+    def test_task_fails_after_max_retries(self, task, retries, settings, monkeypatch):
+        settings.LLM_RATE_LIMITS = {"MAX_RETRIES": 0}
+
+        def limited(agent, prompt):
+            raise RateLimited("gpt-4o-mini", 4.0)
+
+        monkeypatch.setattr("apps.tasks.tasks.run_agent_sync", limited)
+
+        run_agent_task_async.apply(args=[task.id])
+
+        task.refresh_from_db()
+        assert task.status == AgentTask.STATUS_FAILED
+        assert retries == []
+
+    def test_stats_endpoint(self, api_client, user, limiter):
+        user.is_staff = True
+        user.save()
+        limiter.record("gpt-4o", "delayed", 2)
+        limiter.record("gpt-4o", "wait_seconds", 5)
+
+        response = api_client.get("/api/tasks/rate-limit-stats/")
+
+        assert response.status_code == 200
+        assert response.data["gpt-4o"]["avg_wait_seconds"] == 2.5
@@ -0,0 +1,173 @@
+"""Tests for moving auth signal work off the request path."""
+import threading
+
+import pytest
+
+from apps.core.signal_dispatch import (
+    SignalDispatcher,
+    get_signal_dispatcher,
+    reset_signal_dispatcher,
+)
+from apps.core.signal_events import (
+    event_timestamp,
+    get_signal_event_queue,
+    reset_signal_event_queue,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_dispatch():
+    reset_signal_dispatcher()
+    reset_signal_event_queue()
+    yield
+    reset_signal_dispatcher()
+    reset_signal_event_queue()
+
+
+class Gate:
+    """Handler that holds the flusher until released."""
+
+    def __init__(self):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.entered.set()
+        self.release.wait(5)
+        return ("gate", {}, "info")
+
+
+def event(n):
+    return ("test", {"n": n}, "info")
+
+
+class TestSignalDispatcher:
+    """Test the bounded queue and its flusher thread."""
+
+    def test_handlers_run_off_the_caller_thread(self):
+        dispatcher = SignalDispatcher()
+        threads = []
+
+        def handler():
+            threads.append(threading.current_thread())
+            return event(0)
+
+        dispatcher.dispatch(handler)
+        dispatcher.flush()
+
+        assert threads and threads[0] is not threading.current_thread()
+        assert [e["data"] for e in get_signal_event_queue().get_all_events()] == [
+            {"n": 0}
+        ]
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        dispatcher = SignalDispatcher(max_pending=1)
+        gate = Gate()
+        dispatcher.dispatch(gate)
+        assert gate.entered.wait(5)
+
+        assert dispatcher.dispatch(event, 1) is True
+        assert dispatcher.dispatch(event, 2) is False
+
+        gate.release.set()
+        dispatcher.flush()
+        stats = dispatcher.get_stats()
+        assert stats["dropped"] == 1
+        assert stats["delivered"] == 2
+        assert stats["pending"] == 0
+
+    def test_waiting_calls_are_stored_in_one_batch(self, monkeypatch):
+        queue = get_signal_event_queue()
+        batches = []
+        add_events = queue.add_events
+
+        def recording_add_events(events):
+            batches.append(len(events))
+            return add_events(events)
+
+        monkeypatch.setattr(queue, "add_events", recording_add_events)
+        dispatcher = SignalDispatcher(batch_size=10)
+        gate = Gate()
+        dispatcher.dispatch(gate)
+        assert gate.entered.wait(5)
+        for n in range(5):
+            dispatcher.dispatch(event, n)
+
+        gate.release.set()
+        dispatcher.flush()
+
+        assert batches == [1, 5]
+
+    def test_failing_handler_does_not_lose_the_batch(self):
+        dispatcher = SignalDispatcher()
+
+        def broken():
+            raise RuntimeError("boom")
+
+        dispatcher.dispatch(broken)
+        dispatcher.dispatch(event, 1)
+        dispatcher.flush()
+
+        assert dispatcher.get_stats()["failed"] == 1
+        assert len(get_signal_event_queue().get_all_events()) == 1
+
+
+@pytest.mark.django_db
+class TestAuthSignals:
+    """Test that auth receivers reach the event queue through the dispatcher."""
+
+    def test_login_event(self, client, user):
+        response = client.post(
+            "/api/auth/login/",
+            {"username": "testuser", "password": "pass"},
+            content_type="application/json",
+        )
+        assert response.status_code == 200
+        get_signal_dispatcher().flush()
+
+        (logged_in,) = get_signal_event_queue().get_all_events()
+        assert logged_in["signal_type"] == "user_logged_in"
+        assert logged_in["data"]["user_id"] == user.pk
+
+    def test_failed_login_event(self, client, user):
+        client.post(
+            "/api/auth/login/",
+            {"username": "testuser", "password": "wrong"},
+            content_type="application/json",
+        )
+        get_signal_dispatcher().flush()
+
+        (failed,) = get_signal_event_queue().get_all_events()
+        assert failed["signal_type"] == "user_login_failed"
+        assert failed["level"] == "warning"
+
+    def test_timestamp_is_taken_when_the_signal_fires(self, client, user):
+        dispatcher = get_signal_dispatcher()
+        gate = Gate()
+        dispatcher.dispatch(gate)
+        assert gate.entered.wait(5)
+        before = event_timestamp()
+        client.post(
+            "/api/auth/login/",
+            {"username": "testuser", "password": "pass"},
+            content_type="application/json",
+        )
+        after = event_timestamp()
+
+        gate.release.set()
+        dispatcher.flush()
+
+        events = get_signal_event_queue().get_all_events()
+        (logged_in,) = [e for e in events if e["signal_type"] == "user_logged_in"]
+        assert before <= logged_in["timestamp"] <= after
+
+    def test_inline_when_not_async(self, settings, client, user):
+        settings.SIGNAL_DISPATCH = {"ASYNC": False}
+
+        client.post(
+            "/api/auth/login/",
+            {"username": "testuser", "password": "pass"},
+            content_type="application/json",
+        )
+
+        assert len(get_signal_event_queue().get_all_events()) == 1
@@ -0,0 +1,183 @@
+"""Tests for the signal event ring buffer and its SSE stream."""
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from apps.core import sse
+from apps.core.signal_events import (
+    RedisSignalEventQueue,
+    SignalEventQueue,
+    get_signal_event_queue,
+    reset_signal_event_queue,
+)
+
+
+@pytest.fixture
+def events():
+    return SignalEventQueue(maxlen=3)
+
+
+@pytest.fixture
+def redis_events():
+    # Exact trimming so the tests can tell which events are left
+    queue = RedisSignalEventQueue(
+        url="redis://127.0.0.1:6379/2", maxlen=3, approximate=False
+    )
+    queue.client.flushdb()
+    yield queue
+    queue.client.flushdb()
+
+
+@pytest.fixture(params=["memory", "redis"])
+def any_events(request):
+    if request.param == "memory":
+        return request.getfixturevalue("events")
+    return request.getfixturevalue("redis_events")
+
+
+def add(queue, n):
+    return [queue.add_event("test", {"n": i}) for i in range(n)]
+
+
+class TestSignalEventQueue:
+    """Test sequence-numbered reads, on every backend."""
+
+    def test_sequence_numbers_increase(self, any_events):
+        seqs = add(any_events, 2)
+        assert any_events.latest_seq == seqs[-1]
+        assert [e["seq"] for e in any_events.get_events()] == seqs
+
+    def test_reads_only_new_events(self, any_events):
+        first, second = add(any_events, 2)
+        new = any_events.get_events(since_seq=first)
+        assert [e["data"]["n"] for e in new] == [1]
+        assert any_events.get_events(since_seq=second) == []
+
+    def test_positions_survive_wraparound(self, any_events):
+        seqs = add(any_events, 2)
+        seqs += add(any_events, 2)
+
+        # Indexes into a shifting deque would skip or repeat events here
+        assert [e["seq"] for e in any_events.get_events(seqs[1])] == seqs[2:]
+        assert [e["seq"] for e in any_events.get_all_events()] == seqs[1:]
+
+    def test_dropped_events_are_skipped(self, any_events):
+        seqs = add(any_events, 5)
+        assert [e["seq"] for e in any_events.get_events(0)] == seqs[2:]
+
+    def test_clear(self, any_events):
+        add(any_events, 2)
+        any_events.clear()
+        assert any_events.get_all_events() == []
+
+    def test_wait_times_out_empty(self, any_events):
+        (seq,) = add(any_events, 1)
+        assert any_events.wait_for_events(since_seq=seq, timeout=0.01) == []
+
+    def test_wait_wakes_on_new_event(self, any_events):
+        (seq,) = add(any_events, 1)
+        timer = threading.Timer(0.05, any_events.add_event, ("test", {"n": 1}))
+        timer.start()
+        started = time.monotonic()
+
+        new = any_events.wait_for_events(since_seq=seq, timeout=5)
+
+        assert [e["data"]["n"] for e in new] == [1]
+        assert time.monotonic() - started < 1
+
+    def test_await_wakes_on_event_from_another_thread(self, any_events):
+        (seq,) = add(any_events, 1)
+
+        async def scenario():
+            threading.Timer(0.05, any_events.add_event, ("test", {"n": 1})).start()
+            return await any_events.await_events(since_seq=seq, timeout=5)
+
+        assert [e["data"]["n"] for e in asyncio.run(scenario())] == [1]
+
+    def test_await_times_out(self, any_events):
+        (seq,) = add(any_events, 1)
+        assert asyncio.run(any_events.await_events(seq, timeout=0.01)) == []
+
+
+class TestInMemoryRingBuffer:
+    """Test details of the in-process ring buffer."""
+
+    def test_sequence_counts_from_one(self, events):
+        assert add(events, 2) == [1, 2]
+
+    def test_clear_keeps_counting(self, events):
+        add(events, 2)
+        events.clear()
+        assert events.add_event("test", {}) == 3
+
+    def test_wait_after_clear_does_not_spin(self, events):
+        add(events, 2)
+        events.clear()
+        started = time.monotonic()
+        assert events.wait_for_events(since_seq=0, timeout=0.05) == []
+        assert time.monotonic() - started >= 0.05
+
+    def test_async_waiters_are_removed(self, events):
+        asyncio.run(events.await_events(timeout=0.01))
+        assert events.async_waiters == []
+
+
+class TestRedisSignalEventQueue:
+    """Test that processes share one log through Redis."""
+
+    def test_events_from_another_process_are_seen(self, redis_events):
+        other = RedisSignalEventQueue(url="redis://127.0.0.1:6379/2")
+        other.add_event("user_logged_in", {"user_id": 1})
+
+        (event,) = redis_events.get_all_events()
+
+        assert event["signal_type"] == "user_logged_in"
+        assert event["data"] == {"user_id": 1}
+
+    def test_backend_from_settings(self, settings):
+        settings.SIGNAL_EVENTS = {
+            "BACKEND": "apps.core.signal_events.RedisSignalEventQueue",
+            "OPTIONS": {"url": "redis://127.0.0.1:6379/2"},
+        }
+        reset_signal_event_queue()
+        try:
+            assert isinstance(get_signal_event_queue(), RedisSignalEventQueue)
+        finally:
+            reset_signal_event_queue()
+
+
+class TestSignalEventStream:
+    """Test the SSE generators built on the queue."""
+
+    @pytest.fixture(autouse=True)
+    def queue(self, any_events, monkeypatch):
+        monkeypatch.setattr(sse, "get_signal_event_queue", lambda: any_events)
+        monkeypatch.setattr(sse, "KEEPALIVE_INTERVAL", 0.01)
+        return any_events
+
+    def test_stream_sends_each_event_once(self, queue):
+        seqs = add(queue, 2)
+        stream = sse.signal_event_stream()
+
+        first = [json.loads(next(stream)[len("data: ") :]) for _ in range(2)]
+        assert [e["seq"] for e in first] == seqs
+        assert next(stream) == ": keepalive\n\n"
+
+        seq = queue.add_event("test", {})
+        assert json.loads(next(stream)[len("data: ") :])["seq"] == seq
+
+    def test_async_stream(self, queue):
+        async def scenario():
+            stream = sse.asignal_event_stream()
+            keepalive = await stream.__anext__()
+            seq = queue.add_event("test", {})
+            message = await stream.__anext__()
+            await stream.aclose()
+            return keepalive, message, seq
+
+        keepalive, message, seq = asyncio.run(scenario())
+        assert keepalive == ": keepalive\n\n"
+        assert json.loads(message[len("data: ") :])["seq"] == seq
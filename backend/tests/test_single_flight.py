@@ -0,0 +1,187 @@
+"""Tests for coalescing duplicate concurrent agent runs."""
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+
+from apps.agents.models import Agent
+from apps.tasks.models import AgentTask
+from apps.tasks.tasks import generate_output
+from utils.openai_client import request_key
+from apps.core.cache import acquire_lock, lock_owner
+from utils.single_flight import LOCK_PREFIX, SingleFlight
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class SlowCall:
+    """Callable that blocks until released and counts its invocations."""
+
+    def __init__(self, result="shared output", delay=0.3):
+        self.result = result
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return self.result
+
+
+def run_concurrently(*targets):
+    results = [None] * len(targets)
+
+    def runner(i, target):
+        results[i] = target()
+
+    threads = [
+        threading.Thread(target=runner, args=(i, target))
+        for i, target in enumerate(targets)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+class TestSingleFlight:
+    """Test the coalescing primitive."""
+
+    def test_concurrent_calls_in_one_process_share_one_call(self):
+        group = SingleFlight()
+        call = SlowCall()
+
+        results = run_concurrently(*[lambda: group.do("k", call)] * 5)
+
+        assert results == ["shared output"] * 5
+        assert call.calls == 1
+
+    def test_concurrent_calls_across_workers_share_one_call(self):
+        # Two registries stand in for two worker processes sharing Redis
+        workers = [SingleFlight(), SingleFlight()]
+        call = SlowCall()
+
+        results = run_concurrently(*[lambda w=w: w.do("k", call) for w in workers])
+
+        assert results == ["shared output"] * 2
+        assert call.calls == 1
+
+    def test_sequential_calls_are_not_coalesced(self):
+        group = SingleFlight()
+        call = SlowCall(delay=0)
+        group.do("k", call)
+        group.do("k", call)
+        assert call.calls == 2
+        assert lock_owner(LOCK_PREFIX + "k") is None
+
+    def test_followers_run_the_call_when_leader_fails(self):
+        group = SingleFlight()
+        call = SlowCall(delay=0)
+
+        def failing():
+            time.sleep(0.2)
+            raise RuntimeError("upstream down")
+
+        def leader():
+            try:
+                group.do("k", failing)
+            except RuntimeError:
+                return "failed"
+
+        def follower():
+            time.sleep(0.05)
+            return group.do("k", call)
+
+        assert run_concurrently(leader, follower) == ["failed", "shared output"]
+        assert call.calls == 1
+
+    def test_falls_back_to_local_coalescing_without_redis(self, monkeypatch):
+        def unavailable(*args, **kwargs):
+            raise ConnectionError("redis down")
+
+        monkeypatch.setattr("utils.single_flight.acquire_lock", unavailable)
+        group = SingleFlight()
+        call = SlowCall()
+
+        results = run_concurrently(*[lambda: group.do("k", call)] * 3)
+
+        assert results == ["shared output"] * 3
+        assert call.calls == 1
+
+    def test_leader_leaves_a_retaken_lock_alone(self, settings):
+        settings.SINGLE_FLIGHT = {"LOCK_TTL": 0.1}
+        group = SingleFlight()
+        taken = {}
+
+        def slow():
+            time.sleep(0.3)
+            # Our lock expired meanwhile and another worker took it
+            taken["token"] = acquire_lock(LOCK_PREFIX + "k", 10)
+            return "done"
+
+        group.do("k", slow)
+
+        assert taken["token"] is not None
+        assert lock_owner(LOCK_PREFIX + "k") == taken["token"]
+
+    def test_disabled_setting_runs_every_call(self, settings):
+        settings.SINGLE_FLIGHT = {"ENABLED": False}
+        group = SingleFlight()
+        call = SlowCall(delay=0.1)
+        run_concurrently(*[lambda: group.do("k", call)] * 3)
+        assert call.calls == 3
+
+
+@pytest.mark.django_db
+class TestCoalescedTaskRuns:
+    """Test that duplicate task runs share one model call."""
+
+    def test_duplicate_runs_get_the_same_output(self, user, monkeypatch):
+        call = SlowCall(result="one answer")
+        monkeypatch.setattr("apps.tasks.tasks.run_agent_sync", call)
+        agent = Agent.objects.create(owner=user, name="Dup")
+        tasks = [
+            AgentTask.objects.create(agent=agent, owner=user, input_text="Same")
+            for _ in range(2)
+        ]
+
+        outputs = run_concurrently(*[lambda t=t: generate_output(t) for t in tasks])
+
+        assert call.calls == 1
+        assert outputs == ["one answer"] * 2
+
+    def test_follower_output_is_written_to_its_row(self, user, settings, monkeypatch):
+        settings.AGENT_STREAMING = {"ENABLED": True}
+        agent = Agent.objects.create(owner=user, name="Dup")
+        task = AgentTask.objects.create(agent=agent, owner=user, input_text="Same")
+        group = SingleFlight()
+        monkeypatch.setattr("apps.tasks.tasks.get_single_flight", lambda: group)
+        # Another run of the same request is already in flight
+        leader = group.begin(request_key(agent, "Same"))
+        threading.Timer(0.1, leader.finish, args=["leader output"]).start()
+
+        assert generate_output(task) == "leader output"
+        task.refresh_from_db()
+        assert task.output_text == "leader output"
+
+    def test_different_prompts_are_not_coalesced(self, user, monkeypatch):
+        call = SlowCall()
+        monkeypatch.setattr("apps.tasks.tasks.run_agent_sync", call)
+        agent = Agent.objects.create(owner=user, name="Dup")
+        tasks = [
+            AgentTask.objects.create(agent=agent, owner=user, input_text=text)
+            for text in ("one", "two")
+        ]
+
+        run_concurrently(*[lambda t=t: generate_output(t) for t in tasks])
+
+        assert call.calls == 2
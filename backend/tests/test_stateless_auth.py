@@ -0,0 +1,132 @@
+"""Tests for authenticating API requests from the cached user row."""
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.agents.models import Agent
+from apps.tasks.models import AgentTask
+from apps.users.selectors import forget_user_row, get_user_row
+
+
+def bearer_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+@pytest.fixture
+def jwt_client(user):
+    return bearer_client(AccessToken.for_user(user))
+
+
+def user_queries(queries):
+    return [q["sql"] for q in queries if 'FROM "auth_user"' in q["sql"]]
+
+
+@pytest.mark.django_db
+class TestUserRowCache:
+    """Test the per-process cache of user rows."""
+
+    def test_rows_are_cached_per_process(self, user):
+        get_user_row(user_id=user.pk)
+        with CaptureQueriesContext(connection) as queries:
+            assert get_user_row(user_id=user.pk)["username"] == "testuser"
+        assert len(queries) == 0
+
+    def test_saving_a_user_drops_its_cached_row(self, user):
+        get_user_row(user_id=user.pk)
+        user.email = "new@t.com"
+        user.save()
+        assert get_user_row(user_id=user.pk)["email"] == "new@t.com"
+
+    def test_deleting_a_user_drops_its_cached_row(self, user):
+        pk = user.pk
+        get_user_row(user_id=pk)
+        user.delete()
+        assert get_user_row(user_id=pk) is None
+
+
+@pytest.mark.django_db
+class TestStatelessJWTAuthentication:
+    """Test that API requests read the user from the row cache."""
+
+    def test_first_request_reads_the_row_once(self, jwt_client, user):
+        with CaptureQueriesContext(connection) as queries:
+            assert jwt_client.get("/api/auth/profile/").status_code == 200
+            assert jwt_client.get("/api/tasks/").status_code == 200
+        assert len(user_queries(queries)) == 1
+
+    def test_task_list_does_not_query_users(self, jwt_client, user):
+        agent = Agent.objects.create(owner=user, name="A")
+        AgentTask.objects.create(agent=agent, owner=user, input_text="1")
+        jwt_client.get("/api/tasks/")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = jwt_client.get("/api/tasks/")
+
+        assert response.status_code == 200
+        assert len(response.json()["results"]) == 1
+        assert user_queries(queries) == []
+
+    def test_agent_list_does_not_query_users(self, jwt_client, user):
+        Agent.objects.create(owner=user, name="A")
+        jwt_client.get("/api/agents/")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = jwt_client.get("/api/agents/")
+
+        assert response.status_code == 200
+        assert user_queries(queries) == []
+
+    def test_request_user_is_fully_loaded(self, jwt_client, user):
+        jwt_client.get("/api/auth/profile/")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = jwt_client.get("/api/auth/profile/")
+
+        assert response.json()["email"] == "t@t.com"
+        assert user_queries(queries) == []
+
+    def test_other_users_objects_stay_hidden(self, jwt_client, user):
+        other = User.objects.create_user(username="other", password="pass")
+        agent = Agent.objects.create(owner=other, name="B")
+        task = AgentTask.objects.create(agent=agent, owner=other, input_text="1")
+
+        response = jwt_client.get(f"/api/tasks/{task.pk}/")
+
+        assert response.status_code in (403, 404)
+
+    def test_staff_change_is_seen_after_save(self, jwt_client, user):
+        response = jwt_client.get("/api/tasks/cache-stats/")
+        assert response.status_code == 403
+
+        user.is_staff = True
+        user.save()
+        response = jwt_client.get("/api/tasks/cache-stats/")
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize("url", ["/api/tasks/", "/api/auth/profile/"])
+    def test_deleted_user_is_rejected(self, jwt_client, user, url):
+        jwt_client.get(url)
+        user.delete()
+        response = jwt_client.get(url)
+        assert response.status_code == 401
+
+    @pytest.mark.parametrize("url", ["/api/tasks/", "/api/auth/profile/"])
+    def test_inactive_user_is_rejected(self, jwt_client, user, url):
+        jwt_client.get(url)
+        user.is_active = False
+        user.save()
+        response = jwt_client.get(url)
+        assert response.status_code == 401
+
+    def test_bulk_deactivation_needs_forget_user_row(self, jwt_client, user):
+        jwt_client.get("/api/tasks/")
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        forget_user_row(user_id=user.pk)
+
+        response = jwt_client.get("/api/tasks/")
+        assert response.status_code == 401
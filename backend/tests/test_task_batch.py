@@ -0,0 +1,149 @@
+"""Tests for POST /api/tasks/run-batch/."""
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.agents.models import Agent
+from apps.tasks.models import AgentTask
+from apps.tasks.scheduling import get_task_scheduler, reset_task_scheduler
+from apps.tasks.tasks import run_agent_task_async
+
+User = get_user_model()
+
+URL = "/api/tasks/run-batch/"
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    # Throttle counters live in the cache; batch work in the fair-share queue
+    cache.clear()
+    reset_task_scheduler()
+    yield
+    cache.clear()
+    reset_task_scheduler()
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Capture broker publishes instead of sending them."""
+    messages = []
+
+    def fake_apply_async(group, *args, **kwargs):
+        messages.extend(group.tasks)
+
+    monkeypatch.setattr("celery.canvas.group.apply_async", fake_apply_async)
+    monkeypatch.setattr(
+        "apps.tasks.tasks.run_agent_task_async.delay",
+        lambda task_id: messages.append(task_id),
+    )
+    return messages
+
+
+@pytest.fixture
+def agent(user):
+    return Agent.objects.create(owner=user, name="BatchAgent")
+
+
+def items(agent, count):
+    return [{"agent": agent.id, "input_text": f"prompt {i}"} for i in range(count)]
+
+
+@pytest.mark.django_db
+class TestRunBatchEndpoint:
+    """Test bulk task submission."""
+
+    def test_creates_tasks_and_returns_ids(self, api_client, agent, published):
+        response = api_client.post(URL, {"items": items(agent, 5)}, format="json")
+
+        assert response.status_code == 201
+        ids = response.data["ids"]
+        assert response.data["count"] == 5
+        tasks = AgentTask.objects.filter(id__in=ids)
+        assert tasks.count() == 5
+        assert set(tasks.values_list("status", flat=True)) == {"pending"}
+        assert set(tasks.values_list("owner", flat=True)) == {agent.owner_id}
+
+    def test_messages_are_published_in_chunks(
+        self, api_client, agent, published, settings
+    ):
+        settings.TASK_SCHEDULER = {"CHUNK_SIZE": 10}
+        response = api_client.post(URL, {"items": items(agent, 25)}, format="json")
+
+        assert response.status_code == 201
+        # 25 tasks in chunks of 10 -> 3 broker messages
+        assert len(published) == 3
+        chunked_ids = [pk for chunk in published for pk in chunk.args[0]]
+        assert chunked_ids == response.data["ids"]
+
+    def test_rejects_agents_owned_by_someone_else(self, api_client, agent, published):
+        other = User.objects.create_user(username="other", password="pass")
+        foreign = Agent.objects.create(owner=other, name="Foreign")
+        payload = {"items": items(agent, 2) + items(foreign, 1)}
+
+        response = api_client.post(URL, payload, format="json")
+
+        assert response.status_code == 400
+        assert not AgentTask.objects.exists()
+        assert published == []
+
+    def test_enforces_item_cap(self, api_client, agent, published, settings):
+        settings.TASK_BATCH = {"MAX_ITEMS": 3}
+        response = api_client.post(URL, {"items": items(agent, 4)}, format="json")
+        assert response.status_code == 400
+        assert not AgentTask.objects.exists()
+
+    def test_rejects_empty_batch(self, api_client, published):
+        response = api_client.post(URL, {"items": []}, format="json")
+        assert response.status_code == 400
+
+    def test_failed_push_leaves_no_pending_tasks(
+        self, api_client, agent, published, monkeypatch
+    ):
+        def broken_push(owner_id, task_ids):
+            raise ConnectionError("redis down")
+
+        monkeypatch.setattr(get_task_scheduler(), "push", broken_push)
+        response = api_client.post(URL, {"items": items(agent, 3)}, format="json")
+
+        assert response.status_code == 500
+        assert not AgentTask.objects.exists()
+        assert agent.tasks_count == 0
+
+    def test_every_task_of_a_turn_runs(self, api_client, agent, monkeypatch):
+        monkeypatch.setattr(run_agent_task_async.app.conf, "task_always_eager", True)
+        response = api_client.post(URL, {"items": items(agent, 4)}, format="json")
+
+        statuses = AgentTask.objects.filter(id__in=response.data["ids"]).values_list(
+            "status", flat=True
+        )
+        assert list(statuses) == ["completed"] * 4
+
+
+@pytest.mark.django_db
+class TestRunBatchBenchmark:
+    """Compare database and broker work against the single-item path."""
+
+    COUNT = 100
+
+    def test_batch_does_constant_work_per_request(
+        self, api_client, agent, published, monkeypatch
+    ):
+        # 100 single-item requests would exceed the per-user rate limit
+        monkeypatch.setattr("apps.tasks.views.TaskViewSet.throttle_classes", [])
+        with CaptureQueriesContext(connection) as single:
+            for item in items(agent, self.COUNT):
+                api_client.post("/api/tasks/run/", item, format="json")
+        single_messages = len(published)
+        published.clear()
+
+        with CaptureQueriesContext(connection) as batch:
+            api_client.post(URL, {"items": items(agent, self.COUNT)}, format="json")
+
+        assert AgentTask.objects.count() == 2 * self.COUNT
+        assert single_messages == self.COUNT
+        assert len(published) == 4  # CHUNK_SIZE 25
+        # One ownership SELECT and one INSERT, independent of batch size
+        assert len(batch.captured_queries) <= 5
+        assert len(single.captured_queries) >= 2 * self.COUNT
@@ -0,0 +1,124 @@
+"""Tests for the denormalized per-agent and per-owner task counters."""
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.agents.models import Agent
+from apps.tasks.batch import create_tasks
+from apps.tasks.cache import get_cached_task_stats
+from apps.tasks.counters import get_owner_counts
+from apps.tasks.models import AgentTask, AgentTaskCounts, OwnerTaskCounts
+
+
+@pytest.fixture
+def agent(user):
+    return Agent.objects.create(owner=user, name="Counted")
+
+
+def agent_counts(agent):
+    return AgentTaskCounts.objects.get(agent=agent).as_dict()
+
+
+@pytest.mark.django_db
+class TestTaskCounters:
+    """Test that counters follow task creation, status changes and deletion."""
+
+    def test_create_counts_pending(self, user, agent):
+        AgentTask.objects.create(agent=agent, owner=user, input_text="a")
+        AgentTask.objects.create(agent=agent, owner=user, input_text="b")
+
+        assert agent_counts(agent) == {
+            "total": 2,
+            "pending": 2,
+            "running": 0,
+            "completed": 0,
+            "failed": 0,
+        }
+        assert get_owner_counts(user.pk)["pending"] == 2
+
+    def test_status_change_moves_one(self, user, agent):
+        task = AgentTask.objects.create(agent=agent, owner=user, input_text="a")
+
+        task = AgentTask.objects.get(pk=task.pk)
+        task.status = AgentTask.STATUS_RUNNING
+        task.save(update_fields=["status", "updated_at"])
+        task.status = AgentTask.STATUS_COMPLETED
+        task.save()
+
+        counts = agent_counts(agent)
+        assert counts["total"] == 1
+        assert counts["pending"] == counts["running"] == 0
+        assert counts["completed"] == 1
+
+    def test_save_without_status_change_leaves_counts(self, user, agent):
+        task = AgentTask.objects.create(agent=agent, owner=user, input_text="a")
+        with CaptureQueriesContext(connection) as ctx:
+            task.output_text = "partial"
+            task.save(update_fields=["output_text", "updated_at"])
+        assert len(ctx.captured_queries) == 1
+        assert agent_counts(agent)["pending"] == 1
+
+    def test_delete_decrements(self, user, agent):
+        task = AgentTask.objects.create(agent=agent, owner=user, input_text="a")
+        AgentTask.objects.create(agent=agent, owner=user, input_text="b")
+        task.delete()
+        assert agent_counts(agent)["total"] == 1
+        assert get_owner_counts(user.pk)["total"] == 1
+
+    def test_deleting_agent_cascades_cleanly(self, user, agent):
+        AgentTask.objects.create(agent=agent, owner=user, input_text="a")
+        agent.delete()
+        assert not AgentTaskCounts.objects.exists()
+        assert get_owner_counts(user.pk)["total"] == 0
+
+    def test_batch_insert_is_counted(self, user, agent):
+        other = Agent.objects.create(owner=user, name="Other")
+        items = [{"agent": agent.pk, "input_text": str(i)} for i in range(3)]
+        items.append({"agent": other.pk, "input_text": "x"})
+
+        create_tasks(user, items)
+
+        assert agent_counts(agent)["pending"] == 3
+        assert agent_counts(other)["pending"] == 1
+        assert get_owner_counts(user.pk)["pending"] == 4
+
+    def test_rebuild_command_repairs_drift(self, user, agent):
+        AgentTask.objects.create(agent=agent, owner=user, input_text="a")
+        AgentTask.objects.create(agent=agent, owner=user, input_text="b")
+        # QuerySet.update() bypasses the signals
+        AgentTask.objects.update(status=AgentTask.STATUS_FAILED)
+        OwnerTaskCounts.objects.all().delete()
+
+        call_command("rebuild_task_counters", stdout=StringIO())
+
+        assert agent_counts(agent)["failed"] == 2
+        assert agent_counts(agent)["pending"] == 0
+        assert get_owner_counts(user.pk)["failed"] == 2
+
+    def test_task_stats_do_not_scan_tasks(self, user, agent):
+        cache.clear()
+        AgentTask.objects.create(agent=agent, owner=user, input_text="a")
+
+        with CaptureQueriesContext(connection) as ctx:
+            stats = get_cached_task_stats(user.pk)
+
+        assert stats["total"] == 1
+        assert len(ctx.captured_queries) == 1
+        assert 'tasks_agenttask"' not in ctx.captured_queries[0]["sql"]
+        cache.clear()
+
+    def test_agent_list_reads_counter(self, api_client, user, agent):
+        for i in range(4):
+            AgentTask.objects.create(agent=agent, owner=user, input_text=str(i))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get("/api/agents/?recent_tasks=0")
+
+        assert response.data["results"][0]["tasks_count"] == 4
+        assert not any(
+            'COUNT("tasks_agenttask"' in q["sql"] for q in ctx.captured_queries
+        )
@@ -0,0 +1,301 @@
+"""Tests for the task event bus and the owner-scoped task stream."""
+import asyncio
+import json
+import threading
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import AsyncRequestFactory, RequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.agents.models import Agent
+from apps.tasks.events import (
+    InMemoryTaskEventBus,
+    RedisTaskEventBus,
+    get_task_event_bus,
+    reset_task_event_bus,
+)
+from apps.tasks.models import AgentTask
+from apps.core.sse import event_stream_response
+from apps.tasks.sse import atask_event_stream, task_event_stream, task_stream_view
+from apps.tasks.tasks import run_agent_task_async
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def event_bus():
+    """Give every test a fresh in-process bus."""
+    reset_task_event_bus()
+    yield get_task_event_bus()
+    reset_task_event_bus()
+
+
+class TestInMemoryTaskEventBus:
+    """Test the in-process stand-in backend."""
+
+    def test_publish_reaches_subscriber(self):
+        bus = InMemoryTaskEventBus()
+        subscription = bus.subscribe(1)
+        bus.publish(1, {"id": 10})
+        assert subscription.get(timeout=0.1) == {"id": 10, "event_id": 1}
+
+    def test_events_are_scoped_to_owner(self):
+        bus = InMemoryTaskEventBus()
+        mine = bus.subscribe(1)
+        theirs = bus.subscribe(2)
+        bus.publish(1, {"id": 10})
+        assert mine.get(timeout=0.1) == {"id": 10, "event_id": 1}
+        assert theirs.get(timeout=0.1) is None
+
+    def test_close_unsubscribes(self):
+        bus = InMemoryTaskEventBus()
+        subscription = bus.subscribe(1)
+        subscription.close()
+        bus.publish(1, {"id": 10})
+        assert subscription.get(timeout=0.1) is None
+        assert 1 not in bus.subscribers
+
+    def test_slow_subscriber_drops_instead_of_blocking(self):
+        bus = InMemoryTaskEventBus(max_pending=1)
+        subscription = bus.subscribe(1)
+        bus.publish(1, {"id": 1})
+        bus.publish(1, {"id": 2})
+        assert subscription.get(timeout=0.1)["id"] == 1
+        assert subscription.get(timeout=0.1) is None
+
+
+@pytest.mark.django_db
+class TestTaskEventPublishing:
+    """Test that task transitions are published once to the owner."""
+
+    def test_worker_publishes_running_and_completed(self, user, event_bus, monkeypatch):
+        agent = Agent.objects.create(owner=user, name="EventAgent")
+        task = AgentTask.objects.create(agent=agent, owner=user, input_text="hi")
+        monkeypatch.setattr(
+            "apps.tasks.tasks.run_agent_sync", lambda *args, **kwargs: "done"
+        )
+        subscription = event_bus.subscribe(user.id)
+
+        run_agent_task_async(task.id)
+
+        statuses = [subscription.get(timeout=0.1)["status"] for _ in range(2)]
+        assert statuses == ["running", "completed"]
+        assert subscription.get(timeout=0.1) is None
+
+    def test_run_endpoint_publishes_pending(
+        self, api_client, user, event_bus, monkeypatch
+    ):
+        agent = Agent.objects.create(owner=user, name="EventAgent")
+        monkeypatch.setattr(
+            "apps.tasks.views.run_agent_task_async.delay", lambda task_id: None
+        )
+        subscription = event_bus.subscribe(user.id)
+
+        response = api_client.post(
+            "/api/tasks/run/", {"agent": agent.id, "input_text": "Hello"}
+        )
+
+        assert response.status_code == 201
+        event = subscription.get(timeout=0.1)
+        assert event["id"] == response.json()["id"]
+        assert event["status"] == "pending"
+
+    def test_stream_only_yields_own_tasks(self, user, event_bus, monkeypatch):
+        other = User.objects.create_user(username="other", password="pass")
+        monkeypatch.setattr("apps.tasks.sse.KEEPALIVE_INTERVAL", 0.05)
+        stream = task_event_stream(user.id)
+
+        # Prime the generator so it subscribes, then publish for both owners
+        assert next(stream) == ": keepalive\n\n"
+        event_bus.publish(other.id, {"id": 1})
+        event_bus.publish(user.id, {"id": 2})
+        chunk = next(stream)
+        stream.close()
+
+        assert chunk == f'id: 1\ndata: {json.dumps({"id": 2, "event_id": 1})}\n\n'
+        assert event_bus.subscribers == {}
+
+    def test_stream_requires_authentication(self, client):
+        response = client.get("/stream/tasks/")
+        assert response.status_code == 401
+
+    def test_stream_accepts_query_token(self, client, user):
+        token = RefreshToken.for_user(user).access_token
+        response = client.get(f"/stream/tasks/?token={token}")
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/event-stream"
+        response.close()
+
+
+class TestReplayBuffer:
+    """Test Last-Event-ID resumption."""
+
+    def test_event_ids_increase_per_owner(self):
+        bus = InMemoryTaskEventBus()
+        assert [bus.publish(1, {}) for _ in range(3)] == [1, 2, 3]
+        assert bus.publish(2, {}) == 1
+
+    def test_replay_returns_only_missed_events(self):
+        bus = InMemoryTaskEventBus()
+        for task_id in range(5):
+            bus.publish(1, {"id": task_id})
+        replayed = bus.replay(1, last_event_id=3)
+        assert [event["event_id"] for event in replayed] == [4, 5]
+        assert bus.replay(1, last_event_id=5) == []
+
+    def test_replay_signals_reset_when_gap_left_buffer(self):
+        bus = InMemoryTaskEventBus(replay_size=2)
+        for task_id in range(5):
+            bus.publish(1, {"id": task_id})
+        assert bus.replay(1, last_event_id=2) is None
+        assert [event["event_id"] for event in bus.replay(1, last_event_id=3)] == [
+            4,
+            5,
+        ]
+
+    def test_replay_signals_reset_for_id_from_before_restart(self):
+        bus = InMemoryTaskEventBus()
+        bus.publish(1, {})
+        assert bus.replay(1, last_event_id=50) is None
+
+    def test_stream_resumes_after_last_event_id(self, event_bus, monkeypatch):
+        monkeypatch.setattr("apps.tasks.sse.KEEPALIVE_INTERVAL", 0.05)
+        for task_id in range(3):
+            event_bus.publish(1, {"id": task_id})
+
+        stream = task_event_stream(1, last_event_id=1)
+        chunks = [next(stream), next(stream)]
+        event_bus.publish(1, {"id": 3})
+        chunks.append(next(stream))
+        stream.close()
+
+        assert [chunk.split("\n")[0] for chunk in chunks] == [
+            "id: 2",
+            "id: 3",
+            "id: 4",
+        ]
+
+    def test_stream_sends_reset_when_buffer_cannot_cover_gap(self, event_bus):
+        event_bus.publish(1, {"id": 1})
+        stream = task_event_stream(1, last_event_id=99)
+        assert next(stream) == "event: reset\ndata: {}\n\n"
+        stream.close()
+
+    def test_view_reads_last_event_id_header(self, user, event_bus, monkeypatch):
+        captured = {}
+
+        def fake_stream(owner_id, last_event_id=None):
+            captured["last_event_id"] = last_event_id
+            yield ""
+
+        monkeypatch.setattr("apps.tasks.sse.task_event_stream", fake_stream)
+        request = RequestFactory().get("/stream/tasks/", HTTP_LAST_EVENT_ID="42")
+        request.user = user
+
+        response = task_stream_view(request)
+        list(response.streaming_content)
+
+        assert captured["last_event_id"] == 42
+
+
+class TestRedisTaskEventBus:
+    """Test numbering and replay on the Redis backend."""
+
+    @pytest.fixture
+    def redis_bus(self):
+        bus = RedisTaskEventBus(url="redis://127.0.0.1:6379/2", replay_size=3)
+        bus.client.flushdb()
+        yield bus
+        bus.client.flushdb()
+
+    def test_payload_carries_event_id(self, redis_bus):
+        assert redis_bus.publish(1, {"id": 7, "status": "running"}) == 1
+        assert redis_bus.publish(1, {}) == 2
+
+        assert redis_bus.replay(1, last_event_id=0) == [
+            {"id": 7, "status": "running", "event_id": 1},
+            {"event_id": 2},
+        ]
+
+    def test_concurrent_publishers_deliver_ids_in_order(self, redis_bus):
+        pubsub = redis_bus.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(redis_bus.channel(1))
+        pubsub.get_message(timeout=1)  # wait for the subscription
+
+        def publish_many():
+            for n in range(25):
+                redis_bus.publish(1, {"n": n})
+
+        threads = [threading.Thread(target=publish_many) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        received = []
+        while len(received) < 100:
+            message = pubsub.get_message(timeout=5)
+            if message is None:
+                break
+            received.append(json.loads(message["data"])["event_id"])
+        pubsub.close()
+        assert received == list(range(1, 101))
+
+    def test_replay_buffer_is_trimmed(self, redis_bus):
+        for n in range(5):
+            redis_bus.publish(1, {"n": n})
+        assert redis_bus.replay(1, last_event_id=1) is None
+        assert [e["event_id"] for e in redis_bus.replay(1, last_event_id=2)] == [
+            3,
+            4,
+            5,
+        ]
+
+
+class TestAsyncTaskStream:
+    """Test the ASGI stream path."""
+
+    def test_many_idle_streams_share_one_event_loop(self, event_bus):
+        async def scenario():
+            streams = [atask_event_stream(1) for _ in range(2000)]
+            pending = [asyncio.ensure_future(anext(stream)) for stream in streams]
+            while len(event_bus.subscribers.get(1, ())) < len(streams):
+                await asyncio.sleep(0.01)
+
+            event_bus.publish(1, {"id": 7})
+            chunks = await asyncio.gather(*pending)
+            for stream in streams:
+                await stream.aclose()
+            return chunks
+
+        chunks = asyncio.run(scenario())
+
+        assert len(chunks) == 2000
+        assert set(chunks) == {'id: 1\ndata: {"id": 7, "event_id": 1}\n\n'}
+        assert event_bus.subscribers == {}
+
+    def test_async_stream_sends_keepalive(self, event_bus, monkeypatch):
+        monkeypatch.setattr("apps.tasks.sse.KEEPALIVE_INTERVAL", 0.01)
+
+        async def scenario():
+            stream = atask_event_stream(1)
+            chunk = await anext(stream)
+            await stream.aclose()
+            return chunk
+
+        assert asyncio.run(scenario()) == ": keepalive\n\n"
+
+    def test_response_uses_async_stream_under_asgi(self):
+        request = AsyncRequestFactory().get("/stream/tasks/")
+        response = event_stream_response(
+            request, task_event_stream, atask_event_stream, 1
+        )
+        assert response.is_async
+
+    def test_response_uses_sync_stream_under_wsgi(self):
+        request = RequestFactory().get("/stream/tasks/")
+        response = event_stream_response(
+            request, task_event_stream, atask_event_stream, 1
+        )
+        assert not response.is_async
@@ -0,0 +1,79 @@
+"""EXPLAIN checks that the AgentTask access paths stay on their indexes."""
+from contextlib import contextmanager
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from apps.agents.models import Agent
+from apps.tasks.models import AgentTask
+
+
+@contextmanager
+def planner():
+    """On PostgreSQL, stop tiny test tables from making a Seq Scan cheapest."""
+    if connection.vendor != "postgresql":
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SET enable_seqscan = off")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = on")
+
+
+def assert_uses_index(queryset, index_name):
+    with planner():
+        plan = queryset.explain()
+    if connection.vendor == "postgresql":
+        assert "Seq Scan on tasks_agenttask" not in plan, plan
+    else:
+        scans = [
+            line
+            for line in plan.splitlines()
+            if "SCAN tasks_agenttask" in line and "USING" not in line
+        ]
+        assert not scans, plan
+    assert index_name in plan, plan
+
+
+@pytest.fixture
+def agent(user):
+    agent = Agent.objects.create(owner=user, name="Indexed")
+    AgentTask.objects.create(agent=agent, owner=user, input_text="hi")
+    return agent
+
+
+@pytest.mark.django_db
+class TestTaskIndexes:
+    """Test that each query path is answered from its index, not a table scan."""
+
+    def test_owner_task_list(self, user, agent):
+        qs = AgentTask.objects.select_related("agent").filter(owner=user)
+        assert_uses_index(qs, "task_owner_created_idx")
+
+    def test_owner_task_list_by_status(self, user, agent):
+        qs = AgentTask.objects.filter(owner=user, status=AgentTask.STATUS_PENDING)
+        assert_uses_index(qs, "task_owner_status_idx")
+
+    def test_owner_task_list_by_created_range(self, user, agent):
+        since = timezone.now() - timedelta(days=1)
+        qs = AgentTask.objects.filter(owner=user, created_at__gte=since)
+        assert_uses_index(qs, "task_owner_created_idx")
+
+    def test_recent_tasks_for_agent(self, agent):
+        qs = AgentTask.objects.filter(agent=agent).order_by("-created_at")[:10]
+        assert_uses_index(qs, "task_agent_created_idx")
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="SQLite cannot match a parameterised IN to a partial index",
+    )
+    def test_active_tasks(self, agent):
+        qs = AgentTask.objects.filter(
+            status__in=[AgentTask.STATUS_PENDING, AgentTask.STATUS_RUNNING]
+        ).order_by("created_at")
+        assert_uses_index(qs, "task_active_idx")
@@ -0,0 +1,88 @@
+"""Tests for keyset pagination of the task list."""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.agents.models import Agent
+from apps.tasks.models import AgentTask
+
+
+@pytest.fixture(autouse=True)
+def no_throttle(monkeypatch):
+    # Walking every page would eat into the 60/min user throttle of later tests
+    monkeypatch.setattr("apps.tasks.views.TaskViewSet.throttle_classes", [])
+
+
+@pytest.fixture
+def task_ids(user):
+    agent = Agent.objects.create(owner=user, name="Paged")
+    AgentTask.objects.bulk_create(
+        AgentTask(agent=agent, owner=user, input_text=str(i)) for i in range(25)
+    )
+    # Ties on created_at must still page exactly, broken by id
+    AgentTask.objects.filter(input_text__in=["3", "4", "5", "6"]).update(
+        created_at=timezone.now()
+    )
+    return list(
+        AgentTask.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+    )
+
+
+def walk(api_client, url, link):
+    ids = []
+    while url:
+        body = api_client.get(url).json()
+        ids.extend(row["id"] for row in body["results"])
+        url = body[link]
+    return ids
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Test the (created_at, id) cursor on GET /api/tasks/."""
+
+    def test_pages_cover_every_task_once(self, api_client, task_ids):
+        ids = walk(api_client, "/api/tasks/?page_size=4", "next")
+        assert ids == task_ids
+
+    def test_previous_links_walk_back(self, api_client, task_ids):
+        url = "/api/tasks/?page_size=4"
+        while True:
+            body = api_client.get(url).json()
+            if not body["next"]:
+                break
+            url = body["next"]
+        assert body["previous"]
+
+        seen = [row["id"] for row in body["results"]]
+        ids = walk(api_client, body["previous"], "previous")
+        # Pages come back newest first; stitch them back together
+        assert sorted(ids + seen, key=task_ids.index) == task_ids
+
+    def test_no_count_and_no_offset(self, api_client, task_ids):
+        first = api_client.get("/api/tasks/?page_size=5").json()
+        assert "count" not in first
+
+        with CaptureQueriesContext(connection) as ctx:
+            api_client.get(first["next"])
+
+        task_queries = [
+            q["sql"] for q in ctx.captured_queries if "tasks_agenttask" in q["sql"]
+        ]
+        assert len(task_queries) == 1
+        assert "COUNT(" not in task_queries[0]
+        assert "OFFSET" not in task_queries[0]
+
+    def test_offset_pagination_is_opt_in(self, api_client, task_ids):
+        body = api_client.get("/api/tasks/?limit=5&offset=10").json()
+        assert body["count"] == 25
+        assert [row["id"] for row in body["results"]] == task_ids[10:15]
+
+    def test_custom_ordering_uses_offset_pages(self, api_client, task_ids):
+        body = api_client.get("/api/tasks/?ordering=created_at").json()
+        assert body["count"] == 25
+
+    def test_invalid_cursor(self, api_client, task_ids):
+        response = api_client.get("/api/tasks/?cursor=bogus")
+        assert response.status_code == 404
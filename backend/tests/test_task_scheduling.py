@@ -0,0 +1,280 @@
+"""Tests for priority queues and per-owner fair-share dispatch."""
+import pytest
+from django.contrib.auth import get_user_model
+
+from apps.agents.models import Agent
+from apps.tasks.models import AgentTask
+from apps.tasks.scheduling import (
+    InMemoryFairShareQueue,
+    RedisFairShareQueue,
+    get_task_scheduler,
+    reset_task_scheduler,
+)
+from apps.tasks.tasks import dispatch_batch_tasks, run_agent_task_async
+from utils.rate_limiter import RateLimited
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def scheduler():
+    reset_task_scheduler()
+    yield get_task_scheduler()
+    reset_task_scheduler()
+
+
+@pytest.fixture
+def redis_queue():
+    queue = RedisFairShareQueue(url="redis://127.0.0.1:6379/2")
+    queue.client.flushdb()
+    yield queue
+    queue.client.flushdb()
+
+
+@pytest.fixture(params=["memory", "redis"])
+def queue(request):
+    if request.param == "memory":
+        return InMemoryFairShareQueue()
+    return request.getfixturevalue("redis_queue")
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Capture batch messages as (queue, [task ids]) instead of sending them."""
+    messages = []
+
+    def fake_apply_async(group, *args, **kwargs):
+        for signature in group.tasks:
+            messages.append((kwargs.get("queue"), signature.args[0]))
+
+    monkeypatch.setattr("celery.canvas.group.apply_async", fake_apply_async)
+    return messages
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    """Run each published message in turn, as a worker would."""
+
+    def run_messages(group, *args, **kwargs):
+        for signature in group.tasks:
+            signature.apply()
+
+    def run_message(args, **kwargs):
+        run_agent_task_async.apply(args)
+
+    monkeypatch.setattr("celery.canvas.group.apply_async", run_messages)
+    monkeypatch.setattr(run_agent_task_async, "apply_async", run_message)
+
+
+class TestFairShareQueue:
+    """Test round-robin turns on both backends."""
+
+    def test_turns_rotate_across_owners(self, queue):
+        queue.push(1, list(range(100, 110)))
+        queue.push(2, [200, 201])
+        queue.push(3, [300])
+
+        turns = queue.take(quantum=2, max_in_flight=100)
+
+        assert turns == [
+            (1, [100, 101]),
+            (2, [200, 201]),
+            (3, [300]),
+            (1, [102, 103]),
+            (1, [104, 105]),
+            (1, [106, 107]),
+            (1, [108, 109]),
+        ]
+        assert queue.depths() == {}
+
+    def test_in_flight_budget_caps_dispatch(self, queue):
+        queue.push(1, list(range(10)))
+        queue.push(2, list(range(10, 20)))
+
+        turns = queue.take(quantum=3, max_in_flight=5)
+
+        assert turns == [(1, [0, 1, 2]), (2, [10, 11])]
+        assert queue.in_flight() == 5
+        assert queue.depths() == {1: 7, 2: 8}
+
+    def test_refills_only_a_whole_chunk(self, queue):
+        queue.push(1, list(range(10)))
+        queue.take(quantum=3, max_in_flight=6)
+
+        queue.done(2)
+        assert queue.take(quantum=3, max_in_flight=6) == []
+
+        queue.done(1)
+        assert queue.take(quantum=3, max_in_flight=6) == [(1, [6, 7, 8])]
+
+    def test_rotation_continues_between_takes(self, queue):
+        queue.push(1, [1, 2])
+        queue.push(2, [3, 4])
+        assert queue.take(quantum=1, max_in_flight=1) == [(1, [1])]
+        queue.done()
+        assert queue.take(quantum=1, max_in_flight=1) == [(2, [3])]
+
+    def test_pushes_more_ids_than_lua_can_unpack(self, queue):
+        ids = list(range(1, 20_001))
+        queue.push(1, ids)
+        queue.push(2, [50_000])
+
+        turns = queue.take(quantum=20_000, max_in_flight=30_000)
+
+        assert turns == [(1, ids), (2, [50_000])]
+
+    def test_late_owner_joins_rotation(self, queue):
+        queue.push(1, list(range(10)))
+        queue.take(quantum=2, max_in_flight=2)
+        queue.push(2, [99])
+        queue.done(2)
+        assert queue.take(quantum=2, max_in_flight=5) == [
+            (1, [2, 3]),
+            (2, [99]),
+            (1, [4, 5]),
+        ]
+
+
+@pytest.mark.django_db
+class TestBatchDispatch:
+    """Test dispatch of batch tasks to the batch Celery queue."""
+
+    def make_tasks(self, owner, count):
+        agent = Agent.objects.create(owner=owner, name=f"{owner.username}-agent")
+        return [
+            AgentTask.objects.create(agent=agent, owner=owner, input_text=str(i)).pk
+            for i in range(count)
+        ]
+
+    def test_backlog_does_not_starve_other_owners(
+        self, user, scheduler, published, settings
+    ):
+        settings.TASK_SCHEDULER = {"CHUNK_SIZE": 5, "MAX_IN_FLIGHT": 20}
+        other = User.objects.create_user(username="other", password="pass")
+        heavy = self.make_tasks(user, 100)
+        light = self.make_tasks(other, 5)
+
+        scheduler.push(user.pk, heavy)
+        dispatch_batch_tasks()
+        scheduler.push(other.pk, light)
+        # Heavy owner's tasks finish a chunk at a time; the light owner gets
+        # the second free chunk instead of waiting behind 80 queued tasks
+        for _ in range(2):
+            scheduler.done(5)
+            dispatch_batch_tasks()
+
+        assert published[-1] == ("batch", light)
+        assert scheduler.depths() == {user.pk: 75}
+
+    def test_finished_batch_task_dispatches_next_turn(
+        self, user, scheduler, published, settings
+    ):
+        settings.TASK_SCHEDULER = {"CHUNK_SIZE": 1, "MAX_IN_FLIGHT": 1}
+        ids = self.make_tasks(user, 3)
+        scheduler.push(user.pk, ids)
+        dispatch_batch_tasks()
+        assert published == [("batch", ids[:1])]
+
+        run_agent_task_async(ids[0], "batch")
+
+        assert published == [("batch", ids[:1]), ("batch", ids[1:2])]
+        assert scheduler.in_flight() == 1
+
+    def test_failed_task_does_not_strand_its_turn(
+        self, user, scheduler, worker, settings, monkeypatch
+    ):
+        settings.TASK_SCHEDULER = {"CHUNK_SIZE": 3, "MAX_IN_FLIGHT": 3}
+
+        def run(agent, prompt):
+            if prompt == "1":
+                raise RuntimeError("model error")
+            return "ok"
+
+        monkeypatch.setattr("apps.tasks.tasks.run_agent_sync", run)
+        ids = self.make_tasks(user, 3)
+        scheduler.push(user.pk, ids)
+
+        dispatch_batch_tasks()
+
+        statuses = dict(AgentTask.objects.values_list("pk", "status"))
+        assert [statuses[pk] for pk in ids] == [
+            AgentTask.STATUS_COMPLETED,
+            AgentTask.STATUS_FAILED,
+            AgentTask.STATUS_COMPLETED,
+        ]
+        assert scheduler.in_flight() == 0
+
+    def test_rate_limited_task_keeps_its_slot_until_retried(
+        self, user, scheduler, worker, settings, monkeypatch
+    ):
+        settings.TASK_SCHEDULER = {"CHUNK_SIZE": 3, "MAX_IN_FLIGHT": 3}
+        settings.LLM_RATE_LIMITS = {"MAX_RETRIES": 3, "RETRY_JITTER": 0}
+        limited = []
+
+        def run(agent, prompt):
+            if prompt == "0" and not limited:
+                limited.append(prompt)
+                raise RateLimited("gpt-4o-mini", 0.1)
+            return "ok"
+
+        monkeypatch.setattr("apps.tasks.tasks.run_agent_sync", run)
+        released = []
+        done = scheduler.done
+        monkeypatch.setattr(
+            scheduler, "done", lambda count=1: (released.append(count), done(count))
+        )
+        ids = self.make_tasks(user, 3)
+        scheduler.push(user.pk, ids)
+
+        dispatch_batch_tasks()
+
+        assert limited == ["0"]
+        assert set(AgentTask.objects.values_list("status", flat=True)) == {
+            AgentTask.STATUS_COMPLETED
+        }
+        assert len(released) == len(ids)
+        assert scheduler.in_flight() == 0
+
+    def test_interactive_run_leaves_slots_alone(self, user, scheduler, published):
+        ids = self.make_tasks(user, 1)
+        run_agent_task_async(ids[0])
+        assert scheduler.in_flight() == 0
+        assert published == []
+
+    def test_runs_inline_without_broker(self, user, scheduler, monkeypatch):
+        def unavailable(*args, **kwargs):
+            raise ConnectionError("broker down")
+
+        monkeypatch.setattr("celery.canvas.group.apply_async", unavailable)
+        ids = self.make_tasks(user, 7)
+        scheduler.push(user.pk, ids)
+
+        dispatch_batch_tasks()
+
+        statuses = AgentTask.objects.values_list("status", flat=True)
+        assert set(statuses) == {AgentTask.STATUS_COMPLETED}
+        assert scheduler.in_flight() == 0
+
+
+@pytest.mark.django_db
+class TestQueueStatsEndpoint:
+    """Test the staff-only per-owner queue depth metrics."""
+
+    def test_reports_depth_per_owner(self, api_client, user, scheduler):
+        user.is_staff = True
+        user.save()
+        scheduler.push(user.pk, [1, 2, 3])
+        scheduler.push(42, [4])
+
+        response = api_client.get("/api/tasks/queue-stats/")
+
+        assert response.status_code == 200
+        assert response.data == {
+            "in_flight": 0,
+            "queued": 4,
+            "owners": {str(user.pk): 3, "42": 1},
+        }
+
+    def test_regular_user_is_forbidden(self, api_client):
+        response = api_client.get("/api/tasks/queue-stats/")
+        assert response.status_code == 403
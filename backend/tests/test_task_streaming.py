@@ -0,0 +1,103 @@
+"""Tests for token-level streaming of agent output."""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.agents.models import Agent
+from apps.tasks.events import get_task_event_bus, reset_task_event_bus
+from apps.tasks.models import AgentTask
+from apps.tasks.sse import format_event
+from apps.tasks.streaming import TaskOutputWriter
+from apps.tasks.tasks import run_agent_task_async
+
+
+@pytest.fixture(autouse=True)
+def event_bus():
+    reset_task_event_bus()
+    yield get_task_event_bus()
+    reset_task_event_bus()
+
+
+@pytest.fixture
+def task(user):
+    agent = Agent.objects.create(owner=user, name="StreamAgent")
+    return AgentTask.objects.create(agent=agent, owner=user, input_text="Stream it")
+
+
+def count_updates(queries):
+    return sum(1 for q in queries if q["sql"].startswith("UPDATE"))
+
+
+@pytest.mark.django_db
+class TestTaskOutputWriter:
+    """Test coalescing of output writes."""
+
+    def test_first_chunk_is_flushed_immediately(self, task):
+        writer = TaskOutputWriter(task, flush_every_chunks=10, flush_interval_ms=60000)
+        writer.write("Hello")
+        task.refresh_from_db()
+        assert task.output_text == "Hello"
+
+    def test_writes_are_coalesced_by_chunk_count(self, task):
+        writer = TaskOutputWriter(task, flush_every_chunks=10, flush_interval_ms=60000)
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(100):
+                writer.write("x")
+        # One immediate flush for the first chunk, then one per 10 chunks
+        assert count_updates(ctx.captured_queries) == 10
+        task.refresh_from_db()
+        assert len(task.output_text) == 91
+
+    def test_writes_are_coalesced_by_interval(self, task, monkeypatch):
+        clock = {"now": 0.0}
+        monkeypatch.setattr("apps.tasks.streaming.time.monotonic", lambda: clock["now"])
+        writer = TaskOutputWriter(task, flush_every_chunks=1000, flush_interval_ms=500)
+        writer.write("a")
+        with CaptureQueriesContext(connection) as ctx:
+            clock["now"] = 0.2
+            writer.write("b")
+            clock["now"] = 0.6
+            writer.write("c")
+        assert count_updates(ctx.captured_queries) == 1
+
+    def test_every_chunk_is_published_as_transient_delta(self, task, event_bus):
+        subscription = event_bus.subscribe(task.owner_id)
+        writer = TaskOutputWriter(task, flush_every_chunks=10, flush_interval_ms=60000)
+        writer.write("Hel")
+        writer.write("lo")
+
+        events = [subscription.get(timeout=0.1) for _ in range(3)]
+        deltas = [e["delta"] for e in events if e.get("type") == "delta"]
+        snapshots = [e for e in events if "event_id" in e]
+        assert deltas == ["Hel", "lo"]
+        assert [e["output_text"] for e in snapshots] == ["Hel"]
+
+    def test_delta_is_sent_as_named_sse_event(self):
+        message = format_event({"type": "delta", "id": 1, "delta": "hi"})
+        assert message.startswith("event: delta\ndata: ")
+        assert "id: " not in message
+
+
+@pytest.mark.django_db
+class TestStreamingExecution:
+    """Test the Celery task in streaming mode."""
+
+    def test_streamed_run_stores_full_output(self, task, settings, monkeypatch):
+        settings.AGENT_STREAMING = {"ENABLED": True, "FLUSH_EVERY_CHUNKS": 4}
+        chunks = [f"tok{i} " for i in range(20)]
+        monkeypatch.setattr(
+            "apps.tasks.tasks.stream_agent_sync", lambda agent, prompt: iter(chunks)
+        )
+
+        run_agent_task_async(task.id)
+
+        task.refresh_from_db()
+        assert task.status == AgentTask.STATUS_COMPLETED
+        assert task.output_text == "".join(chunks)
+
+    def test_mock_stream_yields_chunks(self, task):
+        from utils.openai_client import stream_agent_sync
+
+        chunks = list(stream_agent_sync(task.agent, "Hello there"))
+        assert len(chunks) > 1
+        assert "".join(chunks).startswith("[Mock Response]")
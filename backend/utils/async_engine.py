@@ -0,0 +1,93 @@
+"""
+Process-wide asyncio engine for outbound network calls.
+
+A single event loop runs in a daemon thread per worker process. Synchronous
+callers (Celery tasks on a thread pool, views) hand it coroutines and block
+only their own thread while waiting; the actual I/O for every caller is
+multiplexed on the one loop, over one shared keep-alive connection pool.
+
+    from utils.async_engine import get_engine
+
+    output = get_engine().run(run_agent_async(agent, prompt))
+"""
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Coroutine, Iterator
+
+_DONE = object()
+
+
+class AsyncEngine:
+    """Owns one event loop running forever in a background thread."""
+
+    def __init__(self):
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.thread: threading.Thread | None = None
+        self.lock = threading.Lock()
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """Start the loop thread if needed and return the loop."""
+        with self.lock:
+            if self.loop is None or not self.thread.is_alive():
+                self.loop = asyncio.new_event_loop()
+                self.thread = threading.Thread(
+                    target=self.loop.run_forever, name="async-engine", daemon=True
+                )
+                self.thread.start()
+            return self.loop
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule ``coro`` on the engine loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self.start())
+
+    def run(self, coro: Coroutine, timeout: float | None = None) -> Any:
+        """Run ``coro`` on the engine loop and wait for its result."""
+        return self.submit(coro).result(timeout)
+
+    def iterate(self, agen: AsyncIterator) -> Iterator:
+        """
+        Consume an async iterator on the engine loop and yield its items
+        synchronously, so streamed responses can feed blocking callers.
+        """
+        items: queue.Queue = queue.Queue()
+
+        async def pump():
+            try:
+                async for item in agen:
+                    items.put(item)
+            finally:
+                items.put(_DONE)
+
+        future = self.submit(pump())
+        while True:
+            item = items.get()
+            if item is _DONE:
+                break
+            yield item
+        # Re-raise anything the iterator raised on the loop
+        future.result()
+
+    def stop(self):
+        """Stop the loop thread (used in tests and on worker shutdown)."""
+        with self.lock:
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self.thread.join(timeout=5)
+                self.loop.close()
+            self.loop = None
+            self.thread = None
+
+
+_engine: AsyncEngine | None = None
+
+
+def get_engine() -> AsyncEngine:
+    """Return the process-wide engine."""
+    global _engine
+    if _engine is None:
+        _engine = AsyncEngine()
+    return _engine
@@ -0,0 +1,103 @@
+"""
+Content-addressed cache for chat completions.
+
+Only deterministic requests are cached: agents with ``temperature == 0`` or
+with ``cache_responses`` switched on. The key is a SHA-256 of the effective
+request (model, messages, temperature, max_tokens), so any change to the
+agent's prompt or settings naturally misses. Entries live in the Django
+cache with a TTL; oversized responses are never stored.
+
+Configured by the ``COMPLETION_CACHE`` setting.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llm:completion:v1:"
+STATS_PREFIX = "llm:completion:stats:"
+STAT_NAMES = ("hits", "misses", "stores", "skipped_too_large")
+
+DEFAULTS: dict[str, Any] = {
+    "ENABLED": True,
+    "TTL": 60 * 60 * 24,  # 1 day
+    "MAX_ENTRY_BYTES": 64 * 1024,
+}
+
+
+def get_cache_setting(name: str) -> Any:
+    return getattr(settings, "COMPLETION_CACHE", {}).get(name, DEFAULTS[name])
+
+
+def key_for(agent, request_kwargs: dict[str, Any]) -> str | None:
+    """
+    Return the cache key for a completion request, or None if the request
+    is not eligible for caching.
+    """
+    if not get_cache_setting("ENABLED"):
+        return None
+    deterministic = request_kwargs.get("temperature") == 0
+    if not (deterministic or getattr(agent, "cache_responses", False)):
+        return None
+
+    return KEY_PREFIX + request_digest(request_kwargs)
+
+
+def request_digest(request_kwargs: dict[str, Any]) -> str:
+    """SHA-256 of the canonical JSON form of a completion request."""
+    canonical = json.dumps(request_kwargs, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def lookup(key: str | None) -> str | None:
+    """Look up a cached completion, counting the hit or miss."""
+    if key is None:
+        return None
+    try:
+        text = cache.get(key)
+        _count("hits" if text is not None else "misses")
+        return text
+    except Exception:
+        logger.exception("Completion cache lookup failed")
+        return None
+
+
+def store(key: str | None, text: str | None):
+    """Store a completion unless it is empty or larger than ``MAX_ENTRY_BYTES``."""
+    if key is None or not text:
+        return
+    try:
+        if len(text.encode()) > get_cache_setting("MAX_ENTRY_BYTES"):
+            _count("skipped_too_large")
+            return
+        cache.set(key, text, timeout=get_cache_setting("TTL"))
+        _count("stores")
+    except Exception:
+        logger.exception("Completion cache store failed")
+
+
+def get_stats() -> dict[str, Any]:
+    """Return hit/miss counters and the hit ratio since the counters were reset."""
+    values = cache.get_many([STATS_PREFIX + name for name in STAT_NAMES])
+    stats = {name: values.get(STATS_PREFIX + name, 0) for name in STAT_NAMES}
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def reset_stats():
+    cache.delete_many([STATS_PREFIX + name for name in STAT_NAMES])
+
+
+def _count(name: str):
+    key = STATS_PREFIX + name
+    # add() is a no-op when the counter exists, so incr() always has a key
+    cache.add(key, 0, timeout=None)
+    cache.incr(key)
@@ -1,13 +1,62 @@
 # Simple wrapper so tests can patch this easily
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+import re
+from typing import Any, AsyncIterator, Iterator
 
-from openai import OpenAI
+import httpx
+from asgiref.sync import sync_to_async
+from openai import (
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient,
+    OpenAI,
+    RateLimitError,
+)
 from django.conf import settings
 
+from utils import completion_cache, rate_limiter
+from utils.rate_limiter import RateLimited
+
 OPENAI_API_KEY = getattr(settings, "OPENAI_API_KEY", None)
 _client: OpenAI | None = None
+_async_client: AsyncOpenAI | None = None
+_async_client_loop: asyncio.AbstractEventLoop | None = None
+_model_semaphores: dict[str, asyncio.Semaphore] = {}
+
+CLIENT_DEFAULTS: dict[str, Any] = {
+    "ASYNC_ENABLED": False,
+    "MAX_CONNECTIONS": 200,
+    "MAX_KEEPALIVE_CONNECTIONS": 100,
+    "KEEPALIVE_EXPIRY": 30,
+    "TIMEOUT": 60,
+    "MAX_IN_FLIGHT_PER_MODEL": {"default": 50},
+}
+
+
+def get_client_setting(name: str) -> Any:
+    """Read a key from the ``OPENAI_CLIENT`` setting, falling back to defaults."""
+    return getattr(settings, "OPENAI_CLIENT", {}).get(name, CLIENT_DEFAULTS[name])
+
+
+def _client_kwargs() -> dict[str, Any]:
+    kwargs: dict[str, Any] = {}
+    if OPENAI_API_KEY:
+        kwargs["api_key"] = OPENAI_API_KEY
+    return kwargs
+
+
+def _http_options() -> dict[str, Any]:
+    """Connection pool and timeout options shared by the sync and async clients."""
+    return {
+        "limits": httpx.Limits(
+            max_connections=get_client_setting("MAX_CONNECTIONS"),
+            max_keepalive_connections=get_client_setting("MAX_KEEPALIVE_CONNECTIONS"),
+            keepalive_expiry=get_client_setting("KEEPALIVE_EXPIRY"),
+        ),
+        "timeout": get_client_setting("TIMEOUT"),
+    }
 
 
 def _get_client() -> OpenAI:
@@ -16,39 +65,230 @@ def _get_client() -> OpenAI:
     if _client is not None:
         return _client
 
-    kwargs: dict[str, Any] = {}
-    if OPENAI_API_KEY:
-        kwargs["api_key"] = OPENAI_API_KEY
-    _client = OpenAI(**kwargs)
+    _client = OpenAI(
+        http_client=DefaultHttpxClient(**_http_options()), **_client_kwargs()
+    )
     return _client
 
 
+def _get_async_client() -> AsyncOpenAI:
+    """
+    Return the AsyncOpenAI client for the running loop.
+    httpx async pools are bound to the loop that created them, so the client
+    is rebuilt if the engine loop was restarted.
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is not None and _async_client_loop is loop:
+        return _async_client
+
+    _async_client = AsyncOpenAI(
+        http_client=DefaultAsyncHttpxClient(**_http_options()), **_client_kwargs()
+    )
+    _async_client_loop = loop
+    _model_semaphores.clear()
+    return _async_client
+
+
+def _model_semaphore(model: str) -> asyncio.Semaphore:
+    """Bound the number of in-flight requests per model (``MAX_IN_FLIGHT_PER_MODEL``)."""
+    if model not in _model_semaphores:
+        limits = get_client_setting("MAX_IN_FLIGHT_PER_MODEL")
+        _model_semaphores[model] = asyncio.Semaphore(
+            limits.get(model, limits.get("default", 50))
+        )
+    return _model_semaphores[model]
+
+
+def _completion_kwargs(agent, prompt, max_tokens) -> dict[str, Any]:
+    """Build the chat completion arguments shared by every call path."""
+    system = agent.description or "You are an assistant."
+    return {
+        "model": getattr(agent, "model", "gpt-4o-mini"),
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": getattr(agent, "temperature", 0.7),
+        "max_tokens": max_tokens,
+    }
+
+
+def request_key(agent, prompt, max_tokens=1024) -> str:
+    """Digest identifying the completion request ``agent`` sends for ``prompt``."""
+    return completion_cache.request_digest(
+        _completion_kwargs(agent, prompt, max_tokens)
+    )
+
+
+def _reserve(kwargs):
+    """
+    Take capacity from the model's rate-limit buckets or raise
+    ``RateLimited``. Tokens are estimated at ~4 characters each for the
+    prompt, plus the ``max_tokens`` the completion may use.
+    """
+    prompt_chars = sum(len(message["content"]) for message in kwargs["messages"])
+    rate_limiter.reserve(kwargs["model"], prompt_chars // 4 + kwargs["max_tokens"])
+
+
+async def _areserve(kwargs):
+    await sync_to_async(_reserve, thread_sensitive=False)(kwargs)
+
+
+def _throttled(model, error: RateLimitError) -> RateLimited:
+    """Translate a provider 429 into ``RateLimited`` honouring Retry-After."""
+    try:
+        retry_after = float(error.response.headers.get("retry-after", ""))
+    except ValueError:
+        retry_after = 5.0
+    return RateLimited(model, retry_after, throttled=True)
+
+
+def _mock_response(prompt) -> str:
+    return f"[Mock Response] I received your message: '{prompt[:100]}...'\n\nThis is a simulated response because no OpenAI API key is configured. To use real AI responses, please set OPENAI_API_KEY in your environment."
+
+
+def _mock_chunks(prompt) -> list[str]:
+    """Split the mock response into word-sized chunks to mimic a streamed reply."""
+    return re.findall(r"\S+\s*|\s+", _mock_response(prompt))
+
+
 def run_agent_sync(agent, prompt, max_tokens=1024):
     """
     Synchronous wrapper calling OpenAI chat completion using the modern
     `openai` SDK. In local/dev environments without an API key we fall
     back to a deterministic mock response so tests stay offline.
+    Deterministic requests are served from ``utils.completion_cache``.
+    Raises ``RateLimited`` instead of calling the model when it is over its
+    limit (``utils.rate_limiter``) or the provider answers 429.
     """
-    system = agent.description or "You are an assistant."
-    model = getattr(agent, "model", "gpt-4o-mini")
-    temperature = getattr(agent, "temperature", 0.7)
-
     # If no API key is configured, return a mock response for development
     if not OPENAI_API_KEY:
-        return f"[Mock Response] I received your message: '{prompt[:100]}...'\n\nThis is a simulated response because no OpenAI API key is configured. To use real AI responses, please set OPENAI_API_KEY in your environment."
+        return _mock_response(prompt)
+
+    kwargs = _completion_kwargs(agent, prompt, max_tokens)
+    cache_key = completion_cache.key_for(agent, kwargs)
+    cached = completion_cache.lookup(cache_key)
+    if cached is not None:
+        return cached
 
+    _reserve(kwargs)
     try:
         client = _get_client()
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
-        return response.choices[0].message.content
+        response = client.chat.completions.create(**kwargs)
+        content = response.choices[0].message.content
+        completion_cache.store(cache_key, content)
+        return content
+    except RateLimitError as e:
+        raise _throttled(kwargs["model"], e) from e
     except Exception as e:
         # Fallback to mock response if API call fails
         return f"[Error] Failed to get AI response: {str(e)}\n\nThis is a fallback mock response."
+
+
+def stream_agent_sync(agent, prompt, max_tokens=1024) -> Iterator[str]:
+    """
+    Streaming counterpart of ``run_agent_sync``.
+    Yields text deltas as the SDK receives them, so callers can show the
+    first tokens without waiting for the whole completion.
+    """
+    if not OPENAI_API_KEY:
+        yield from _mock_chunks(prompt)
+        return
+
+    kwargs = _completion_kwargs(agent, prompt, max_tokens)
+    cache_key = completion_cache.key_for(agent, kwargs)
+    cached = completion_cache.lookup(cache_key)
+    if cached is not None:
+        yield cached
+        return
+
+    _reserve(kwargs)
+    try:
+        client = _get_client()
+        stream = client.chat.completions.create(**kwargs, stream=True)
+        parts = []
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield parts[-1]
+        completion_cache.store(cache_key, "".join(parts))
+    except RateLimitError as e:
+        raise _throttled(kwargs["model"], e) from e
+    except Exception as e:
+        yield f"[Error] Failed to get AI response: {str(e)}\n\nThis is a fallback mock response."
+
+
+async def _alookup(cache_key):
+    """Cache lookup off the event loop (the Django cache client is blocking)."""
+    if cache_key is None:
+        return None
+    return await sync_to_async(completion_cache.lookup, thread_sensitive=False)(
+        cache_key
+    )
+
+
+async def _astore(cache_key, text):
+    if cache_key is not None:
+        await sync_to_async(completion_cache.store, thread_sensitive=False)(
+            cache_key, text
+        )
+
+
+async def run_agent_async(agent, prompt, max_tokens=1024):
+    """
+    Async counterpart of ``run_agent_sync`` for the shared async engine.
+    Requests are capped per model by ``MAX_IN_FLIGHT_PER_MODEL``.
+    """
+    if not OPENAI_API_KEY:
+        return _mock_response(prompt)
+
+    kwargs = _completion_kwargs(agent, prompt, max_tokens)
+    cache_key = completion_cache.key_for(agent, kwargs)
+    cached = await _alookup(cache_key)
+    if cached is not None:
+        return cached
+
+    await _areserve(kwargs)
+    try:
+        client = _get_async_client()
+        async with _model_semaphore(kwargs["model"]):
+            response = await client.chat.completions.create(**kwargs)
+        content = response.choices[0].message.content
+        await _astore(cache_key, content)
+        return content
+    except RateLimitError as e:
+        raise _throttled(kwargs["model"], e) from e
+    except Exception as e:
+        return f"[Error] Failed to get AI response: {str(e)}\n\nThis is a fallback mock response."
+
+
+async def stream_agent_async(agent, prompt, max_tokens=1024) -> AsyncIterator[str]:
+    """Async counterpart of ``stream_agent_sync``."""
+    if not OPENAI_API_KEY:
+        for chunk in _mock_chunks(prompt):
+            yield chunk
+        return
+
+    kwargs = _completion_kwargs(agent, prompt, max_tokens)
+    cache_key = completion_cache.key_for(agent, kwargs)
+    cached = await _alookup(cache_key)
+    if cached is not None:
+        yield cached
+        return
+
+    await _areserve(kwargs)
+    try:
+        client = _get_async_client()
+        parts = []
+        async with _model_semaphore(kwargs["model"]):
+            stream = await client.chat.completions.create(**kwargs, stream=True)
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield parts[-1]
+        await _astore(cache_key, "".join(parts))
+    except RateLimitError as e:
+        raise _throttled(kwargs["model"], e) from e
+    except Exception as e:
+        yield f"[Error] Failed to get AI response: {str(e)}\n\nThis is a fallback mock response."
@@ -0,0 +1,209 @@
+"""
+Token-bucket rate limiter for outbound LLM calls, keyed by model.
+
+Each model has two buckets refilled continuously: requests per minute and
+tokens per minute (prompt estimate plus ``max_tokens``). A call either
+reserves capacity in both or is refused with the number of seconds until
+enough has refilled. Callers do not sleep on a refusal: the OpenAI client
+raises ``RateLimited`` and the Celery task re-queues itself with that
+countdown, so waiting tasks hold no worker thread. Provider 429s surface
+the same way, with the provider's ``Retry-After``.
+
+Backends:
+
+* ``InMemoryRateLimiter`` - per process; for development and tests.
+* ``RedisRateLimiter`` - one bucket pair per model shared by every worker;
+  a Lua script refills and reserves atomically using the Redis clock.
+
+Configured by the ``LLM_RATE_LIMITS`` setting:
+
+    LLM_RATE_LIMITS = {
+        "LIMITS": {
+            "default": {"REQUESTS_PER_MINUTE": 500, "TOKENS_PER_MINUTE": 200_000},
+            "gpt-4o": {"REQUESTS_PER_MINUTE": 100, "TOKENS_PER_MINUTE": 30_000},
+        },
+    }
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULTS: dict[str, Any] = {
+    "ENABLED": True,
+    "BACKEND": "utils.rate_limiter.InMemoryRateLimiter",
+    "OPTIONS": {},
+    "LIMITS": {
+        "default": {"REQUESTS_PER_MINUTE": 500, "TOKENS_PER_MINUTE": 200_000},
+    },
+    # Fraction of the countdown added at random so re-queued tasks spread out
+    "RETRY_JITTER": 0.1,
+    # Re-queues per task before it is marked failed
+    "MAX_RETRIES": 20,
+}
+
+STAT_NAMES = ("delayed", "wait_seconds", "throttled")
+
+
+def get_limiter_setting(name: str) -> Any:
+    return getattr(settings, "LLM_RATE_LIMITS", {}).get(name, DEFAULTS[name])
+
+
+def limits_for(model: str) -> tuple[float, float]:
+    """Return ``(requests_per_minute, tokens_per_minute)`` for ``model``."""
+    limits = get_limiter_setting("LIMITS")
+    config = limits.get(model) or limits.get("default") or DEFAULTS["LIMITS"]["default"]
+    return config["REQUESTS_PER_MINUTE"], config["TOKENS_PER_MINUTE"]
+
+
+class RateLimited(Exception):
+    """Raised instead of calling the model when ``model`` is over its limit."""
+
+    def __init__(self, model: str, retry_after: float, throttled: bool = False):
+        super().__init__(f"{model} rate limited; retry in {retry_after:.2f}s")
+        self.model = model
+        self.retry_after = retry_after
+        # True when the provider answered 429, False for our own limiter
+        self.throttled = throttled
+
+
+class InMemoryRateLimiter:
+    """Token buckets held in this process, guarded by a lock."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # model -> [requests, tokens, last refill (monotonic seconds)]
+        self.buckets: Dict[str, list] = {}
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def acquire(self, model: str, tokens: int) -> float:
+        rpm, tpm = limits_for(model)
+        tokens = min(tokens, tpm)
+        now = time.monotonic()
+        with self.lock:
+            requests, available, last = self.buckets.get(model, [rpm, tpm, now])
+            elapsed = now - last
+            requests = min(rpm, requests + elapsed * rpm / 60)
+            available = min(tpm, available + elapsed * tpm / 60)
+            wait = max(
+                (1 - requests) * 60 / rpm if requests < 1 else 0,
+                (tokens - available) * 60 / tpm if available < tokens else 0,
+            )
+            if not wait:
+                requests -= 1
+                available -= tokens
+            self.buckets[model] = [requests, available, now]
+            return wait
+
+    def record(self, model: str, name: str, amount: float = 1):
+        with self.lock:
+            model_stats = self.stats.setdefault(model, dict.fromkeys(STAT_NAMES, 0))
+            model_stats[name] += amount
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        with self.lock:
+            return {model: dict(values) for model, values in self.stats.items()}
+
+
+# KEYS: bucket hash. ARGV: requests/min, tokens/min, token cost, ttl seconds.
+# Returns the wait in microseconds (0 when capacity was reserved).
+ACQUIRE_SCRIPT = """
+local rpm, tpm = tonumber(ARGV[1]), tonumber(ARGV[2])
+local cost, ttl = tonumber(ARGV[3]), tonumber(ARGV[4])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000000 + tonumber(clock[2])
+local state = redis.call('HMGET', KEYS[1], 'requests', 'tokens', 'ts')
+local requests = tonumber(state[1]) or rpm
+local tokens = tonumber(state[2]) or tpm
+local elapsed = math.max(now - (tonumber(state[3]) or now), 0) / 60000000
+requests = math.min(rpm, requests + elapsed * rpm)
+tokens = math.min(tpm, tokens + elapsed * tpm)
+local wait = 0
+if requests < 1 then
+    wait = (1 - requests) / rpm
+end
+if tokens < cost then
+    wait = math.max(wait, (cost - tokens) / tpm)
+end
+if wait == 0 then
+    requests = requests - 1
+    tokens = tokens - cost
+end
+redis.call('HSET', KEYS[1], 'requests', tostring(requests), 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ttl)
+return math.ceil(wait * 60000000)
+"""
+
+
+class RedisRateLimiter:
+    """
+    Token buckets shared through Redis: one hash per model holding both
+    bucket levels and the last refill time, plus a stats hash per model.
+    """
+
+    bucket_prefix = "llm:ratelimit:bucket:"
+    stats_prefix = "llm:ratelimit:stats:"
+    models_key = "llm:ratelimit:models"
+
+    def __init__(self, url: str = "redis://127.0.0.1:6379/1", **options):
+        import redis
+
+        self.client = redis.Redis.from_url(url, **options)
+        self._acquire = self.client.register_script(ACQUIRE_SCRIPT)
+
+    def acquire(self, model: str, tokens: int) -> float:
+        rpm, tpm = limits_for(model)
+        wait_us = self._acquire(
+            keys=[f"{self.bucket_prefix}{model}"],
+            # An idle bucket is full again after a minute; keep it a bit longer
+            args=[rpm, tpm, min(tokens, tpm), 120],
+        )
+        return int(wait_us) / 1_000_000
+
+    def record(self, model: str, name: str, amount: float = 1):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.sadd(self.models_key, model)
+        pipe.hincrbyfloat(f"{self.stats_prefix}{model}", name, amount)
+        pipe.execute()
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        models = sorted(m.decode() for m in self.client.smembers(self.models_key))
+        pipe = self.client.pipeline(transaction=False)
+        for model in models:
+            pipe.hgetall(f"{self.stats_prefix}{model}")
+        stats = {}
+        for model, values in zip(models, pipe.execute()):
+            decoded = {k.decode(): float(v) for k, v in values.items()}
+            stats[model] = {name: decoded.get(name, 0) for name in STAT_NAMES}
+        return stats
+
+
+_limiter = None
+
+
+def get_rate_limiter():
+    """Return the process-wide limiter configured by ``LLM_RATE_LIMITS``."""
+    global _limiter
+    if _limiter is None:
+        backend = import_string(get_limiter_setting("BACKEND"))
+        _limiter = backend(**get_limiter_setting("OPTIONS"))
+    return _limiter
+
+
+def reset_rate_limiter():
+    """Drop the cached limiter so the next call re-reads settings (used in tests)."""
+    global _limiter
+    _limiter = None
+
+
+def reserve(model: str, tokens: int):
+    """Reserve capacity for one call to ``model`` or raise ``RateLimited``."""
+    if not get_limiter_setting("ENABLED"):
+        return
+    wait = get_rate_limiter().acquire(model, tokens)
+    if wait > 0:
+        raise RateLimited(model, wait)
@@ -0,0 +1,230 @@
+"""
+Single-flight coalescing for duplicate concurrent LLM calls.
+
+When identical requests are in flight at the same time (a retried POST, a
+double-click), only one of them, the leader, calls the model. The others
+wait for the leader's result and return it as their own.
+
+Coordination happens at two levels:
+
+* in-process: threads of one worker wait on a ``threading.Event``, so only
+  one thread per process talks to Redis for a given key;
+* cross-process: the leader holds a token-owned Redis lock
+  (``apps.core.cache.acquire_lock``) and writes its result under a key
+  scoped to the lock token, which followers in other workers poll for.
+
+If the cache is unreachable, coalescing silently degrades to in-process
+only. If a leader fails or disappears, its followers run the call
+themselves rather than waiting out the lock.
+
+    flight = get_single_flight()
+    output = flight.do(request_key(agent, prompt), lambda: run_agent_sync(...))
+
+Configured by the ``SINGLE_FLIGHT`` setting.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.core.cache import acquire_lock, lock_owner, release_lock
+
+logger = logging.getLogger(__name__)
+
+LOCK_PREFIX = "llm:inflight:lock:"
+RESULT_PREFIX = "llm:inflight:result:"
+
+DEFAULTS: dict[str, Any] = {
+    "ENABLED": True,
+    "LOCK_TTL": 120,  # seconds; upper bound on one upstream call
+    "RESULT_TTL": 60,  # seconds a finished result stays readable by followers
+    "POLL_INTERVAL_MS": 50,
+    "MAX_POLL_INTERVAL_MS": 500,
+}
+
+
+def get_single_flight_setting(name: str) -> Any:
+    return getattr(settings, "SINGLE_FLIGHT", {}).get(name, DEFAULTS[name])
+
+
+class _Call:
+    """In-process state shared by every thread waiting on one key."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: str | None = None
+
+
+class Flight:
+    """One caller's membership in a coalesced call."""
+
+    def __init__(self, group, key, call=None, leader=True, token=None, remote=False):
+        self.group = group
+        self.key = key
+        self.call = call
+        self.leader = leader
+        # Lock token we hold (leader) or are waiting on (remote follower)
+        self.token = token
+        # True when this thread waits on another process rather than a thread
+        self.remote = remote
+
+    def wait(self) -> str | None:
+        """
+        Block until the leader finishes and return its result, or None if
+        the leader failed, so the caller should run the call itself.
+        """
+        if self.leader:
+            return None
+        if not self.remote:
+            self.call.done.wait(get_single_flight_setting("LOCK_TTL"))
+            return self.call.result
+
+        result = None
+        try:
+            result = self.group._poll(self.key, self.token)
+        finally:
+            self.group._release_local(self.key, self.call, result)
+        return result
+
+    def finish(self, result: str | None):
+        """Publish the leader's result to every follower."""
+        if not self.leader or self.call is None:
+            return
+        if self.token is not None and result is not None:
+            try:
+                cache.set(
+                    f"{RESULT_PREFIX}{self.key}:{self.token}",
+                    result,
+                    timeout=get_single_flight_setting("RESULT_TTL"),
+                )
+            except Exception:
+                logger.warning(f"Single-flight result for {self.key} not shared")
+        self._release(result)
+
+    def abort(self):
+        """Release the flight without a result; followers run the call."""
+        if self.leader and self.call is not None:
+            self._release(None)
+
+    def _release(self, result):
+        if self.token is not None:
+            self.group._unlock(self.key, self.token)
+        self.group._release_local(self.key, self.call, result)
+
+
+class SingleFlight:
+    """Registry of in-flight calls for one process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: dict[str, _Call] = {}
+
+    def begin(self, key: str) -> Flight:
+        """Join the flight for ``key``, becoming its leader if there is none."""
+        if not get_single_flight_setting("ENABLED"):
+            return Flight(self, key)
+
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                return Flight(self, key, call, leader=False, remote=False)
+            call = self.calls[key] = _Call()
+
+        # First thread in this process: coordinate with other workers
+        try:
+            lock = self._lock(key)
+        except Exception:
+            logger.warning(f"Single-flight lock unavailable for {key}; local only")
+            return Flight(self, key, call)
+        if lock is None:
+            return Flight(self, key, call)
+        leader, token = lock
+        if leader:
+            return Flight(self, key, call, token=token)
+        return Flight(self, key, call, leader=False, token=token, remote=True)
+
+    def do(self, key: str, fn: Callable[[], str]) -> str:
+        """Return ``fn()``, sharing one invocation among concurrent callers."""
+        flight = self.begin(key)
+        if not flight.leader:
+            result = flight.wait()
+            if result is not None:
+                return result
+            # Leader failed or timed out: run uncoalesced
+            return fn()
+
+        try:
+            result = fn()
+        except BaseException:
+            flight.abort()
+            raise
+        flight.finish(result)
+        return result
+
+    def _lock(self, key) -> tuple[bool, str] | None:
+        """
+        Try to take the Redis lock. Returns ``(True, our_token)`` when we
+        lead, ``(False, leader_token)`` when another worker does.
+        """
+        lock_key = LOCK_PREFIX + key
+        ttl = get_single_flight_setting("LOCK_TTL")
+        for _ in range(3):
+            token = acquire_lock(lock_key, ttl)
+            if token is not None:
+                return True, token
+            current = lock_owner(lock_key)
+            if current is not None:
+                return False, current
+            # The leader finished between add() and get(); try again
+        return None
+
+    def _unlock(self, key, token):
+        try:
+            # Only our own lock; it may have expired and been retaken
+            release_lock(LOCK_PREFIX + key, token)
+        except Exception:
+            logger.warning(f"Single-flight lock for {key} not released")
+
+    def _poll(self, key, token) -> str | None:
+        """Wait for another worker's result until its lock goes away."""
+        result_key = f"{RESULT_PREFIX}{key}:{token}"
+        lock_key = LOCK_PREFIX + key
+        interval = get_single_flight_setting("POLL_INTERVAL_MS") / 1000
+        max_interval = get_single_flight_setting("MAX_POLL_INTERVAL_MS") / 1000
+        deadline = time.monotonic() + get_single_flight_setting("LOCK_TTL")
+        try:
+            while time.monotonic() < deadline:
+                result = cache.get(result_key)
+                if result is not None:
+                    return result
+                if lock_owner(lock_key) != token:
+                    # Lock released or expired: one last look for the result
+                    return cache.get(result_key)
+                time.sleep(interval)
+                interval = min(interval * 1.5, max_interval)
+        except Exception:
+            logger.warning(f"Single-flight poll for {key} failed")
+        return None
+
+    def _release_local(self, key, call, result):
+        with self.lock:
+            if self.calls.get(key) is call:
+                del self.calls[key]
+        call.result = result
+        call.done.set()
+
+
+_single_flight: SingleFlight | None = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide single-flight registry."""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
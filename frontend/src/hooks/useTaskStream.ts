@@ -1,10 +1,16 @@
+import { useQueryClient } from "@tanstack/react-query"
 import { useEffect, useState } from "react"
 
+const API_BASE_URL = import.meta.env.VITE_API_URL || "http://localhost:8000"
+
 export function useTaskStream() {
+  const queryClient = useQueryClient()
   const [updates, setUpdates] = useState<any[]>([])
 
   useEffect(() => {
-    const evtSource = new EventSource("http://localhost:8000/stream/tasks/")
+    // EventSource cannot set headers, so the JWT goes in the query string
+    const token = localStorage.getItem("token")
+    const evtSource = new EventSource(`${API_BASE_URL}/stream/tasks/?token=${token}`)
     evtSource.onmessage = (e) => {
       const data = JSON.parse(e.data)
       setUpdates((prev) => {
@@ -12,8 +18,23 @@ export function useTaskStream() {
         return [data, ...existing]
       })
     }
+    // Streamed output chunks arrive as transient "delta" events between snapshots
+    evtSource.addEventListener("delta", (e) => {
+      const { id, delta } = JSON.parse((e as MessageEvent).data)
+      setUpdates((prev) =>
+        prev.map((t) =>
+          t.id === id ? { ...t, output_text: (t.output_text || "") + delta } : t
+        )
+      )
+    })
+    // Sent on reconnect when Last-Event-ID is older than the server's replay
+    // buffer: missed events are gone, so drop what we have and reload the list
+    evtSource.addEventListener("reset", () => {
+      setUpdates([])
+      queryClient.invalidateQueries({ queryKey: ["tasks"] })
+    })
     return () => evtSource.close()
-  }, [])
+  }, [queryClient])
 
   return updates
 }
@@ -6,7 +6,7 @@ export function useTasks(params = {}) {
     queryKey: ["tasks", params],
     queryFn: async () => {
       const { data } = await api.get("/tasks/", { params });
-      return data; // expected paginated: {count, next, previous, results}
+      return data; // cursor-paginated: {next, previous, results}
     },
     placeholderData: (previousData) => previousData,
   });